@@ -0,0 +1,65 @@
+"""
+导入开销基准测试
+
+在独立子进程中导入插件包，测量导入耗时与进程峰值内存（RSS），
+用于对比重构前后的启动开销。
+
+用法：
+    python benchmarks/bench_import.py [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程中执行的导入脚本
+_IMPORT_SNIPPET = r'''
+import importlib, json, resource, sys, time
+sys.path.insert(0, {parent!r})
+base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+importlib.import_module({package!r})
+elapsed = time.perf_counter() - start
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+modules = [m for m in sys.modules if m.startswith({package!r})]
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "rss_delta_kb": peak_rss - base_rss,
+    "peak_rss_kb": peak_rss,
+    "plugin_modules": len(modules),
+}}))
+'''
+
+
+def run_once():
+    """在新进程中导入一次插件包并返回测量结果"""
+    snippet = _IMPORT_SNIPPET.format(
+        parent=os.path.dirname(REPO_DIR),
+        package=os.path.basename(REPO_DIR),
+    )
+    output = subprocess.check_output([sys.executable, '-c', snippet], text=True)
+    # 插件导入时可能打印日志，结果位于最后一行
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量插件导入耗时与内存')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.repeat)]
+    times = sorted(r['import_seconds'] for r in results)
+    median_time = times[len(times) // 2]
+
+    print(f"导入耗时 (中位数): {median_time * 1000:.1f} ms")
+    print(f"导入耗时 (最小值): {times[0] * 1000:.1f} ms")
+    print(f"峰值RSS增量: {max(r['rss_delta_kb'] for r in results) / 1024:.1f} MB")
+    print(f"加载的插件模块数: {results[0]['plugin_modules']}")
+
+
+if __name__ == '__main__':
+    main()
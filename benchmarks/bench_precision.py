@@ -0,0 +1,104 @@
+"""
+计算精度基准测试
+
+对比Camera Raw增强逐像素阶段的float32融合内核（_apply_pointwise_stack）与原逐函数链：
+原实现与Python列表做 np.dot 时整条链被提升为float64，这里按原公式以float64重现作为对照。
+测量1080p和4K下的耗时、NumPy峰值分配内存（tracemalloc），并报告两者的最大差异。
+
+用法：
+    python benchmarks/bench_precision.py [--repeat 3]
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from common import RESOLUTIONS, load_enhance_node, time_call
+
+# 原实现的亮度权重是Python列表，np.dot 后的结果为float64
+_LUMA_WEIGHTS = [0.299, 0.587, 0.114]
+
+PARAMS = dict(exposure=0.3, highlights=-40, shadows=35, whites=20, blacks=-15,
+              temperature=15, tint=-5, saturation=10, contrast=15)
+
+
+def pointwise_float64_reference(node, image, exposure, highlights, shadows, whites, blacks,
+                                temperature, tint, saturation, contrast):
+    """原逐函数链（曝光 → 高光 → 阴影 → 白色 → 黑色 → 白平衡 → 饱和度 → 对比度），仅作为对照"""
+    result = np.clip(image * 2 ** exposure, 0, 1)
+
+    luminance = np.dot(result, _LUMA_WEIGHTS)
+    highlight_mask = np.power(np.maximum((luminance - 0.7) / 0.3, 0.0), 1.5)[..., np.newaxis]
+    adjustment = highlights / 100.0
+    factor = np.power(1.0 + adjustment, 1.2) if highlights < 0 else 1.0 + adjustment * 0.3
+    result = np.clip(result * (1 - highlight_mask) + result * factor * highlight_mask, 0, 1)
+
+    luminance = np.dot(result, _LUMA_WEIGHTS)
+    shadow_mask = np.power(np.maximum((0.3 - luminance) / 0.3, 0.0), 1.2)[..., np.newaxis]
+    adjustment = shadows / 100.0
+    if shadows > 0:
+        shadowed = np.power(result, 1.0 / (1.0 + adjustment * 0.8))
+    else:
+        shadowed = result * np.power(1.0 + adjustment, 0.8)
+    result = np.clip(result * (1 - shadow_mask) + shadowed * shadow_mask, 0, 1)
+
+    luminance = np.dot(result, _LUMA_WEIGHTS)
+    white_weight = np.power(luminance, 2.0)[..., np.newaxis]
+    result = np.clip(result * (1.0 + whites / 100.0 * (0.8 if whites > 0 else 0.4) * white_weight), 0, 1)
+
+    luminance = np.dot(result, _LUMA_WEIGHTS)
+    black_weight = np.power(1.0 - np.power(luminance, 0.5), 1.5)[..., np.newaxis]
+    adjustment = blacks / 100.0
+    if blacks > 0:
+        result = result + adjustment * 0.4 * black_weight
+    else:
+        result = result * (1.0 + adjustment * 0.6 * black_weight)
+    result = np.clip(result, 0, 1)
+
+    result = result * np.array(node._white_balance_multipliers(temperature, tint))
+    result = np.clip(result / np.maximum(result.max(axis=2, keepdims=True), 1.0), 0, 1)
+
+    gray = np.dot(result, _LUMA_WEIGHTS)[..., np.newaxis]
+    saturation_factor = 1.0 + saturation / 100.0
+    result = np.clip(gray * (1 - saturation_factor) + result * saturation_factor, 0, 1)
+
+    return np.clip((result - 0.5) * (1.0 + contrast / 100.0) + 0.5, 0, 1)
+
+
+def measure(func, repeat):
+    """返回 (最短耗时秒, NumPy峰值分配MB, 结果)"""
+    elapsed, result = time_call(func, repeat)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='逐像素阶段：float32融合内核 vs 原float64逐函数链')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    args = parser.parse_args()
+
+    node = load_enhance_node()
+
+    for name, (height, width) in RESOLUTIONS.items():
+        image = np.random.default_rng(0).random((height, width, 3), dtype=np.float32)
+        fused_args = (PARAMS['exposure'], PARAMS['highlights'], PARAMS['shadows'], PARAMS['whites'],
+                      PARAMS['blacks'], PARAMS['temperature'], PARAMS['tint'], 0, PARAMS['saturation'],
+                      PARAMS['contrast'])
+
+        ref_time, ref_peak, expected = measure(
+            lambda: pointwise_float64_reference(node, image.astype(np.float64), **PARAMS), args.repeat)
+        new_time, new_peak, actual = measure(
+            lambda: node._apply_pointwise_stack(image, *fused_args), args.repeat)
+
+        max_diff = float(np.abs(expected - actual).max())
+        print(f"[{name}] float64逐函数链: {ref_time * 1000:.1f} ms, 峰值 {ref_peak:.0f} MB | "
+              f"float32融合内核: {new_time * 1000:.1f} ms ({ref_time / new_time:.1f}x), 峰值 {new_peak:.0f} MB | "
+              f"最大差异: {max_diff:.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+自然饱和度基准测试
+
+对比 CameraRawEnhanceNode._apply_vibrance 的浮点RGB实现与原8位HSV往返实现，
+测量1080p和4K下的耗时，并报告两者的平均差异和输出的色阶数（8位实现的色带）。
+
+用法：
+    python benchmarks/bench_vibrance.py [--repeat 3] [--vibrance 40]
+"""
+
+import argparse
+
+import cv2
+import numpy as np
+
+from common import RESOLUTIONS, load_enhance_node, time_call
+
+
+def vibrance_hsv_reference(image, vibrance_value):
+    """原8位HSV往返实现，仅作为对照"""
+    img_uint8 = (image * 255).astype(np.uint8)
+    hsv = cv2.cvtColor(img_uint8, cv2.COLOR_RGB2HSV).astype(np.float32)
+    h, s, v = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
+
+    adjustment = vibrance_value / 100.0
+    saturation_mask = 1.0 - (s / 255.0) ** 2
+
+    skin_mask = np.ones_like(h)
+    skin_hue_range = ((h >= 5) & (h <= 30)) | ((h >= 160) & (h <= 180))
+    skin_mask[skin_hue_range] = 0.3
+
+    final_mask = saturation_mask * skin_mask
+    if adjustment > 0:
+        s_enhanced = s + adjustment * 120 * final_mask
+    else:
+        s_enhanced = s + adjustment * 255 * final_mask
+    s_enhanced = np.clip(s_enhanced, 0, 255)
+
+    hsv_enhanced = np.stack([h, s_enhanced, v], axis=2)
+    result_uint8 = cv2.cvtColor(hsv_enhanced.astype(np.uint8), cv2.COLOR_HSV2RGB)
+    return result_uint8.astype(np.float32) / 255.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自然饱和度：浮点RGB实现 vs 8位HSV实现')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--vibrance', type=float, default=40.0, help='自然饱和度')
+    args = parser.parse_args()
+
+    node = load_enhance_node()
+
+    for name, (height, width) in RESOLUTIONS.items():
+        # 平滑渐变加少量噪声，便于观察色带
+        ramp = np.linspace(0, 1, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+        image = np.broadcast_to(ramp * np.array([0.8, 0.6, 0.5], dtype=np.float32), (height, width, 3)).copy()
+        image += np.random.default_rng(0).normal(0, 0.01, image.shape).astype(np.float32)
+        image = np.clip(image, 0, 1)
+
+        ref_time, expected = time_call(lambda: vibrance_hsv_reference(image, args.vibrance), args.repeat)
+        new_time, actual = time_call(lambda: node._apply_vibrance(image, args.vibrance), args.repeat)
+
+        mean_diff = float(np.abs(expected - actual).mean())
+        ref_levels = len(np.unique(expected[height // 2, :, 0]))
+        new_levels = len(np.unique(actual[height // 2, :, 0]))
+        print(f"[{name}] 8位HSV: {ref_time * 1000:.1f} ms | 浮点RGB: {new_time * 1000:.1f} ms "
+              f"({ref_time / new_time:.1f}x) | 平均差异: {mean_diff:.4f} | 单行色阶数: {ref_levels} → {new_levels}")
+
+
+if __name__ == '__main__':
+    main()
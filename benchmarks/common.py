@@ -0,0 +1,39 @@
+"""
+基准测试公共工具
+"""
+
+import importlib
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESOLUTIONS = {
+    '1080p': (1080, 1920),
+    '4K': (2160, 3840),
+}
+
+
+def import_plugin_module(relative_name):
+    """以包的形式导入插件子模块，例如 'nodes.camera_raw.enhance'"""
+    parent = os.path.dirname(REPO_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    return importlib.import_module(f"{os.path.basename(REPO_DIR)}.{relative_name}")
+
+
+def load_enhance_node():
+    """返回Camera Raw增强节点实例"""
+    return import_plugin_module('nodes.camera_raw.enhance').CameraRawEnhanceNode()
+
+
+def time_call(func, repeat):
+    """返回多次调用的最短耗时（秒）和最后一次结果"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -18,6 +18,11 @@ import json
 from scipy import stats
 
 from ..core.base_node import BaseImageNode
+from ..core.histogram import batched_histogram, histogram_bin_edges
+
+# 各通道直方图的名称与绘图颜色
+_CHANNEL_LABELS = {'R': 'Red', 'G': 'Green', 'B': 'Blue'}
+_CHANNEL_COLORS = {'R': '#ff6b6b', 'G': '#51cf66', 'B': '#74c0fc'}
 
 
 class HistogramAnalysisNode(BaseImageNode):
@@ -73,9 +78,15 @@ class HistogramAnalysisNode(BaseImageNode):
                 statistics_list = []
                 raw_datas = []
                 
+                # 整批所有帧、所有通道的直方图一次计算
+                batch_histograms = self._compute_histograms(
+                    (image * 255.0).clamp(0, 255), channel, histogram_bins
+                )
+                
                 for i in range(batch_size):
+                    frame_histograms = {name: hist[i] for name, hist in batch_histograms.items()}
                     result = self._process_single_image(
-                        image[i], channel, histogram_bins, show_statistics, export_data
+                        image[i], channel, histogram_bins, show_statistics, export_data, frame_histograms
                     )
                     histogram_images.append(result[0])
                     histogram_datas.append(result[1])
@@ -107,30 +118,63 @@ class HistogramAnalysisNode(BaseImageNode):
                 fallback_hist = fallback_hist.unsqueeze(0)
             return (fallback_hist, "Error generating histogram", "Error calculating statistics", "Error exporting data")
     
-    def _process_single_image(self, image, channel, histogram_bins, show_statistics, export_data):
-        """处理单张图像的直方图分析"""
+    def _process_single_image(self, image, channel, histogram_bins, show_statistics, export_data, histograms=None):
+        """处理单张图像的直方图分析（histograms 为预先计算的各通道直方图）"""
         device = image.device
         
         # 确保图像在正确的范围内
         img_255 = (image * 255.0).clamp(0, 255)
         
+        # 各通道直方图只计算一次，供可视化、数据和导出共用
+        if histograms is None:
+            histograms = {name: hist[0] for name, hist in
+                          self._compute_histograms(img_255.unsqueeze(0), channel, histogram_bins).items()}
+        
         # 生成专业直方图可视化
-        histogram_image = self._generate_professional_histogram_image(img_255, channel, histogram_bins)
+        histogram_image = self._generate_professional_histogram_image(img_255, channel, histogram_bins, histograms)
         
         # 生成直方图数据
-        histogram_data = self._generate_detailed_histogram_data(img_255, channel, histogram_bins)
+        histogram_data = self._generate_detailed_histogram_data(img_255, channel, histogram_bins, histograms)
         
         # 生成统计信息
         statistics = self._calculate_comprehensive_statistics(img_255, channel) if show_statistics else "Statistics disabled"
         
         # 导出原始数据
-        raw_data = self._export_raw_histogram_data(img_255, channel, histogram_bins) if export_data else "Raw data export disabled"
+        raw_data = self._export_raw_histogram_data(img_255, channel, histogram_bins, histograms) if export_data else "Raw data export disabled"
         
         return histogram_image, histogram_data, statistics, raw_data
     
-    def _generate_professional_histogram_image(self, img_255, channel, bins=256):
+    def _compute_histograms(self, img_255, channel, bins):
+        """
+        计算整批各通道的直方图
+        
+        Args:
+            img_255: [B, H, W, C] 0-255 图像
+        
+        Returns:
+            {通道名: [B, bins] 直方图}，RGB模式包含R/G/B三项
+        """
+        if channel == 'RGB':
+            names = ['R', 'G', 'B']
+            data = img_255[..., :3]
+        elif channel in ['R', 'G', 'B']:
+            names = [channel]
+            channel_idx = {'R': 0, 'G': 1, 'B': 2}[channel]
+            data = img_255[..., channel_idx:channel_idx + 1]
+        else:
+            names = ['Luminance']
+            data = (img_255[..., 0] * 0.299 + img_255[..., 1] * 0.587 + img_255[..., 2] * 0.114).unsqueeze(-1)
+        
+        hist = batched_histogram(data, bins=bins, value_range=(0, 255))
+        return {name: hist[:, k] for k, name in enumerate(names)}
+    
+    def _generate_professional_histogram_image(self, img_255, channel, bins=256, histograms=None):
         """生成专业的直方图可视化图像"""
-        img_np = img_255.cpu().numpy()
+        if histograms is None:
+            histograms = {name: hist[0] for name, hist in
+                          self._compute_histograms(img_255.unsqueeze(0), channel, bins).items()}
+        bin_edges = histogram_bin_edges(bins, (0, 255))
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
         
         # 创建高质量的直方图图像
         fig, ax = plt.subplots(figsize=(12, 8), facecolor='#2a2a2a')
@@ -138,33 +182,20 @@ class HistogramAnalysisNode(BaseImageNode):
         
         if channel == 'RGB':
             # RGB综合直方图
-            colors = ['#ff6b6b', '#51cf66', '#74c0fc']
-            labels = ['Red', 'Green', 'Blue']
-            
-            for i, (color, label) in enumerate(zip(colors, labels)):
-                channel_data = img_np[:, :, i].flatten()
-                hist, bin_edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-                bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-                ax.plot(bin_centers, hist, color=color, alpha=0.7, linewidth=2, label=label)
+            for name, hist in histograms.items():
+                color = _CHANNEL_COLORS[name]
+                ax.plot(bin_centers, hist, color=color, alpha=0.7, linewidth=2, label=_CHANNEL_LABELS[name])
                 ax.fill_between(bin_centers, hist, alpha=0.3, color=color)
         
         elif channel in ['R', 'G', 'B']:
             # 单通道直方图
-            channel_idx = {'R': 0, 'G': 1, 'B': 2}[channel]
-            color = {'R': '#ff6b6b', 'G': '#51cf66', 'B': '#74c0fc'}[channel]
-            
-            channel_data = img_np[:, :, channel_idx].flatten()
-            hist, bin_edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-            bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-            ax.bar(bin_centers, hist, width=(255/bins)*0.8, color=color, alpha=0.8, edgecolor='none')
+            ax.bar(bin_centers, histograms[channel], width=(255/bins)*0.8, color=_CHANNEL_COLORS[channel],
+                   alpha=0.8, edgecolor='none')
         
         elif channel == 'Luminance':
             # 亮度直方图
-            luminance = img_np[:, :, 0] * 0.299 + img_np[:, :, 1] * 0.587 + img_np[:, :, 2] * 0.114
-            luminance_data = luminance.flatten()
-            hist, bin_edges = np.histogram(luminance_data, bins=bins, range=(0, 255))
-            bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
-            ax.bar(bin_centers, hist, width=(255/bins)*0.8, color='#cccccc', alpha=0.8, edgecolor='none')
+            ax.bar(bin_centers, histograms['Luminance'], width=(255/bins)*0.8, color='#cccccc',
+                   alpha=0.8, edgecolor='none')
         
         # 样式设置
         ax.set_xlim(0, 255)
@@ -199,32 +230,21 @@ class HistogramAnalysisNode(BaseImageNode):
         
         return result_tensor
     
-    def _generate_detailed_histogram_data(self, img_255, channel, bins):
+    def _generate_detailed_histogram_data(self, img_255, channel, bins, histograms=None):
         """生成详细的直方图数据"""
-        img_np = img_255.cpu().numpy()
-        data = {}
+        if histograms is None:
+            histograms = {name: hist[0] for name, hist in
+                          self._compute_histograms(img_255.unsqueeze(0), channel, bins).items()}
+        bin_edges = histogram_bin_edges(bins, (0, 255))
+        total_pixels = int(img_255.shape[0] * img_255.shape[1])
         
-        if channel == 'RGB':
-            for i, ch in enumerate(['R', 'G', 'B']):
-                channel_data = img_np[:, :, i].flatten()
-                hist, bin_edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-                data[ch] = {
-                    'histogram': hist.tolist(),
-                    'bin_edges': bin_edges.tolist(),
-                    'total_pixels': len(channel_data)
-                }
-        else:
-            if channel in ['R', 'G', 'B']:
-                channel_idx = {'R': 0, 'G': 1, 'B': 2}[channel]
-                channel_data = img_np[:, :, channel_idx].flatten()
-            elif channel == 'Luminance':
-                channel_data = (img_np[:, :, 0] * 0.299 + img_np[:, :, 1] * 0.587 + img_np[:, :, 2] * 0.114).flatten()
-            
-            hist, bin_edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-            data[channel] = {
+        # Luminance模式的键名保持为通道名
+        data = {}
+        for name, hist in histograms.items():
+            data[channel if channel == 'Luminance' else name] = {
                 'histogram': hist.tolist(),
                 'bin_edges': bin_edges.tolist(),
-                'total_pixels': len(channel_data)
+                'total_pixels': total_pixels
             }
         
         return json.dumps(data, indent=2)
@@ -276,40 +296,25 @@ class HistogramAnalysisNode(BaseImageNode):
             'kurtosis': float(stats.kurtosis(data))
         }
     
-    def _export_raw_histogram_data(self, img_255, channel, bins):
+    def _export_raw_histogram_data(self, img_255, channel, bins, histograms=None):
         """导出原始直方图数据（CSV格式）"""
-        img_np = img_255.cpu().numpy()
+        if histograms is None:
+            histograms = {name: hist[0] for name, hist in
+                          self._compute_histograms(img_255.unsqueeze(0), channel, bins).items()}
+        bin_edges = histogram_bin_edges(bins, (0, 255))
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
         csv_lines = []
         
         if channel == 'RGB':
             csv_lines.append("Bin_Center,Red_Count,Green_Count,Blue_Count")
-            
-            # 计算每个通道的直方图
-            hists = []
-            bin_edges = None
-            for i in range(3):
-                channel_data = img_np[:, :, i].flatten()
-                hist, edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-                hists.append(hist)
-                if bin_edges is None:
-                    bin_edges = edges
-            
-            bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+            hists = [histograms['R'], histograms['G'], histograms['B']]
             
             for i, center in enumerate(bin_centers):
                 csv_lines.append(f"{center:.1f},{hists[0][i]},{hists[1][i]},{hists[2][i]}")
         
         else:
             csv_lines.append(f"Bin_Center,{channel}_Count")
-            
-            if channel in ['R', 'G', 'B']:
-                channel_idx = {'R': 0, 'G': 1, 'B': 2}[channel]
-                channel_data = img_np[:, :, channel_idx].flatten()
-            elif channel == 'Luminance':
-                channel_data = (img_np[:, :, 0] * 0.299 + img_np[:, :, 1] * 0.587 + img_np[:, :, 2] * 0.114).flatten()
-            
-            hist, bin_edges = np.histogram(channel_data, bins=bins, range=(0, 255))
-            bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+            hist = histograms[channel]
             
             for i, center in enumerate(bin_centers):
                 csv_lines.append(f"{center:.1f},{hist[i]}")
@@ -7,8 +7,12 @@ Camera Raw增强节点
 - 去薄雾效果：减少或增加大气雾霾效果
 - 混合控制和整体强度调节
 - 遮罩支持
+- 批量参数扫描：一次执行输出多组滑块取值的变体
 """
 
+import functools
+import math
+
 import torch
 import numpy as np
 import cv2
@@ -17,12 +21,144 @@ import io
 import base64
 
 from ..core.base_node import BaseImageNode
-from ..core.mask_utils import apply_mask_to_image, blur_mask
+from ..core.mask_utils import apply_mask_to_image, blur_mask, prepare_batch_mask
 from ..core.generic_preset_manager import GenericPresetManager
+from ..core.config import get_config
+from ..core.parallel import get_batch_workers
+from ..core.process_pool import run_batch_in_processes
+from ..core.tiling import process_tiled, get_frame_chunk_size
+from ..core.pyramid import get_pyramid, pyramid_halo, pyramid_alignment
+from ..core.cache import MemoryLRUCache, fingerprint_array
+from ..core.proxy import make_proxy
+from ..core.precision import as_compute_array, COMPUTE_NP_DTYPE
+from ..core.guided_filter import guided_filter
+from ..core.param_sweep import resolve_parameter_sweep, expand_sweep_batch
 
 # 创建Camera Raw预设管理器实例
 camera_raw_preset_manager = GenericPresetManager('camera_raw')
 
+# 各处理阶段的中间结果缓存
+_stage_cache = MemoryLRUCache('camera_raw_stages', budget_key='stage_cache_memory_mb')
+
+
+# 色调查找表的采样点数
+TONAL_LUT_SIZE = 4096
+_TONAL_LUT_GRID = np.linspace(0.0, 1.0, TONAL_LUT_SIZE)
+
+
+def _highlight_weight(luminance):
+    """高光权重：((亮度-0.7)/0.3)^1.5，亮度不高于0.7时为0"""
+    return np.power(np.maximum((luminance - 0.7) / 0.3, 0.0), 1.5)
+
+
+def _shadow_weight(luminance):
+    """阴影权重：((0.3-亮度)/0.3)^1.2，亮度不低于0.3时为0"""
+    return np.power(np.maximum((0.3 - luminance) / 0.3, 0.0), 1.2)
+
+
+def _white_weight(luminance):
+    """白色权重：亮度^2"""
+    return np.square(luminance)
+
+
+def _black_weight(luminance):
+    """黑色权重：(1-√亮度)^1.5"""
+    return np.power(1.0 - np.sqrt(luminance), 1.5)
+
+
+@functools.lru_cache(maxsize=64)
+def _build_tonal_lut(stage, value):
+    """
+    构建按亮度索引的色调调整表（跨帧、跨批次缓存）
+
+    返回值按阶段含义不同：高光、白色、负向阴影和负向黑色为乘数表，
+    正向阴影为阴影权重表，正向黑色为加量表。
+    """
+    table = _build_tonal_lut_stack(stage, [value])[0]
+    # 只读，防止缓存的表被意外修改
+    table.flags.writeable = False
+    return table
+
+
+def _build_tonal_lut_stack(stage, values):
+    """
+    按B个参数值构建色调调整表栈 [B, TONAL_LUT_SIZE]（float32）
+
+    参数作为 [B, 1] 与采样点广播一次算出；每帧按自身参数的正负选用对应公式，各表含义同 _build_tonal_lut。
+    """
+    grid = _TONAL_LUT_GRID[np.newaxis, :]
+    value = np.asarray(values, dtype=np.float64).reshape(-1, 1)
+    adjustment = value / 100.0
+
+    if stage == 'highlights':
+        factor = np.where(value < 0, np.power(1.0 + adjustment, 1.2), 1.0 + adjustment * 0.3)
+        table = 1.0 + (factor - 1.0) * _highlight_weight(grid)
+    elif stage == 'shadows':
+        weight = _shadow_weight(grid)
+        table = np.where(value > 0, weight, 1.0 + (np.power(1.0 + adjustment, 0.8) - 1.0) * weight)
+    elif stage == 'whites':
+        table = 1.0 + adjustment * np.where(value > 0, 0.8, 0.4) * _white_weight(grid)
+    elif stage == 'blacks':
+        weight = _black_weight(grid)
+        table = np.where(value > 0, adjustment * 0.4 * weight, 1.0 + adjustment * 0.6 * weight)
+    else:
+        raise ValueError(f"Unknown tonal stage: {stage}")
+
+    return np.ascontiguousarray(np.broadcast_to(table, (value.shape[0], TONAL_LUT_SIZE)), dtype=np.float32)
+
+
+def _channel_max(rgb, out=None):
+    """逐像素三通道最大值：两次 np.maximum 比沿长度为3的最后一维归约（np.max(axis=-1)）快得多"""
+    out = np.maximum(rgb[..., 0], rgb[..., 1], out=out)
+    return np.maximum(out, rgb[..., 2], out=out)
+
+
+def _channel_min(rgb, out=None):
+    """逐像素三通道最小值，同 _channel_max"""
+    out = np.minimum(rgb[..., 0], rgb[..., 1], out=out)
+    return np.minimum(out, rgb[..., 2], out=out)
+
+
+def _lookup_lut(values, table, out=None):
+    """
+    在[0,1]均匀采样的查找表上线性插值（全程float32，不产生float64临时数组）
+
+    位置和索引缓冲区原地复用；取表值和相邻采样点的斜率（np.diff），不再生成 index+1 的临时数组。
+    """
+    last = len(table) - 1
+    position = np.clip(values, 0.0, 1.0)
+    position *= np.float32(last)
+    index = position.astype(np.int32)
+    np.minimum(index, last - 1, out=index)
+    np.subtract(position, index, out=position, dtype=np.float32)
+    # 索引已限制在有效范围内，mode='clip' 避免 take 为越界检查额外缓冲
+    result = np.take(table, index, out=out, mode='clip')
+    slope = np.take(np.diff(table), index, mode='clip')
+    slope *= position
+    result += slope
+    return result
+
+
+def _lookup_lut_stack(values, tables):
+    """在查找表栈 [B, N] 上线性插值，values 的第一维与帧对应，各帧索引加上所在表的偏移后一次取值"""
+    size = tables.shape[-1]
+    position = np.clip(values, 0.0, 1.0) * np.float32(size - 1)
+    index = np.minimum(position.astype(np.int32), size - 2)
+    position -= index.astype(np.float32)
+    index += (np.arange(tables.shape[0], dtype=np.int32) * size).reshape((-1,) + (1,) * (index.ndim - 1))
+    flat = tables.reshape(-1)
+    low = flat[index]
+    high = flat[index + 1]
+    high -= low
+    high *= position
+    low += high
+    return low
+
+
+def _enhance_frame(frame_np, *args):
+    """进程池帧处理入口（模块级函数，子进程按名称导入），参数同 CameraRawEnhanceNode._enhance_array"""
+    return CameraRawEnhanceNode()._enhance_array(frame_np, *args)
+
 
 class CameraRawEnhanceNode(BaseImageNode):
     """Camera Raw增强节点 - 集成纹理、清晰度、去薄雾三个功能"""
@@ -180,6 +316,17 @@ class CameraRawEnhanceNode(BaseImageNode):
                     'default': False,
                     'tooltip': '反转遮罩区域'
                 }),
+                'proxy_mode': ('BOOLEAN', {
+                    'default': False,
+                    'tooltip': '代理模式：在缩小的副本上处理（长边见配置 proxy_long_edge），用于快速调参；'
+                               '输出为缩小后的分辨率，不放大回原尺寸，正式出图时关闭'
+                }),
+                'parameter_sweep': ('STRING', {
+                    'default': '',
+                    'multiline': True,
+                    'tooltip': '批量参数扫描（JSON），如 {"exposure":[-0.5,0,0.5],"contrast":[0,15,30]}，一次输出多个变体；'
+                               '可用参数：所有数值滑块（exposure…dehaze、blend、overall_strength）'
+                }),
             },
             'hidden': {'unique_id': 'UNIQUE_ID'}
         }
@@ -189,6 +336,17 @@ class CameraRawEnhanceNode(BaseImageNode):
     FUNCTION = 'apply_camera_raw_enhance'
     CATEGORY = 'Image/Adjustments'
     OUTPUT_NODE = False
+    PARALLEL_BATCH = True
+    
+    # Rec.601亮度权重
+    _LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    
+    # 可逐帧扫描的滑块，顺序与 apply_camera_raw_enhance 的参数一致
+    _SWEEP_PARAMS = (
+        'exposure', 'highlights', 'shadows', 'whites', 'blacks',
+        'temperature', 'tint', 'vibrance', 'saturation',
+        'contrast', 'texture', 'clarity', 'dehaze', 'blend', 'overall_strength',
+    )
     
     @classmethod
     def IS_CHANGED(cls, **kwargs):
@@ -214,10 +372,28 @@ class CameraRawEnhanceNode(BaseImageNode):
                                 # 混合控制
                                 blend=50.0, overall_strength=1.0,
                                 # 遮罩
-                                mask=None, mask_blur=0.0, invert_mask=False, unique_id=None):
+                                mask=None, mask_blur=0.0, invert_mask=False, proxy_mode=False, parameter_sweep='',
+                                unique_id=None):
         """应用Camera Raw增强效果"""
+        # 参数扫描：滑块为逐帧取值（或给出parameter_sweep）时，一次输出B个变体
+        try:
+            sweep_size, sweep = resolve_parameter_sweep(dict(zip(self._SWEEP_PARAMS, (
+                exposure, highlights, shadows, whites, blacks,
+                temperature, tint, vibrance, saturation,
+                contrast, texture, clarity, dehaze, blend, overall_strength,
+            ))), parameter_sweep)
+        except ValueError as e:
+            print(f"CameraRawEnhanceNode error: {e}")
+            return (image,)
+        
+        # 标量参数（扫描时为第一组参数，用于预览）
+        (exposure, highlights, shadows, whites, blacks,
+         temperature, tint, vibrance, saturation,
+         contrast, texture, clarity, dehaze, blend, overall_strength) = (
+            float(sweep[key][0]) for key in self._SWEEP_PARAMS)
+        
         # 性能优化：如果所有参数都是默认值且没有遮罩，直接返回原图
-        all_params_default = (
+        all_params_default = not sweep_size and (
             exposure == 0 and highlights == 0 and shadows == 0 and whites == 0 and blacks == 0 and
             temperature == 0 and tint == 0 and vibrance == 0 and saturation == 0 and
             contrast == 0 and texture == 0 and clarity == 0 and dehaze == 0
@@ -229,6 +405,12 @@ class CameraRawEnhanceNode(BaseImageNode):
             if image is None:
                 raise ValueError("Input image is None")
             
+            # 代理模式：在缩小的副本上处理，与分辨率相关的参数按比例缩放
+            spatial_scale = 1.0
+            if proxy_mode:
+                image, mask, spatial_scale = make_proxy(image, mask)
+                mask_blur = mask_blur * spatial_scale
+            
             # 发送预览数据到前端
             if unique_id is not None:
                 enhance_data = {
@@ -246,22 +428,36 @@ class CameraRawEnhanceNode(BaseImageNode):
                 }
                 self.send_preview_to_frontend(image, unique_id, "camera_raw_enhance_preview", mask)
             
+            # 参数扫描：逐像素阶段整批一次计算
+            if sweep_size:
+                image = expand_sweep_batch(image, sweep_size)
+                return (self._process_sweep(image, sweep, mask, mask_blur, invert_mask, spatial_scale),)
+            
             # 支持批处理
             if len(image.shape) == 4:
+                if get_config('batch_backend') == 'process' and get_batch_workers(image.shape[0]) > 1:
+                    return (self._process_batch_in_processes(
+                        image,
+                        exposure, highlights, shadows, whites, blacks,
+                        temperature, tint, vibrance, saturation,
+                        contrast, texture, clarity, dehaze, blend, overall_strength,
+                        mask, mask_blur, invert_mask, spatial_scale
+                    ),)
+                # 多帧批次各帧内容不同，阶段缓存只会为每帧做指纹并存下整帧中间结果，不会命中
                 return (self.process_batch_images(
                     image,
                     self._process_single_image,
                     exposure, highlights, shadows, whites, blacks,
                     temperature, tint, vibrance, saturation,
                     contrast, texture, clarity, dehaze, blend, overall_strength,
-                    mask, mask_blur, invert_mask
+                    mask, mask_blur, invert_mask, spatial_scale, image.shape[0] == 1
                 ),)
             else:
                 result = self._process_single_image(
                     image, exposure, highlights, shadows, whites, blacks,
                     temperature, tint, vibrance, saturation,
                     contrast, texture, clarity, dehaze, blend, overall_strength,
-                    mask, mask_blur, invert_mask
+                    mask, mask_blur, invert_mask, spatial_scale
                 )
                 return (result,)
             
@@ -275,16 +471,12 @@ class CameraRawEnhanceNode(BaseImageNode):
                              exposure, highlights, shadows, whites, blacks,
                              temperature, tint, vibrance, saturation,
                              contrast, texture, clarity, dehaze, blend, overall_strength,
-                             mask, mask_blur, invert_mask):
-        """处理单张图像的Camera Raw增强"""
-        device = image.device
-        
-        # 转换为numpy进行处理
-        img_np = image.detach().cpu().numpy()
-        
-        # 保存原始图像
-        original = img_np.copy()
+                             mask, mask_blur, invert_mask, spatial_scale=1.0, use_stage_cache=True):
+        """
+        处理单张图像的Camera Raw增强（spatial_scale 为代理模式的缩放比例）
         
+        use_stage_cache 为False时不使用阶段缓存（多帧批次）。
+        """
         # 检查是否需要处理
         needs_processing = (
             exposure != 0 or highlights != 0 or shadows != 0 or whites != 0 or blacks != 0 or
@@ -296,45 +488,66 @@ class CameraRawEnhanceNode(BaseImageNode):
         if not needs_processing and mask is None:
             return image
         
-        # === 第一步：曝光调整 ===
-        if exposure != 0:
-            img_np = self._apply_exposure(img_np, exposure)
-        
-        if highlights != 0:
-            img_np = self._apply_highlights(img_np, highlights)
-        
-        if shadows != 0:
-            img_np = self._apply_shadows(img_np, shadows)
-        
-        if whites != 0:
-            img_np = self._apply_whites(img_np, whites)
-        
-        if blacks != 0:
-            img_np = self._apply_blacks(img_np, blacks)
-        
-        # === 第二步：色彩调整 ===
-        if temperature != 0 or tint != 0:
-            img_np = self._apply_white_balance(img_np, temperature, tint)
-        
-        if vibrance != 0:
-            img_np = self._apply_vibrance(img_np, vibrance)
+        # 转换为numpy进行处理
+        img_np = image.detach().cpu().numpy()
         
-        if saturation != 0:
-            img_np = self._apply_saturation(img_np, saturation)
+        # 超大图像分块处理，halo取纹理/清晰度所用金字塔的影响半径，图块对齐降采样网格
+        detail_sigma = self._detail_max_sigma(texture, clarity, spatial_scale)
+        halo = pyramid_halo(detail_sigma) if detail_sigma > 0 else 0
+        align = pyramid_alignment(detail_sigma) if detail_sigma > 0 else 1
+        img_np = process_tiled(
+            img_np,
+            lambda tile: self._enhance_array(
+                tile, exposure, highlights, shadows, whites, blacks,
+                temperature, tint, vibrance, saturation,
+                contrast, texture, clarity, dehaze, blend, overall_strength, spatial_scale, use_stage_cache
+            ),
+            halo=halo,
+            align=align,
+        )
         
-        # === 第三步：基本调整 ===
-        if contrast != 0:
-            img_np = self._apply_contrast(img_np, contrast)
+        # 转换回tensor
+        result = torch.from_numpy(img_np).to(image.device)
         
-        # === 第四步：增强功能（保持原有算法不变）===
-        if texture != 0:
-            img_np = self._apply_texture(img_np, texture)
+        # 应用遮罩
+        if mask is not None:
+            if mask_blur > 0:
+                mask = blur_mask(mask, mask_blur)
+            result = apply_mask_to_image(image, result, mask, invert_mask)
         
-        if clarity != 0:
-            img_np = self._apply_clarity(img_np, clarity)
+        return result
+    
+    def _enhance_array(self, img_np,
+                       exposure, highlights, shadows, whites, blacks,
+                       temperature, tint, vibrance, saturation,
+                       contrast, texture, clarity, dehaze, blend, overall_strength, spatial_scale=1.0,
+                       use_stage_cache=True):
+        """
+        在numpy数组上执行完整的增强流程（不涉及输入tensor，可在子进程中运行）
         
-        if dehaze != 0:
-            img_np = self._apply_dehaze(img_np, dehaze)
+        精度策略（见 core.precision）：输入、阶段间数据、缓存、各阶段计算和输出均为float32。
+        """
+        img_np = as_compute_array(img_np)
+        
+        # 保存原始图像（后续各步骤都返回新数组，不会原地修改输入）
+        original = img_np
+        
+        # 各阶段：(名称, 本阶段参数, 处理函数(图像, 输入指纹))
+        stages = [
+            # === 第一步：曝光、色彩与对比度（逐像素，一次融合内核完成） ===
+            ('pointwise', (exposure, highlights, shadows, whites, blacks,
+                           temperature, tint, vibrance, saturation, contrast),
+             lambda img, key: self._apply_pointwise_stack(
+                 img, exposure, highlights, shadows, whites, blacks,
+                 temperature, tint, vibrance, saturation, contrast)),
+            # === 第二步：增强功能 ===
+            ('detail', (texture, clarity),
+             lambda img, key: self._apply_detail_enhancement(
+                 img, texture, clarity, fingerprint=key, spatial_scale=spatial_scale)),
+            ('dehaze', (dehaze,),
+             lambda img, key: self._apply_dehaze(img, dehaze)),
+        ]
+        img_np = self._run_stages(img_np, stages, use_stage_cache)
         
         # 应用整体强度
         if overall_strength != 1.0:
@@ -346,211 +559,385 @@ class CameraRawEnhanceNode(BaseImageNode):
             img_np = original * (1 - blend_factor) + img_np * blend_factor
         
         # 确保值在有效范围内
-        img_np = np.clip(img_np, 0, 1)
-        
-        # 转换回tensor
-        result = torch.from_numpy(img_np).to(device)
+        return np.clip(img_np, 0, 1)
+    
+    def _run_stages(self, image, stages, use_cache=True):
+        """
+        依次执行各处理阶段，并按阶段缓存中间结果
         
-        # 应用遮罩
-        if mask is not None:
-            if mask_blur > 0:
-                mask = blur_mask(mask, mask_blur)
-            result = apply_mask_to_image(image, result, mask, invert_mask)
+        每个阶段的输出以 (输入指纹与计算精度, 本阶段及之前所有阶段的参数) 为键缓存（预算见配置 stage_cache_memory_mb）。
+        只调整某个滑块时，从第一个参数变化的阶段开始重算，之前的阶段直接复用缓存。
+        参数全为0的阶段不做处理也不占用缓存。use_cache 为False（多帧批次）时不做指纹也不缓存。
+        """
+        use_cache = use_cache and _stage_cache.budget_bytes > 0
+        input_key = (fingerprint_array(image), np.dtype(COMPUTE_NP_DTYPE).str) if use_cache else None
+        
+        # 每个阶段的键串联了之前所有阶段的参数
+        keys = []
+        key = input_key
+        for name, params, _ in stages:
+            key = (key, name, params)
+            keys.append(key)
+        
+        # 从后往前查找最近命中的阶段
+        start, result = 0, image
+        if use_cache:
+            for index in range(len(stages) - 1, -1, -1):
+                cached = _stage_cache.get(keys[index])
+                if cached is not None:
+                    start, result = index + 1, cached
+                    break
+        
+        for index in range(start, len(stages)):
+            _, params, stage_func = stages[index]
+            if all(value == 0 for value in params):
+                continue
+            stage_input_key = (keys[index - 1] if index > 0 else input_key) if use_cache else None
+            result = stage_func(result, stage_input_key)
+            if use_cache:
+                # 缓存的数组会被后续请求复用，设为只读防止被原地修改
+                result.flags.writeable = False
+                _stage_cache.put(keys[index], result)
         
         return result
     
-    def _apply_texture(self, image, texture_strength):
-        """应用纹理增强 - 增强中等大小细节的对比度"""
-        # 转换为uint8进行处理
-        img_uint8 = (image * 255).astype(np.uint8)
-        
-        # 创建中等频率的滤波器
-        # 使用高斯模糊创建低频版本
-        low_freq = cv2.GaussianBlur(img_uint8, (0, 0), sigmaX=2.0, sigmaY=2.0)
-        
-        # 创建高频版本
-        high_freq = cv2.GaussianBlur(img_uint8, (0, 0), sigmaX=0.5, sigmaY=0.5)
-        
-        # 提取中频细节
-        mid_freq = img_uint8.astype(np.float32) - low_freq.astype(np.float32) + 128
+    def _apply_pointwise_stack(self, image,
+                               exposure, highlights, shadows, whites, blacks,
+                               temperature, tint, vibrance, saturation, contrast):
+        """
+        逐像素调整的融合内核
         
-        # 应用纹理增强
-        texture_factor = texture_strength / 100.0
-        enhanced = img_uint8.astype(np.float32) + (mid_freq - 128) * texture_factor
+        与原先逐函数依次调整（曝光 … 对比度，对照实现见 benchmarks/bench_precision.py）的结果一致，
+        但在预分配的float32缓冲区上原地计算：
+        - 每个阶段只刷新一次共享的亮度缓冲区（各阶段依赖上一阶段输出的亮度，不能只算一次）
+        - 不再为每个阶段分配遮罩、结果数组和裁剪副本
         
-        # 转换回0-1范围
-        enhanced = np.clip(enhanced, 0, 255) / 255.0
+        精度：与逐函数链（float64中间结果）相比，色调权重查表带来的最大绝对误差约1e-3
+        （出现在黑色权重亮度接近0处，其余区间约1e-6）。
+        """
+        result = np.array(image, dtype=np.float32, copy=True)
+        luminance = np.empty(result.shape[:2], dtype=np.float32)
+        weight = np.empty_like(luminance)
         
-        return enhanced
-    
-    def _apply_clarity(self, image, clarity_strength):
-        """应用清晰度增强 - 增强中间调对比度"""
-        # 转换为uint8进行处理
-        img_uint8 = (image * 255).astype(np.uint8)
+        # 曝光
+        if exposure != 0:
+            result *= 2 ** exposure
+            np.clip(result, 0, 1, out=result)
         
-        # 创建模糊版本用于对比
-        blurred = cv2.GaussianBlur(img_uint8, (0, 0), sigmaX=10.0, sigmaY=10.0)
+        # 高光、阴影、白色、黑色的权重只取决于亮度，按参数查表（见 _build_tonal_lut）
+        # 高光：只作用于亮度高于0.7的区域
+        if highlights != 0:
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            _lookup_lut(luminance, _build_tonal_lut('highlights', highlights), out=weight)
+            result *= weight[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
         
-        # 计算对比度差异
-        contrast_diff = img_uint8.astype(np.float32) - blurred.astype(np.float32)
+        # 阴影：只作用于亮度低于0.3的区域
+        if shadows != 0:
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            _lookup_lut(luminance, _build_tonal_lut('shadows', shadows), out=weight)
+            if shadows > 0:
+                # 提亮量 x^(1/lift) - x 直接求幂：对三通道查表要做裁剪、索引、两次取值和插值共约10遍全通道运算，
+                # 比一次float32 pow更慢，且在接近0处插值误差较大
+                lifted = np.power(result, np.float32(1.0 / (1.0 + shadows / 100.0 * 0.8)))
+                lifted -= result
+                lifted *= weight[..., np.newaxis]
+                result += lifted
+            else:
+                result *= weight[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
         
-        # 应用清晰度增强
-        clarity_factor = clarity_strength / 100.0
-        enhanced = img_uint8.astype(np.float32) + contrast_diff * clarity_factor
+        # 白色：按亮度平方加权
+        if whites != 0:
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            _lookup_lut(luminance, _build_tonal_lut('whites', whites), out=weight)
+            result *= weight[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
         
-        # 转换回0-1范围
-        enhanced = np.clip(enhanced, 0, 255) / 255.0
+        # 黑色：按 (1-√亮度)^1.5 加权
+        if blacks != 0:
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            _lookup_lut(luminance, _build_tonal_lut('blacks', blacks), out=weight)
+            if blacks > 0:
+                result += weight[..., np.newaxis]
+            else:
+                result *= weight[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
         
-        return enhanced
-    
-    # === 新增的Camera Raw调整算法 ===
-    
-    def _apply_exposure(self, image, exposure_value):
-        """应用曝光调整 - 与PS Camera Raw一致"""
-        if exposure_value == 0:
-            return image
+        # 白平衡
+        if temperature != 0 or tint != 0:
+            result *= np.asarray(self._white_balance_multipliers(temperature, tint), dtype=np.float32)
+            # 超出1的像素按最大通道归一化
+            _channel_max(result, out=weight)
+            np.maximum(weight, 1.0, out=weight)
+            result /= weight[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
+        
+        # 自然饱和度（浮点RGB内核）
+        if vibrance != 0:
+            result = self._apply_vibrance(result, vibrance)
         
-        # 曝光调整使用2的幂次方，与PS一致
-        exposure_factor = 2 ** exposure_value
-        result = image * exposure_factor
+        # 饱和度
+        if saturation != 0:
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            saturation_factor = 1.0 + saturation / 100.0
+            result *= saturation_factor
+            luminance *= 1.0 - saturation_factor
+            result += luminance[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
+        
+        # 对比度：以0.5为中心
+        if contrast != 0:
+            result -= 0.5
+            result *= 1.0 + contrast / 100.0
+            result += 0.5
+            np.clip(result, 0, 1, out=result)
         
-        return np.clip(result, 0, 1)
+        return result
     
-    def _apply_highlights(self, image, highlights_value):
-        """应用高光调整 - 控制过曝区域，更接近PS Camera Raw"""
-        if highlights_value == 0:
-            return image
+    def _process_sweep(self, image, sweep, mask, mask_blur, invert_mask, spatial_scale=1.0):
+        """
+        参数扫描：第b帧按第b组参数增强，遮罩整批只羽化一次
         
-        # 计算亮度
-        luminance = np.dot(image, [0.299, 0.587, 0.114])
+        批次按 tile_memory_mb 分块，限制逐像素阶段中间结果的内存占用。
+        """
+        batch_size, height, width, channels = image.shape
         
-        # 创建更精确的高光遮罩，类似PS的处理方式
-        # 使用S形曲线确定高光区域
-        highlight_threshold = 0.7  # 高光阈值
-        highlight_mask = np.zeros_like(luminance)
+        # 准备遮罩
+        masks = None
+        if mask is not None:
+            masks = prepare_batch_mask(mask, batch_size, height, width, mask_blur, invert_mask)
+            if masks is None:
+                return image
+            masks = masks.to(image.device)
         
-        # 对于高于阈值的区域使用渐变遮罩
-        above_threshold = luminance > highlight_threshold
-        highlight_mask[above_threshold] = (luminance[above_threshold] - highlight_threshold) / (1.0 - highlight_threshold)
-        highlight_mask = np.power(highlight_mask, 1.5)  # 让过渡更平滑
+        images_np = image.detach().cpu().numpy()
+        results_np = np.empty(images_np.shape, dtype=np.float32)
+        # 每像素工作内存：约8份全通道float32临时量（结果、查表索引与插值、阴影提亮）
+        chunk = get_frame_chunk_size(height * width, channels * 4 * 8) or batch_size
         
-        # 扩展到RGB三通道
-        highlight_mask = highlight_mask[..., np.newaxis]
+        for start in range(0, batch_size, chunk):
+            end = min(start + chunk, batch_size)
+            results_np[start:end] = self._enhance_sweep(
+                images_np[start:end], {key: values[start:end] for key, values in sweep.items()}, spatial_scale
+            )
         
-        # 调整强度，更接近PS的响应曲线
-        adjustment = highlights_value / 100.0
+        result = torch.from_numpy(results_np).to(image.device)
         
-        if highlights_value < 0:
-            # 负值：压制高光，使用更激进的衰减
-            factor = np.power(1.0 + adjustment, 1.2)  # 非线性衰减
-            result = image * (1 - highlight_mask) + image * factor * highlight_mask
-        else:
-            # 正值：恢复高光细节，更温和的处理
-            factor = 1.0 + adjustment * 0.3  # 降低正向调整的强度
-            result = image * (1 - highlight_mask) + image * factor * highlight_mask
+        # 应用遮罩：遮罩为1处取增强结果，为0处保留原图
+        if masks is not None:
+            result = torch.lerp(image.to(torch.float32), result, masks)
         
-        return np.clip(result, 0, 1)
+        return result
     
-    def _apply_shadows(self, image, shadows_value):
-        """应用阴影调整 - 提亮暗部细节，更接近PS Camera Raw"""
-        if shadows_value == 0:
-            return image
-        
-        # 计算亮度
-        luminance = np.dot(image, [0.299, 0.587, 0.114])
-        
-        # 创建更精确的阴影遮罩，类似PS的处理方式
-        shadow_threshold = 0.3  # 阴影阈值
-        shadow_mask = np.zeros_like(luminance)
-        
-        # 对于低于阈值的区域使用渐变遮罩
-        below_threshold = luminance < shadow_threshold
-        shadow_mask[below_threshold] = (shadow_threshold - luminance[below_threshold]) / shadow_threshold
-        shadow_mask = np.power(shadow_mask, 1.2)  # 让过渡更平滑
-        
-        # 扩展到RGB三通道
-        shadow_mask = shadow_mask[..., np.newaxis]
-        
-        # 调整强度
-        adjustment = shadows_value / 100.0
+    def _enhance_sweep(self, images, params, spatial_scale=1.0):
+        """
+        按每帧参数执行完整增强流程，images 为 [B, H, W, C]，params 为 参数名 -> 长度B的数组
         
-        if shadows_value > 0:
-            # 正值：提亮阴影，使用更自然的提亮曲线
-            # 使用类似gamma校正的方式
-            lift_factor = 1.0 + adjustment * 0.8
-            # 对阴影区域进行非线性提亮
-            lifted_image = np.power(image, 1.0 / lift_factor)
-            result = image * (1 - shadow_mask) + lifted_image * shadow_mask
-        else:
-            # 负值：压暗阴影，使用更强的压暗
-            factor = np.power(1.0 + adjustment, 0.8)  # 非线性压暗
-            result = image * (1 - shadow_mask) + image * factor * shadow_mask
+        逐像素阶段（曝光/色彩/对比度）在整批上一次计算；纹理/清晰度和去薄雾依赖空间邻域，
+        且每帧强度不同，逐帧执行。扫描的各帧通常是同一张图，不使用阶段缓存。
+        """
+        original = as_compute_array(images)
+        batch_size = original.shape[0]
+        result = self._apply_pointwise_sweep(original, params)
+        
+        # 纹理/清晰度与去薄雾
+        texture, clarity, dehaze = params['texture'], params['clarity'], params['dehaze']
+        for i in range(batch_size):
+            if texture[i] != 0 or clarity[i] != 0:
+                result[i] = self._apply_detail_enhancement(
+                    result[i], texture[i], clarity[i], spatial_scale=spatial_scale)
+            if dehaze[i] != 0:
+                result[i] = self._apply_dehaze(result[i], dehaze[i])
+        
+        # 整体强度与混合（blend为50时不混合，与 _enhance_array 一致）
+        strength = np.asarray(params['overall_strength'], dtype=np.float32).reshape(-1, 1, 1, 1)
+        result = original * (1 - strength) + result * strength
+        blend = np.asarray(params['blend'], dtype=np.float32)
+        blend_factor = np.where(blend != 50.0, blend / 100.0, 1.0).astype(np.float32).reshape(-1, 1, 1, 1)
+        result = original * (1 - blend_factor) + result * blend_factor
         
         return np.clip(result, 0, 1)
     
-    def _apply_whites(self, image, whites_value):
-        """应用白色调整 - 调整白场点，更接近PS Camera Raw"""
-        if whites_value == 0:
-            return image
-        
-        # 白色调整主要影响亮部，使用更精确的曲线
-        adjustment = whites_value / 100.0
-        
-        # 计算亮度
-        luminance = np.dot(image, [0.299, 0.587, 0.114])
-        
-        # 创建白色权重遮罩，主要影响中间调到高光
-        # 使用S形曲线，更符合PS的处理方式
-        white_weight = np.power(luminance, 2.0)  # 强调亮部
-        white_weight = white_weight[..., np.newaxis]
+    def _apply_pointwise_sweep(self, images, params):
+        """
+        逐像素融合内核的逐帧参数版本，逻辑与 _apply_pointwise_stack 相同
         
-        if whites_value > 0:
-            # 正值：扩展白场，提升亮部
-            # 使用更激进的提升
-            factor = 1.0 + adjustment * 0.8 * white_weight
-        else:
-            # 负值：压缩白场，降低亮部
-            # 使用更温和的压缩
-            factor = 1.0 + adjustment * 0.4 * white_weight
+        标量参数整理成 [B, 1, 1, 1] 广播，色调调整表按帧堆叠（见 _build_tonal_lut_stack）后一次查表；
+        参数为0的帧在各阶段都是恒等变换，某个参数所有帧都为0时跳过该阶段。始终以float32 NumPy计算。
+        """
+        result = np.array(images, dtype=np.float32, copy=True)
+        batch_size = result.shape[0]
+        luminance = np.empty(result.shape[:-1], dtype=np.float32)
+        
+        def per_frame(values):
+            return np.asarray(values).reshape(batch_size, 1, 1, 1)
+        
+        def tonal_weight(stage, values):
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            return _lookup_lut_stack(luminance, _build_tonal_lut_stack(stage, values))[..., np.newaxis]
+        
+        exposure, highlights, shadows, whites, blacks = (
+            params[key] for key in ('exposure', 'highlights', 'shadows', 'whites', 'blacks'))
+        
+        # 曝光
+        if np.any(exposure != 0):
+            result *= per_frame(np.exp2(exposure).astype(np.float32))
+            np.clip(result, 0, 1, out=result)
+        
+        # 高光
+        if np.any(highlights != 0):
+            result *= tonal_weight('highlights', highlights)
+            np.clip(result, 0, 1, out=result)
+        
+        # 阴影：正值的帧按权重叠加提亮量，负值的帧乘以衰减表
+        if np.any(shadows != 0):
+            weight = tonal_weight('shadows', shadows)
+            if np.any(shadows > 0):
+                # 提亮量 x^(1/lift) - x 按帧的指数直接求幂（与 _apply_pointwise_stack 一致），负值帧的指数为1
+                exponent = 1.0 / (1.0 + np.maximum(shadows, 0) / 100.0 * 0.8)
+                lifted = np.power(result, per_frame(exponent.astype(np.float32)))
+                lifted -= result
+                lifted *= weight
+                result = np.where(per_frame(shadows > 0), result + lifted, result * weight)
+            else:
+                result *= weight
+            np.clip(result, 0, 1, out=result)
+        
+        # 白色
+        if np.any(whites != 0):
+            result *= tonal_weight('whites', whites)
+            np.clip(result, 0, 1, out=result)
+        
+        # 黑色：正值的帧叠加，负值的帧相乘
+        if np.any(blacks != 0):
+            weight = tonal_weight('blacks', blacks)
+            result = np.where(per_frame(blacks > 0), result + weight, result * weight)
+            np.clip(result, 0, 1, out=result)
+        
+        # 白平衡：每帧一组通道乘数
+        temperature, tint = params['temperature'], params['tint']
+        if np.any(temperature != 0) or np.any(tint != 0):
+            multipliers = np.array([self._white_balance_multipliers(t, k) for t, k in zip(temperature, tint)],
+                                   dtype=np.float32)
+            result *= multipliers.reshape(batch_size, 1, 1, 3)
+            # 超出1的像素按最大通道归一化
+            _channel_max(result, out=luminance)
+            np.maximum(luminance, 1.0, out=luminance)
+            result /= luminance[..., np.newaxis]
+            np.clip(result, 0, 1, out=result)
+        
+        # 自然饱和度（浮点RGB内核，支持逐帧取值）
+        if np.any(params['vibrance'] != 0):
+            result = self._apply_vibrance(result, params['vibrance'])
+        
+        # 饱和度
+        saturation = params['saturation']
+        if np.any(saturation != 0):
+            np.dot(result, self._LUMA_WEIGHTS, out=luminance)
+            saturation_factor = per_frame((1.0 + saturation / 100.0).astype(np.float32))
+            result *= saturation_factor
+            result += luminance[..., np.newaxis] * (1.0 - saturation_factor)
+            np.clip(result, 0, 1, out=result)
+        
+        # 对比度：以0.5为中心
+        contrast = params['contrast']
+        if np.any(contrast != 0):
+            result -= 0.5
+            result *= per_frame((1.0 + contrast / 100.0).astype(np.float32))
+            result += 0.5
+            np.clip(result, 0, 1, out=result)
         
-        result = image * factor
-        return np.clip(result, 0, 1)
+        return result
     
-    def _apply_blacks(self, image, blacks_value):
-        """应用黑色调整 - 调整黑场点，更接近PS Camera Raw"""
-        if blacks_value == 0:
-            return image
-        
-        # 黑色调整主要影响暗部，使用更精确的曲线
-        adjustment = blacks_value / 100.0
+    def _process_batch_in_processes(self, image,
+                                    exposure, highlights, shadows, whites, blacks,
+                                    temperature, tint, vibrance, saturation,
+                                    contrast, texture, clarity, dehaze, blend, overall_strength,
+                                    mask, mask_blur, invert_mask, spatial_scale=1.0):
+        """使用共享内存进程池处理整个批次，遮罩在主进程中逐帧应用"""
+        batch_size = image.shape[0]
+        print(f"[BATCH] 进程池处理 {batch_size} 帧，进程数: {get_batch_workers(batch_size)}")
+        
+        images_np = image.detach().cpu().numpy().astype(np.float32, copy=False)
+        results_np = run_batch_in_processes(
+            _enhance_frame, images_np,
+            exposure, highlights, shadows, whites, blacks,
+            temperature, tint, vibrance, saturation,
+            contrast, texture, clarity, dehaze, blend, overall_strength, spatial_scale, False
+        )
+        result = torch.from_numpy(results_np).to(image.device)
         
-        # 计算亮度
-        luminance = np.dot(image, [0.299, 0.587, 0.114])
+        # 应用遮罩
+        if mask is not None:
+            for i in range(batch_size):
+                frame_mask = self._select_batch_mask(mask, i, batch_size)
+                if mask_blur > 0:
+                    frame_mask = blur_mask(frame_mask, mask_blur)
+                result[i] = apply_mask_to_image(image[i], result[i], frame_mask, invert_mask)
         
-        # 创建黑色权重遮罩，主要影响阴影到中间调
-        # 使用反向S形曲线，强调暗部
-        black_weight = 1.0 - np.power(luminance, 0.5)  # 强调暗部
-        black_weight = np.power(black_weight, 1.5)  # 让过渡更平滑
-        black_weight = black_weight[..., np.newaxis]
+        return result
+    
+    # 纹理和清晰度的细节尺度（高斯sigma）
+    TEXTURE_SIGMA = 2.0
+    CLARITY_SIGMA = 10.0
+    
+    def _detail_max_sigma(self, texture, clarity, spatial_scale=1.0):
+        """细节增强需要的最大金字塔尺度，无细节增强时为0"""
+        if clarity != 0 and texture != 0:
+            # 先纹理后清晰度的交叉项需要两个尺度复合后的低通
+            return math.hypot(self.TEXTURE_SIGMA, self.CLARITY_SIGMA) * spatial_scale
+        if clarity != 0:
+            return self.CLARITY_SIGMA * spatial_scale
+        if texture != 0:
+            return self.TEXTURE_SIGMA * spatial_scale
+        return 0
+    
+    def _apply_detail_enhancement(self, image, texture_strength, clarity_strength, fingerprint=None, spatial_scale=1.0):
+        """
+        纹理与清晰度增强 - 从同一个float32高斯金字塔读取细节频带
+        
+        纹理增强 sigma≈2 的中频细节，清晰度增强 sigma≈10 的中间调对比度。
+        与原实现一样先纹理后清晰度：清晰度作用于纹理增强后的图像。细节频带是线性的，
+        设 t、c 为两者强度，D_s = 1 - L_s，串联结果可由输入的同一分解展开为
+            I + t(1+c)·D_2 + c·D_10 - tc·(L_10 - L_√104)
+        （L_10·L_2 = L_√104，两次高斯低通复合为方差相加的一次低通），不需要对纹理结果再分解。
+        与原实现的差别：中间结果不再截断到0-1并量化为uint8，两者同时开启时纹理增强后的过曝/欠曝细节会保留到清晰度一步。
+        金字塔按内容缓存，只调整强度时无需重新分解；已知输入指纹时可直接传入，省去重复哈希。
+        代理模式下细节尺度按 spatial_scale 缩放，保持与全分辨率相同的视觉尺度。
+        """
+        pyramid = get_pyramid(
+            image, self._detail_max_sigma(texture_strength, clarity_strength, spatial_scale), fingerprint)
         
-        if blacks_value > 0:
-            # 正值：提升黑场，减少深黑色，类似lift操作
-            # 使用加法操作，更自然
-            lift_amount = adjustment * 0.4 * black_weight
-            result = image + lift_amount
-        else:
-            # 负值：压暗黑场，增加深黑色
-            # 使用乘法操作，保持黑色的纯净度
-            factor = 1.0 + adjustment * 0.6 * black_weight
-            result = image * factor
+        texture_sigma = self.TEXTURE_SIGMA * spatial_scale
+        clarity_sigma = self.CLARITY_SIGMA * spatial_scale
+        texture_factor = texture_strength / 100.0
+        clarity_factor = clarity_strength / 100.0
         
-        return np.clip(result, 0, 1)
+        result = pyramid.image.copy()
+        if texture_strength != 0:
+            result += pyramid.detail(texture_sigma) * (texture_factor * (1.0 + clarity_factor))
+        if clarity_strength != 0:
+            result += pyramid.detail(clarity_sigma) * clarity_factor
+        if texture_strength != 0 and clarity_strength != 0:
+            # 交叉项：清晰度低通作用在纹理细节上
+            composed = pyramid.lowpass(math.hypot(texture_sigma, clarity_sigma))
+            result -= (pyramid.lowpass(clarity_sigma) - composed) * (texture_factor * clarity_factor)
+        
+        return np.clip(result, 0, 1, out=result)
     
-    def _apply_white_balance(self, image, temperature, tint):
-        """应用白平衡调整 - 色温和色调，更接近PS Camera Raw"""
-        if temperature == 0 and tint == 0:
-            return image
-        
+    def _apply_texture(self, image, texture_strength):
+        """应用纹理增强 - 增强中等大小细节的对比度"""
+        return self._apply_detail_enhancement(image, texture_strength, 0)
+    
+    def _apply_clarity(self, image, clarity_strength):
+        """应用清晰度增强 - 增强中间调对比度"""
+        return self._apply_detail_enhancement(image, 0, clarity_strength)
+    
+    # === 新增的Camera Raw调整算法 ===
+    
+    def _white_balance_multipliers(self, temperature, tint):
+        """计算白平衡的RGB通道乘数"""
         # 更精确的色温映射，基于黑体辐射曲线
         temp_factor = temperature / 100.0
         tint_factor = tint / 100.0
@@ -590,89 +977,74 @@ class CameraRawEnhanceNode(BaseImageNode):
                 r_mult *= 1.0 + tint_intensity * 0.1
                 b_mult *= 1.0 + tint_intensity * 0.1
         
-        # 应用调整
-        result = image.copy()
-        result[:, :, 0] *= r_mult  # Red
-        result[:, :, 1] *= g_mult  # Green
-        result[:, :, 2] *= b_mult  # Blue
-        
-        # 轻微的归一化，防止过度饱和
-        max_channel = np.max(result, axis=2, keepdims=True)
-        over_saturated = max_channel > 1.0
-        result[over_saturated] = result[over_saturated] / max_channel[over_saturated]
-        
-        return np.clip(result, 0, 1)
+        return r_mult, g_mult, b_mult
     
     def _apply_vibrance(self, image, vibrance_value):
-        """应用自然饱和度调整 - 智能饱和度"""
-        if vibrance_value == 0:
-            return image
-        
-        # 转换到HSV空间进行处理
-        img_uint8 = (image * 255).astype(np.uint8)
-        hsv = cv2.cvtColor(img_uint8, cv2.COLOR_RGB2HSV).astype(np.float32)
-        h, s, v = hsv[:, :, 0], hsv[:, :, 1], hsv[:, :, 2]
-        
-        # 自然饱和度的特点：对已经饱和的颜色影响较小
-        adjustment = vibrance_value / 100.0
-        
-        # 创建保护遮罩：已经高饱和度的区域受到保护
-        saturation_mask = 1.0 - (s / 255.0) ** 2  # 高饱和度区域权重小
-        
-        # 肤色保护：减少对肤色的影响
-        # 肤色在HSV中大约在色相10-25度范围
-        skin_mask = np.ones_like(h)
-        skin_hue_range = ((h >= 5) & (h <= 30)) | ((h >= 160) & (h <= 180))
-        skin_mask[skin_hue_range] = 0.3  # 肤色区域减少影响
-        
-        # 综合遮罩
-        final_mask = saturation_mask * skin_mask
-        
-        if adjustment > 0:
-            # 正值：增加自然饱和度
-            s_enhanced = s + adjustment * 120 * final_mask
-        else:
-            # 负值：减少饱和度
-            s_enhanced = s + adjustment * 255 * final_mask
-        
-        s_enhanced = np.clip(s_enhanced, 0, 255)
+        """
+        应用自然饱和度调整 - 智能饱和度
         
-        # 重新组合HSV
-        hsv_enhanced = np.stack([h, s_enhanced, v], axis=2)
-        result_uint8 = cv2.cvtColor(hsv_enhanced.astype(np.uint8), cv2.COLOR_HSV2RGB)
+        直接在浮点RGB上计算（支持 [..., H, W, C] 批次），不经过8位HSV往返，避免量化色带：
+        - 饱和度 S = (max-min)/max，已经高饱和的颜色受保护（权重 1-S²）
+        - 肤色色相（10°-60°、320°-360°）影响减弱为0.3
+        - 保持色相和明度（max）不变，按新饱和度线性缩放各通道到max的距离
         
-        return result_uint8.astype(np.float32) / 255.0
-    
-    def _apply_saturation(self, image, saturation_value):
-        """应用饱和度调整 - 整体饱和度"""
-        if saturation_value == 0:
+        vibrance_value 也可以是长度为B的逐帧取值（参数扫描），此时 image 为 [B, H, W, C]。
+        """
+        if np.all(np.asarray(vibrance_value) == 0):
             return image
         
-        # 计算灰度版本
-        gray = np.dot(image, [0.299, 0.587, 0.114])
+        rgb = image[..., :3].astype(np.float32, copy=False)
+        max_c = _channel_max(rgb)
+        delta = _channel_min(rgb)
+        np.subtract(max_c, delta, out=delta)
+        # max为0时delta也为0，下限只用于避免除零，不需要按像素分支
+        saturation = delta / np.maximum(max_c, np.float32(1e-8))
         
-        # 饱和度调整
-        adjustment = saturation_value / 100.0
-        saturation_factor = 1.0 + adjustment
-        
-        # 混合彩色和灰度
-        result = gray[..., np.newaxis] * (1 - saturation_factor) + image * saturation_factor
-        
-        return np.clip(result, 0, 1)
+        # 自然饱和度的特点：对已经饱和的颜色影响较小
+        if np.ndim(vibrance_value) > 0:
+            adjustment = (np.asarray(vibrance_value, dtype=np.float32) / 100.0).reshape((-1,) + (1,) * (max_c.ndim - 1))
+            gain = np.where(adjustment > 0, np.float32(120.0 / 255.0), np.float32(1.0))
+        else:
+            adjustment = vibrance_value / 100.0
+            gain = 120.0 / 255.0 if adjustment > 0 else 1.0
+        weight = 1.0 - saturation * saturation
+        
+        # 肤色保护：肤色像素的影响减弱为0.3（由比较结果直接算出系数，不做布尔索引）
+        weight *= 1.0 - np.float32(0.7) * self._skin_hue_mask(rgb, max_c, delta)
+        
+        # 正值增加自然饱和度（增量上限约为0.47），负值减少饱和度
+        weight *= adjustment * gain
+        weight += saturation
+        new_saturation = np.clip(weight, 0, 1, out=weight)
+        
+        # 保持色相与明度：c' = max - (max - c) * S'/S，其中 S'/S = S' * max / Δ；
+        # 灰色像素（Δ=0）各通道都等于max，无论系数为何结果不变
+        scale = new_saturation
+        scale *= max_c
+        scale /= np.maximum(delta, np.float32(1e-8))
+        result = max_c[..., np.newaxis] - rgb
+        result *= scale[..., np.newaxis]
+        np.subtract(max_c[..., np.newaxis], result, out=result)
+        np.clip(result, 0, 1, out=result)
+        
+        if image.shape[-1] > 3:
+            result = np.concatenate([result, image[..., 3:].astype(np.float32)], axis=-1)
+        return result
     
-    def _apply_contrast(self, image, contrast_value):
-        """应用对比度调整"""
-        if contrast_value == 0:
-            return image
-        
-        # 对比度调整
-        adjustment = contrast_value / 100.0
-        contrast_factor = 1.0 + adjustment
-        
-        # 以0.5为中心点进行对比度调整
-        result = (image - 0.5) * contrast_factor + 0.5
+    def _skin_hue_mask(self, rgb, max_c, delta):
+        """
+        肤色色相（10°-60°、320°-360°）判定，只用比较运算，不计算完整色相
         
-        return np.clip(result, 0, 1)
+        这两段色相只出现在R为最大通道时，此时 hue = 60 * (G-B) / Δ（负值加360）：
+        10° <= hue <= 60° 即 G-B >= Δ/6，320° <= hue < 360° 即 -2Δ/3 <= G-B < 0。
+        灰色像素（Δ=0）不算肤色。
+        """
+        g_minus_b = rgb[..., 1] - rgb[..., 2]
+        skin = g_minus_b >= delta / np.float32(6.0)
+        skin |= (g_minus_b < 0) & (g_minus_b >= delta * np.float32(-2.0 / 3.0))
+        skin &= rgb[..., 0] >= max_c
+        skin &= delta > 0
+        return skin
     
     def _apply_dehaze(self, image, dehaze_strength):
         """应用去薄雾效果 - 简化版，与前端算法保持一致"""
@@ -873,7 +1245,12 @@ class CameraRawEnhanceNode(BaseImageNode):
                 return apply_v3_algorithm(image, strength)
 
     def _ps_style_dehaze(self, image, strength):
-        """PS风格的去薄雾 - 优化算法，专注对比度增强而非饱和度"""
+        """
+        PS风格的去薄雾 - 优化算法，专注对比度增强而非饱和度
+        
+        处理单帧 [H, W, C]（清晰度与色彩调整两步只支持单帧）。_apply_dehaze 目前不调用该算法，
+        正向去薄雾实际使用 _simple_dehaze_frontend_match。
+        """
         # 基于大量测试，发现PS去薄雾的核心是对比度增强，而非饱和度增强
         img = image.astype(np.float32)
         
@@ -898,20 +1275,10 @@ class CameraRawEnhanceNode(BaseImageNode):
     def _mild_dehaze_ps(self, image, strength):
         """温和去雾 - PS风格"""
         img_uint8 = (image * 255).astype(np.uint8)
-        min_channel = np.minimum(np.minimum(img_uint8[:, :, 0], img_uint8[:, :, 1]), img_uint8[:, :, 2])
-        
-        # 高效暗通道计算
-        h, w = min_channel.shape
-        dark_channel = np.zeros_like(min_channel, dtype=np.float32)
+        min_channel = img_uint8[..., :3].min(axis=-1)
         
-        # 大区块处理提高效率
-        block_size = 20
-        for i in range(0, h, block_size):
-            for j in range(0, w, block_size):
-                end_i = min(i + block_size, h)
-                end_j = min(j + block_size, w)
-                local_min = min_channel[i:end_i, j:end_j].min()
-                dark_channel[i:end_i, j:end_j] = local_min
+        # 暗通道：20×20区块内取最小值（支持 [H, W] 和 [B, H, W]）
+        dark_channel = self._block_min(min_channel, 20).astype(np.float32)
         
         # 保守的去雾参数
         omega = 0.5 * strength
@@ -919,15 +1286,35 @@ class CameraRawEnhanceNode(BaseImageNode):
         transmission = np.maximum(transmission, 0.7)
         
         # 固定大气光（经验值，接近PS）
-        A = 200
+        A = 200 / 255.0
         
         # 场景恢复
-        result = np.zeros_like(image)
-        for i in range(3):
-            result[:, :, i] = (image[:, :, i] - A/255.0) / transmission + A/255.0
+        result = (image - A) / transmission[..., np.newaxis] + A
         
         return np.clip(result, 0, 1)
     
+    def _block_min(self, channel, block_size):
+        """
+        分块最小值：每个 block_size×block_size 区块填充为该区块的最小值
+        
+        补齐到区块整数倍后reshape求最小值，再展开回原尺寸，支持前置的批次维度。
+        """
+        h, w = channel.shape[-2:]
+        pad_h = -h % block_size
+        pad_w = -w % block_size
+        if pad_h or pad_w:
+            # 用边缘值补齐，不影响区块最小值
+            pad_width = [(0, 0)] * (channel.ndim - 2) + [(0, pad_h), (0, pad_w)]
+            channel = np.pad(channel, pad_width, mode='edge')
+        
+        blocks_h = channel.shape[-2] // block_size
+        blocks_w = channel.shape[-1] // block_size
+        blocks = channel.reshape(channel.shape[:-2] + (blocks_h, block_size, blocks_w, block_size))
+        block_min = blocks.min(axis=(-3, -1))
+        
+        expanded = np.repeat(np.repeat(block_min, block_size, axis=-2), block_size, axis=-1)
+        return expanded[..., :h, :w]
+    
     def _contrast_boost_ps(self, image, strength):
         """对比度增强 - PS去薄雾的核心"""
         
@@ -937,48 +1324,48 @@ class CameraRawEnhanceNode(BaseImageNode):
         
         result = ps_s_curve(image)
         
-        # 2. 直方图拉伸（重要：PS去薄雾的关键步骤）
-        for i in range(3):
-            channel = result[:, :, i]
-            p0_5, p99_5 = np.percentile(channel, [0.5, 99.5])
-            if p99_5 > p0_5:
-                result[:, :, i] = np.clip((channel - p0_5) / (p99_5 - p0_5), 0, 1)
+        # 2. 直方图拉伸（重要：PS去薄雾的关键步骤），各通道一次性计算百分位（只在空间维度上统计）
+        p0_5, p99_5 = np.percentile(result, [0.5, 99.5], axis=(-3, -2), keepdims=True)
+        stretch = p99_5 > p0_5
+        if stretch.any():
+            value_range = np.where(stretch, p99_5 - p0_5, 1.0)
+            stretched = np.clip((result - p0_5) / value_range, 0, 1)
+            result = np.where(stretch, stretched, result)
         
         # 3. 额外对比度增强
-        mean_val = result.mean()
+        mean_val = result.mean(axis=(-3, -2, -1), keepdims=True)
         contrast_multiplier = 1.0 + 0.6 * strength
         result = mean_val + (result - mean_val) * contrast_multiplier
         
         return np.clip(result, 0, 1)
     
     def _clarity_enhancement_ps(self, image, strength):
-        """清晰度增强 - PS风格"""
-        result = image.copy()
+        """
+        清晰度增强 - PS风格
         
-        # 高效锐化实现
-        for i in range(3):
-            channel = image[:, :, i]
-            h, w = channel.shape
-            
-            # 快速锐化
-            sharpened = np.zeros_like(channel)
-            
-            step = 8  # 跳跃处理提高效率
-            for y in range(2, h-2, step):
-                for x in range(2, w-2, step):
-                    # 简单高通滤波
-                    center = channel[y, x]
-                    avg_neighbors = (channel[y-1, x] + channel[y+1, x] + 
-                                   channel[y, x-1] + channel[y, x+1]) / 4
-                    high_freq = center - avg_neighbors
-                    
-                    # 填充区域
-                    end_y, end_x = min(y+step, h-2), min(x+step, w-2)
-                    sharpened[y:end_y, x:end_x] = high_freq
+        高通分量为像素与上下左右四邻域均值之差。在步长8的网格上采样高通分量，
+        并填充到对应的8×8区块（与原逐像素循环结果一致）。
+        """
+        h, w = image.shape[:2]
+        sharpened = np.zeros_like(image)
+        
+        step = 8  # 网格步长
+        ys = np.arange(2, h - 2, step)
+        xs = np.arange(2, w - 2, step)
+        if len(ys) > 0 and len(xs) > 0:
+            # 在网格点上一次性计算所有通道的高通分量
+            center = image[ys][:, xs, :3]
+            avg_neighbors = (image[ys - 1][:, xs, :3] + image[ys + 1][:, xs, :3] +
+                             image[ys][:, xs - 1, :3] + image[ys][:, xs + 1, :3]) / 4
+            high_freq = center - avg_neighbors
             
-            # 应用锐化
-            sharpness_factor = 0.35 * strength
-            result[:, :, i] = channel + sharpened * sharpness_factor
+            # 每个网格点填充其右下方的区块，裁剪到 [2, h-2) × [2, w-2)
+            filled = np.repeat(np.repeat(high_freq, step, axis=0), step, axis=1)
+            sharpened[2:h-2, 2:w-2, :3] = filled[:h-4, :w-4]
+        
+        # 应用锐化
+        sharpness_factor = 0.35 * strength
+        result = image + sharpened * sharpness_factor
         
         return np.clip(result, 0, 1)
     
@@ -1008,7 +1395,7 @@ class CameraRawEnhanceNode(BaseImageNode):
             result[:, :, 2] *= factors[2]
         
         # 2. 微调亮度到目标
-        current_brightness = np.dot(result, [0.299, 0.587, 0.114]).mean()
+        current_brightness = np.dot(result, self._LUMA_WEIGHTS).mean()
         target_brightness = 66.4 / 255.0
         
         if current_brightness > 0:
@@ -1021,35 +1408,11 @@ class CameraRawEnhanceNode(BaseImageNode):
 
     def _get_simple_dark_channel(self, img):
         """简化的暗通道计算"""
-        b, g, r = cv2.split(img)
-        min_channel = np.minimum(np.minimum(r, g), b)
-        
-        # 使用形态学操作
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
-        dark = cv2.erode(min_channel, kernel)
-        
-        return dark
+        return self._get_dark_channel(img, 15)
     
     def _estimate_atmospheric_light_simple(self, img, dark_channel):
         """简化的大气光估计"""
-        h, w = dark_channel.shape
-        num_pixels = h * w
-        
-        # 选择最亮的0.1%像素
-        num_brightest = max(int(num_pixels * 0.001), 1)
-        
-        # 找到暗通道中最亮的位置
-        dark_vec = dark_channel.reshape(num_pixels)
-        indices = np.argpartition(dark_vec, -num_brightest)[-num_brightest:]
-        
-        # 在原图中找到对应位置的最大值
-        atmospheric_light = np.array([0, 0, 0], dtype=np.float32)
-        for idx in indices:
-            y = idx // w
-            x = idx % w
-            atmospheric_light = np.maximum(atmospheric_light, img[y, x, :])
-        
-        return atmospheric_light
+        return self._estimate_atmospheric_light(img, dark_channel).astype(np.float32)
     
     def _positive_dehaze(self, image, strength):
         """原始的正向去薄雾 - 保留作为备选"""
@@ -1088,7 +1451,12 @@ class CameraRawEnhanceNode(BaseImageNode):
         return result
     
     def _dark_channel_prior_dehaze(self, image, strength):
-        """暗通道先验去雾算法 - 业界标准算法"""
+        """
+        暗通道先验去雾算法 - 业界标准算法
+        
+        处理单帧 [H, W, C]（透射率细化与场景恢复中的颜色空间转换只支持单帧）。
+        只由备选的 _positive_dehaze 调用，_apply_dehaze 目前不走该路径。
+        """
         # 转换为0-255范围
         img = (image * 255).astype(np.uint8)
         
@@ -1110,36 +1478,36 @@ class CameraRawEnhanceNode(BaseImageNode):
         return recovered / 255.0
     
     def _get_dark_channel(self, img, patch_size):
-        """计算暗通道"""
-        b, g, r = cv2.split(img)
-        min_channel = np.minimum(np.minimum(r, g), b)
+        """计算暗通道（支持 [H, W, C] 和 [B, H, W, C]）"""
+        min_channel = img[..., :3].min(axis=-1)
         
-        # 使用最小值滤波
+        # 使用最小值滤波（腐蚀），批次中每帧单独滤波，避免跨帧取值
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (patch_size, patch_size))
-        dark_channel = cv2.erode(min_channel, kernel)
-        
-        return dark_channel
+        if min_channel.ndim == 3:
+            return np.stack([cv2.erode(frame, kernel) for frame in min_channel])
+        return cv2.erode(min_channel, kernel)
     
     def _estimate_atmospheric_light(self, img, dark_channel):
-        """估计大气光值"""
-        h, w = dark_channel.shape
+        """
+        估计大气光值
+        
+        支持单帧（dark_channel [H, W]，返回 [3]）和批次（[B, H, W]，返回 [B, 3]）。
+        """
+        h, w = dark_channel.shape[-2:]
         num_pixels = h * w
         
         # 选择暗通道中最亮的0.1%像素
         num_brightest = int(max(num_pixels * 0.001, 1))
         
         # 获取暗通道中最亮像素的位置
-        dark_vec = dark_channel.reshape(num_pixels)
-        indices = np.argpartition(dark_vec, -num_brightest)[-num_brightest:]
+        dark_vec = dark_channel.reshape(dark_channel.shape[:-2] + (num_pixels,))
+        indices = np.argpartition(dark_vec, -num_brightest, axis=-1)[..., -num_brightest:]
         
-        # 在原图中找到这些位置的最大强度值
-        atmospheric_light = np.zeros(3)
-        for idx in indices:
-            y = idx // w
-            x = idx % w
-            atmospheric_light = np.maximum(atmospheric_light, img[y, x, :])
+        # 在原图中取出这些位置的像素，求各通道最大强度值
+        pixels = img[..., :3].reshape(img.shape[:-3] + (num_pixels, 3))
+        brightest = np.take_along_axis(pixels, indices[..., np.newaxis], axis=-2)
         
-        return atmospheric_light
+        return np.maximum(brightest.max(axis=-2), 0).astype(np.float64)
     
     def _estimate_transmission(self, img, atmospheric_light, strength):
         """估计透射率 - 更激进的参数以匹配PS效果"""
@@ -1157,59 +1525,39 @@ class CameraRawEnhanceNode(BaseImageNode):
         return transmission
     
     def _refine_transmission(self, img, transmission):
-        """使用导向滤波细化透射率"""
+        """使用导向滤波细化透射率（降采样倍数由配置 guided_filter_subsample 控制）"""
         # 转换为灰度图作为引导图像
         gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY).astype(np.float32) / 255.0
         
         # 使用导向滤波
-        refined = self._guided_filter(gray, transmission, radius=60, eps=0.0001)
+        refined = self._guided_filter(gray, transmission, radius=30, eps=0.0001)
         
         return np.clip(refined, 0.1, 0.9)
     
-    def _guided_filter(self, guide, src, radius, eps):
-        """导向滤波实现"""
-        mean_I = cv2.boxFilter(guide, cv2.CV_32F, (radius, radius))
-        mean_p = cv2.boxFilter(src, cv2.CV_32F, (radius, radius))
-        
-        corr_Ip = cv2.boxFilter(guide * src, cv2.CV_32F, (radius, radius))
-        cov_Ip = corr_Ip - mean_I * mean_p
-        
-        mean_II = cv2.boxFilter(guide * guide, cv2.CV_32F, (radius, radius))
-        var_I = mean_II - mean_I * mean_I
-        
-        a = cov_Ip / (var_I + eps)
-        b = mean_p - a * mean_I
-        
-        mean_a = cv2.boxFilter(a, cv2.CV_32F, (radius, radius))
-        mean_b = cv2.boxFilter(b, cv2.CV_32F, (radius, radius))
-        
-        q = mean_a * guide + mean_b
-        
-        return q
+    def _guided_filter(self, guide, src, radius, eps, subsample=None):
+        """导向滤波实现（见 core.guided_filter）"""
+        return guided_filter(guide, src, radius, eps, subsample)
     
     def _recover_scene(self, img, transmission, atmospheric_light):
-        """恢复无雾场景 - 平衡版本，避免过度处理"""
+        """恢复无雾场景 - 平衡版本，避免过度处理（单帧 [H, W, C]）"""
         # 防止透射率过小
         t = np.maximum(transmission, 0.1)
         
-        # 恢复每个通道
-        recovered = np.zeros_like(img, dtype=np.float32)
-        for i in range(3):
-            recovered[:, :, i] = (img[:, :, i].astype(np.float32) - atmospheric_light[i]) / t[:, :] + atmospheric_light[i]
+        # 恢复所有通道
+        atmospheric_light = np.asarray(atmospheric_light, dtype=np.float32)
+        recovered = (img[..., :3].astype(np.float32) - atmospheric_light) / t[..., np.newaxis] + atmospheric_light
         
         # 温和的对比度增强
-        # 1. 应用自动色阶 - 使用更合理的百分位数
-        for i in range(3):
-            channel = recovered[:, :, i]
-            p_low, p_high = np.percentile(channel, [2, 98])  # 更温和的裁剪
-            
-            # 避免过度拉伸
-            if p_high - p_low > 20:  # 只有当动态范围足够大时才拉伸
-                channel_stretched = np.clip((channel - p_low) * 255.0 / (p_high - p_low), 0, 255)
-                # 与原始混合，避免过度
-                recovered[:, :, i] = channel * 0.3 + channel_stretched * 0.7
-            else:
-                recovered[:, :, i] = channel
+        # 1. 应用自动色阶 - 使用更合理的百分位数，各通道一次性计算（只在空间维度上统计）
+        p_low, p_high = np.percentile(recovered, [2, 98], axis=(-3, -2), keepdims=True)  # 更温和的裁剪
+        
+        # 避免过度拉伸：只有当动态范围足够大时才拉伸
+        stretch = (p_high - p_low) > 20
+        if stretch.any():
+            value_range = np.where(stretch, p_high - p_low, 1.0)
+            stretched = np.clip((recovered - p_low) * 255.0 / value_range, 0, 255)
+            # 与原始混合，避免过度
+            recovered = np.where(stretch, recovered * 0.3 + stretched * 0.7, recovered).astype(np.float32)
         
         # 2. 确保在合理范围内
         recovered_uint8 = np.clip(recovered, 0, 255).astype(np.uint8)
@@ -1251,7 +1599,7 @@ class CameraRawEnhanceNode(BaseImageNode):
         dehazed = np.power(image, gamma)
         
         # 降低饱和度
-        gray = np.dot(dehazed, [0.299, 0.587, 0.114])
+        gray = np.dot(dehazed, self._LUMA_WEIGHTS)
         desaturated = dehazed * (1 - strength * 0.3) + gray[..., np.newaxis] * strength * 0.3
         
         # 添加大气光
@@ -10,19 +10,41 @@ Camera Raw色调曲线节点
 - 实时预览功能
 """
 
+import functools
+import json
+
 import torch
 import numpy as np
-from PIL import Image
-import io
-import base64
 
 from ..core.base_node import BaseImageNode
-from ..core.mask_utils import apply_mask_to_image, blur_mask
+from ..core.mask_utils import apply_mask_to_image, blur_mask, prepare_batch_mask
+from ..core.keyframes import parse_keyframes, build_lut_stack
+from ..core.tiling import get_frame_chunk_size
+from ..core.cache import MemoryLRUCache
+
+# 曲线图表缓存：按曲线参数索引，整批（或参数未变的多次执行）只渲染一次
+_chart_cache = MemoryLRUCache('tone_curve_charts')
+
+
+@functools.lru_cache(maxsize=256)
+def _build_final_lut(curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode):
+    """
+    按 (预设, 点曲线, 区域滑块, 模式) 缓存最终色调查找表
+
+    模块级缓存由所有节点实例共享，不持有节点实例；关键帧逐帧变化的曲线也只需构建一次。
+    返回只读数组，调用方不得原地修改。
+    """
+    return CameraRawToneCurveNode()._compose_final_lut(
+        curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode
+    )
 
 
 class CameraRawToneCurveNode(BaseImageNode):
     """Camera Raw风格的色调曲线节点"""
     
+    # Rec.709感知亮度权重（Camera Raw使用）
+    _REC709_WEIGHTS = torch.tensor([0.2126, 0.7152, 0.0722], dtype=torch.float32)
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -96,6 +118,12 @@ class CameraRawToneCurveNode(BaseImageNode):
                     'default': False,
                     'tooltip': '反转遮罩'
                 }),
+                'keyframes': ('STRING', {
+                    'default': '',
+                    'multiline': True,
+                    'tooltip': '批次关键帧（JSON），如 [{"frame":0,"highlights":0},{"frame":59,"highlights":-60,"shadows":30}]，'
+                               '可用参数：curve_preset/point_curve/highlights/lights/darks/shadows/curve_mode，帧间曲线线性插值'
+                }),
             }
         }
     
@@ -111,16 +139,34 @@ class CameraRawToneCurveNode(BaseImageNode):
         mask = kwargs.get('mask', None)
         mask_blur = kwargs.get('mask_blur', 0.0)
         invert_mask = kwargs.get('invert_mask', False)
+        keyframes = kwargs.get('keyframes', '')
         
-        return f"{curve_preset}_{point_curve}_{highlights}_{lights}_{darks}_{shadows}_{curve_mode}_{mask is not None}_{mask_blur}_{invert_mask}"
+        return f"{curve_preset}_{point_curve}_{highlights}_{lights}_{darks}_{shadows}_{curve_mode}_{mask is not None}_{mask_blur}_{invert_mask}_{keyframes}"
     
     def apply_tone_curve(self, image, curve_preset, point_curve, highlights, lights, darks, shadows,
-                        curve_mode, mask=None, mask_blur=0.0, invert_mask=False):
+                        curve_mode, mask=None, mask_blur=0.0, invert_mask=False, keyframes=''):
         """应用Camera Raw色调曲线调整"""
         
+        # 解析批次关键帧
+        keyframe_list = []
+        if len(image.shape) == 4:
+            try:
+                keyframe_list = parse_keyframes(keyframes, {
+                    'curve_preset': curve_preset, 'point_curve': point_curve, 'highlights': highlights,
+                    'lights': lights, 'darks': darks, 'shadows': shadows, 'curve_mode': curve_mode,
+                })
+                # 关键帧中的点曲线可直接写成列表，统一为字符串以便缓存和解析
+                for _, params in keyframe_list:
+                    if not isinstance(params['point_curve'], str):
+                        params['point_curve'] = json.dumps(params['point_curve'])
+            except (TypeError, ValueError) as e:
+                print(f"⚠️ 关键帧解析失败，使用静态曲线: {e}")
+                keyframe_list = []
+        
         # 检查是否需要处理
         if (curve_preset == 'Linear' and point_curve == '[[0,0],[255,255]]' and 
-            highlights == 0 and lights == 0 and darks == 0 and shadows == 0 and mask is None):
+            highlights == 0 and lights == 0 and darks == 0 and shadows == 0 and mask is None
+                and not keyframe_list):
             # 创建恒等曲线图表
             curve_chart = self._create_tone_curve_chart(curve_preset, point_curve, highlights, lights, darks, shadows)
             return (image, curve_chart)
@@ -128,30 +174,15 @@ class CameraRawToneCurveNode(BaseImageNode):
         # 自定义批处理以支持多个返回值
         return self._process_tone_curve_batch(
             image, mask, mask_blur, invert_mask,
-            curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode
+            curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode,
+            keyframe_list
         )
     
     def _process_single_image(self, image_np, curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode):
         """处理单张图像 - Camera Raw风格"""
         
-        # 获取预设曲线
-        base_curve = self._get_preset_curve(curve_preset)
-        
-        # 解析点曲线
-        point_curve_points = self._parse_curve_points(point_curve)
-        
-        # 根据模式组合曲线
-        if curve_mode == 'Point':
-            # 仅使用点曲线
-            final_lut = self._create_tone_curve_lut(point_curve_points)
-        elif curve_mode == 'Parametric':
-            # 仅使用预设+参数调整
-            final_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
-        else:  # Combined
-            # 组合点曲线和参数曲线
-            point_lut = self._create_tone_curve_lut(point_curve_points)
-            param_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
-            final_lut = self._combine_curves(point_lut, param_lut)
+        # 构建最终曲线（按参数缓存）
+        final_lut = _build_final_lut(curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode)
         
         # 应用Camera Raw风格的色调映射
         result = self._apply_camera_raw_tone_mapping(image_np, final_lut)
@@ -162,69 +193,105 @@ class CameraRawToneCurveNode(BaseImageNode):
         return result, curve_chart
     
     def _process_tone_curve_batch(self, image, mask, mask_blur, invert_mask,
-                                  curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode):
-        """自定义批处理方法，支持多个返回值"""
-        from ..core.mask_utils import apply_mask_to_image, blur_mask
-        
-        if len(image.shape) == 4:
-            # 批处理
-            batch_size = image.shape[0]
-            processed_images = []
-            charts = []
-            
-            for i in range(batch_size):
-                single_image = image[i:i+1]  # 保持4D格式 [1, H, W, C]
-                
-                # 处理遮罩
-                single_mask = None
-                if mask is not None:
-                    if mask.dim() == 3 and mask.shape[0] == batch_size:
-                        single_mask = mask[i:i+1]  # [1, H, W]
-                    elif mask.dim() == 2:
-                        single_mask = mask.unsqueeze(0)  # [1, H, W]
-                    else:
-                        single_mask = mask
-                
-                # 处理单张图像
-                img_np = single_image[0].cpu().numpy()
-                result_np, chart = self._process_single_image(
-                    img_np, curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode
+                                  curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode,
+                                  keyframe_list=None):
+        """批处理：整批一次完成色调映射和遮罩混合，支持多个返回值"""
+        if len(image.shape) == 3:
+            image = image.unsqueeze(0)
+        batch_size = image.shape[0]
+        
+        lut_stack = None
+        if keyframe_list:
+            # 关键帧：每个关键帧构建一次曲线，逐帧LUT栈 [B, 256]
+            print(f"🎬 色调曲线关键帧: {len(keyframe_list)} 个，批次 {batch_size} 帧")
+            try:
+                lut_stack = build_lut_stack(
+                    keyframe_list, batch_size,
+                    lambda params: _build_final_lut(
+                        params['curve_preset'], params['point_curve'], params['highlights'], params['lights'],
+                        params['darks'], params['shadows'], params['curve_mode']
+                    )
                 )
-                
-                # 转换回tensor
-                result_tensor = torch.from_numpy(result_np).unsqueeze(0).to(image.device)
-                
-                # 应用遮罩
-                if single_mask is not None:
-                    if mask_blur > 0:
-                        single_mask = blur_mask(single_mask, mask_blur)
-                    result_tensor = apply_mask_to_image(single_image, result_tensor, single_mask, invert_mask)
-                
-                processed_images.append(result_tensor)
-                charts.append(chart)
-            
-            # 合并结果
-            final_images = torch.cat(processed_images, dim=0)
-            # 对于图表，只返回第一个（因为参数相同，图表都一样）
-            final_chart = charts[0] if charts else None
-            
-            return (final_images, final_chart)
+            except (TypeError, ValueError, KeyError) as e:
+                # 关键帧参数取值无效（如不可哈希的列表）时回退到静态曲线
+                print(f"⚠️ 关键帧参数无效，使用静态曲线: {e}")
+        
+        if lut_stack is not None:
+            # 图表显示第一个关键帧的曲线
+            first_params = keyframe_list[0][1]
+            curve_preset, point_curve = first_params['curve_preset'], first_params['point_curve']
+            highlights, lights = first_params['highlights'], first_params['lights']
+            darks, shadows = first_params['darks'], first_params['shadows']
         else:
-            # 单张图像
-            img_np = image.cpu().numpy()
-            result_np, chart = self._process_single_image(
-                img_np, curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode
-            )
-            
-            result_tensor = torch.from_numpy(result_np).unsqueeze(0).to(image.device)
-            
-            # 应用遮罩
-            if mask is not None:
-                if mask_blur > 0:
-                    mask = blur_mask(mask, mask_blur)
-                result_tensor = apply_mask_to_image(image.unsqueeze(0), result_tensor, mask, invert_mask)
-            
-            return (result_tensor, chart)
+            # 整批共用一条曲线 [1, 256]
+            lut_stack = _build_final_lut(
+                curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode
+            )[np.newaxis]
+        
+        result = self._apply_tone_mapping_batch(image, lut_stack)
+        
+        # 应用遮罩
+        if mask is not None:
+            result = self._blend_batch_mask(image, result, mask, mask_blur, invert_mask)
+        
+        # 图表只依赖曲线参数，整批生成一次
+        curve_chart = self._create_tone_curve_chart(curve_preset, point_curve, highlights, lights, darks, shadows)
+        
+        return (result, curve_chart)
+    
+    def _apply_tone_mapping_batch(self, image, lut_stack):
+        """
+        批量Camera Raw风格色调映射（float32融合实现）
+        
+        image: [B, H, W, 3] tensor；lut_stack: [B, N] 逐帧曲线或 [1, N] 整批共用曲线，取值0-255。
+        与逐帧的 亮度→查表→比例→饱和度保护 流程等价：
+        gray*0.05 + (image*ratio)*0.95 = ratio * (image*0.95 + mean(image)*0.05)，
+        因此每帧只需一个单通道比例图和一份输出缓冲；批次按 tile_memory_mb 分块处理。
+        """
+        image = image.to(torch.float32)
+        batch_size, height, width = image.shape[:3]
+        # 缓存的曲线是只读数组，复制为float32后再转tensor
+        luts = torch.from_numpy(np.array(lut_stack, dtype=np.float32)).to(image.device)
+        size = luts.shape[-1]
+        weights = self._REC709_WEIGHTS.to(image.device)
+        
+        result = torch.empty_like(image)
+        # 输出3通道 + 亮度、索引(int64)、均值各一个通道
+        chunk = get_frame_chunk_size(height * width, 4 * 3 + 4 + 8 + 4) or batch_size
+        
+        for start in range(0, batch_size, chunk):
+            end = min(start + chunk, batch_size)
+            frames = image[start:end]
+            
+            # 感知亮度（Rec.709）并查表
+            luminance = torch.matmul(frames, weights)
+            index = (luminance * (size - 1)).clamp_(0, size - 1).long()
+            if luts.shape[0] > 1:
+                index += (torch.arange(start, end, device=image.device) * size).reshape(-1, 1, 1)
+            ratio = luts.reshape(-1)[index]
+            del index
+            
+            # 比例 = 映射亮度 / 原亮度，限制在0.1-10
+            ratio.div_(255.0).div_(luminance.clamp_(min=1e-8)).clamp_(0.1, 10.0)
+            del luminance
+            
+            # 颜色饱和度保护与比例合并为一次写出
+            out = result[start:end]
+            gray = frames.mean(dim=-1, keepdim=True).mul_(0.05)
+            torch.add(gray, frames, alpha=0.95, out=out)
+            del gray
+            out.mul_(ratio.unsqueeze(-1)).clamp_(0, 1)
+        
+        return result
+    
+    def _blend_batch_mask(self, image, result, mask, mask_blur, invert_mask):
+        """整批混合遮罩：遮罩为1处取处理结果，为0处保留原图"""
+        masks = prepare_batch_mask(mask, image.shape[0], image.shape[1], image.shape[2], mask_blur, invert_mask)
+        if masks is None:
+            return image
+        
+        masks = masks.to(device=image.device, dtype=result.dtype)
+        return torch.lerp(image.to(result.dtype), result, masks)
     
     def _get_preset_curve(self, preset_name):
         """获取Camera Raw预设曲线"""
@@ -242,6 +309,35 @@ class CameraRawToneCurveNode(BaseImageNode):
         }
         return presets.get(preset_name, presets['Linear'])
     
+    def _compose_final_lut(self, curve_preset, point_curve, highlights, lights, darks, shadows, curve_mode):
+        """
+        根据曲线模式构建最终的色调查找表（不缓存，经模块级 _build_final_lut 调用）
+        
+        返回只读数组。
+        """
+        # 获取预设曲线
+        base_curve = self._get_preset_curve(curve_preset)
+        
+        # 解析点曲线
+        point_curve_points = self._parse_curve_points(point_curve)
+        
+        # 根据模式组合曲线
+        if curve_mode == 'Point':
+            # 仅使用点曲线
+            final_lut = self._create_tone_curve_lut(point_curve_points)
+        elif curve_mode == 'Parametric':
+            # 仅使用预设+参数调整
+            final_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
+        else:  # Combined
+            # 组合点曲线和参数曲线
+            point_lut = self._create_tone_curve_lut(point_curve_points)
+            param_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
+            final_lut = self._combine_curves(point_lut, param_lut)
+        
+        final_lut = np.asarray(final_lut, dtype=np.float64)
+        final_lut.flags.writeable = False
+        return final_lut
+    
     def _create_camera_raw_parametric_curve(self, base_curve, highlights, lights, darks, shadows):
         """创建Camera Raw风格的参数曲线"""
         # 从基础曲线开始
@@ -249,90 +345,60 @@ class CameraRawToneCurveNode(BaseImageNode):
         
         # Camera Raw的区域定义（与Adobe完全一致）
         # 阴影: 0-25%, 暗部: 25-50%, 明亮: 50-75%, 高光: 75-100%
+        input_vals = np.arange(256) / 255.0
+        
+        # Camera Raw风格的区域权重函数
+        shadow_weight = self._camera_raw_region_weight(input_vals, 0.0, 0.25)
+        dark_weight = self._camera_raw_region_weight(input_vals, 0.25, 0.50)
+        light_weight = self._camera_raw_region_weight(input_vals, 0.50, 0.75)
+        highlight_weight = self._camera_raw_region_weight(input_vals, 0.75, 1.0)
+        
+        # 应用Camera Raw风格的调整算法
+        total_adjustment = (
+            shadows * shadow_weight * 0.8 +      # Camera Raw阴影敏感度
+            darks * dark_weight * 0.6 +          # Camera Raw暗部敏感度
+            lights * light_weight * 0.6 +        # Camera Raw明亮敏感度
+            highlights * highlight_weight * 0.8   # Camera Raw高光敏感度
+        )
         
-        adjusted_lut = base_lut.copy()
-        
-        for i in range(256):
-            input_val = i / 255.0
-            
-            # Camera Raw风格的区域权重函数
-            shadow_weight = self._camera_raw_region_weight(input_val, 0.0, 0.25)
-            dark_weight = self._camera_raw_region_weight(input_val, 0.25, 0.50)
-            light_weight = self._camera_raw_region_weight(input_val, 0.50, 0.75)
-            highlight_weight = self._camera_raw_region_weight(input_val, 0.75, 1.0)
-            
-            # 应用Camera Raw风格的调整算法
-            total_adjustment = (
-                shadows * shadow_weight * 0.8 +      # Camera Raw阴影敏感度
-                darks * dark_weight * 0.6 +          # Camera Raw暗部敏感度
-                lights * light_weight * 0.6 +        # Camera Raw明亮敏感度
-                highlights * highlight_weight * 0.8   # Camera Raw高光敏感度
-            )
-            
-            # 将调整转换为曲线偏移（Camera Raw风格）
-            curve_offset = total_adjustment * 1.28  # Camera Raw标准系数
-            
-            adjusted_lut[i] = np.clip(adjusted_lut[i] + curve_offset, 0, 255)
+        # 将调整转换为曲线偏移（Camera Raw风格）
+        curve_offset = total_adjustment * 1.28  # Camera Raw标准系数
         
-        return adjusted_lut
+        return np.clip(base_lut + curve_offset, 0, 255)
     
     def _camera_raw_region_weight(self, input_val, region_start, region_end):
-        """Camera Raw风格的区域权重函数（平滑过渡）"""
-        if input_val < region_start or input_val > region_end:
-            return 0.0
+        """Camera Raw风格的区域权重函数（平滑过渡），input_val 可为标量或数组"""
+        input_val = np.asarray(input_val, dtype=np.float64)
         
         region_center = (region_start + region_end) / 2
         region_width = region_end - region_start
         
         # 使用高斯函数创建平滑的权重分布
-        distance_from_center = abs(input_val - region_center) / (region_width / 2)
+        distance_from_center = np.abs(input_val - region_center) / (region_width / 2)
         weight = np.exp(-2 * distance_from_center ** 2)  # Camera Raw权重曲线
         
-        return weight
+        # 区域之外权重为0
+        inside = (input_val >= region_start) & (input_val <= region_end)
+        return np.where(inside, weight, 0.0)
     
     def _combine_curves(self, point_lut, param_lut):
         """组合点曲线和参数曲线（Camera Raw风格）"""
         # Camera Raw的曲线组合算法：先应用参数曲线，再应用点曲线
-        combined_lut = np.zeros(256)
-        
-        for i in range(256):
-            # 先通过参数曲线
-            param_output = param_lut[i]
-            # 再通过点曲线（将参数输出作为点曲线的输入）
-            param_index = np.clip(int(param_output), 0, 255)
-            combined_lut[i] = point_lut[param_index]
-        
-        return combined_lut
+        # 参数曲线输出作为点曲线的输入索引
+        param_index = np.clip(np.asarray(param_lut).astype(int), 0, 255)
+        return np.asarray(point_lut, dtype=np.float64)[param_index]
     
     def _apply_camera_raw_tone_mapping(self, image_np, tone_lut):
         """应用Camera Raw风格的色调映射"""
         # Camera Raw的色调映射保持颜色，只调整亮度
         if len(image_np.shape) == 3:
-            # 计算感知亮度（Camera Raw使用的权重）
-            luminance = np.dot(image_np, [0.2126, 0.7152, 0.0722])  # Rec.709亮度权重
-            
-            # 应用色调映射
-            luminance_255 = np.clip(luminance * 255, 0, 255).astype(int)
-            mapped_luminance = tone_lut[luminance_255] / 255.0
-            
-            # Camera Raw风格的颜色保持算法
-            epsilon = 1e-8
-            luminance_safe = np.maximum(luminance, epsilon)
-            ratio = np.clip(mapped_luminance / luminance_safe, 0.1, 10.0)
-            
-            # 应用比例到所有通道
-            result = image_np * ratio[..., np.newaxis]
-            
-            # Camera Raw的颜色饱和度保护
-            gray = np.mean(result, axis=2, keepdims=True)
-            saturation_protection = 0.95  # Camera Raw风格
-            result = gray * (1 - saturation_protection) + result * saturation_protection
-            
-        else:
-            # 灰度图像直接映射
-            image_255 = np.clip(image_np * 255, 0, 255).astype(int)
-            result = tone_lut[image_255] / 255.0
+            image = torch.from_numpy(np.ascontiguousarray(image_np, dtype=np.float32)).unsqueeze(0)
+            result = self._apply_tone_mapping_batch(image, np.asarray(tone_lut)[np.newaxis])
+            return result[0].numpy()
         
+        # 灰度图像直接映射
+        image_255 = np.clip(image_np * 255, 0, 255).astype(int)
+        result = tone_lut[image_255] / 255.0
         return np.clip(result, 0, 1)
     
     def _parse_curve_points(self, curve_string):
@@ -363,25 +429,11 @@ class CameraRawToneCurveNode(BaseImageNode):
         return np.clip(lut, 0, 255)
     
     def _linear_interpolate(self, x, points):
-        """线性插值"""
-        if x <= points[0][0]:
-            return points[0][1]
-        if x >= points[-1][0]:
-            return points[-1][1]
-        
-        # 找到x所在的区间
-        for i in range(len(points) - 1):
-            if points[i][0] <= x <= points[i + 1][0]:
-                x1, y1 = points[i]
-                x2, y2 = points[i + 1]
-                
-                if x2 == x1:
-                    return y1
-                
-                t = (x - x1) / (x2 - x1)
-                return y1 + t * (y2 - y1)
-        
-        return x  # 默认返回输入值
+        """线性插值，x 可为标量或数组"""
+        xs = np.array([p[0] for p in points], dtype=np.float64)
+        ys = np.array([p[1] for p in points], dtype=np.float64)
+        result = np.interp(x, xs, ys)
+        return float(result) if np.ndim(result) == 0 else result
     
     def _cubic_spline_interpolate(self, points):
         """三次样条插值（PS风格的曲率特性）"""
@@ -394,10 +446,7 @@ class CameraRawToneCurveNode(BaseImageNode):
             # 确保点数量足够进行样条插值
             if len(xs) < 3:
                 # 点数不足时使用线性插值
-                lut = np.zeros(256, dtype=np.float32)
-                for i in range(256):
-                    lut[i] = self._linear_interpolate(i, points)
-                return lut
+                return self._linear_interpolate(np.arange(256), points).astype(np.float32)
             
             # 创建三次样条函数，使用不严格的边界条件以匹配PS的曲线特性
             # PS风格使用较低的张力，产生更缓和的曲线
@@ -419,80 +468,77 @@ class CameraRawToneCurveNode(BaseImageNode):
         
         except ImportError:
             # 如果没有scipy，使用Catmull-Rom样条模拟PS风格
-            lut = np.zeros(256, dtype=np.float32)
-            
+            x_vals = np.arange(256)
             if len(points) >= 3:
                 # 使用Catmull-Rom样条模拟PS的曲线特性
-                for i in range(256):
-                    lut[i] = self._catmull_rom_interpolate(i, points)
+                lut = self._catmull_rom_interpolate(x_vals, points)
             else:
-                for i in range(256):
-                    lut[i] = self._linear_interpolate(i, points)
+                lut = self._linear_interpolate(x_vals, points)
             
-            return np.clip(lut, 0, 255)
+            return np.clip(lut, 0, 255).astype(np.float32)
     
     def _catmull_rom_interpolate(self, x, points):
-        """使用Catmull-Rom样条模拟PS风格的曲线"""
+        """使用Catmull-Rom样条模拟PS风格的曲线，x 可为标量或数组"""
         n = len(points)
         if n < 3:
             return self._linear_interpolate(x, points)
         
-        # 找到x所在的区间
-        i = 0
-        while i < n - 1 and x > points[i + 1][0]:
-            i += 1
+        x = np.asarray(x, dtype=np.float64)
+        xs = np.array([p[0] for p in points], dtype=np.float64)
+        ys = np.array([p[1] for p in points], dtype=np.float64)
         
-        if i >= n - 1:
-            return points[n - 1][1]
-        if i <= 0:
-            return points[0][1]
+        # 找到x所在的区间：第一个满足 x <= xs[i+1] 的 i
+        i = np.searchsorted(xs[1:], x, side='left')
+        segment = np.clip(i, 1, n - 2)
         
         # 获取四个控制点
-        p0 = points[i - 1] if i > 0 else points[i]
-        p1 = points[i]
-        p2 = points[i + 1]
-        p3 = points[i + 2] if i < n - 2 else points[i + 1]
+        p0 = ys[segment - 1]
+        p1 = ys[segment]
+        p2 = ys[segment + 1]
+        p3 = ys[np.where(segment < n - 2, segment + 2, segment + 1)]
         
         # 计算参数t
-        t = (x - p1[0]) / (p2[0] - p1[0])
+        x1 = xs[segment]
+        x2 = xs[segment + 1]
+        t = (x - x1) / np.where(x2 != x1, x2 - x1, 1.0)
         t2 = t * t
         t3 = t2 * t
         
         # PS风格的较低张力系数
         tension = 0.3
         y = 0.5 * (
-            (2 * p1[1]) +
-            (-p0[1] + p2[1]) * t * tension +
-            (2 * p0[1] - 5 * p1[1] + 4 * p2[1] - p3[1]) * t2 * (1 - tension) +
-            (-p0[1] + 3 * p1[1] - 3 * p2[1] + p3[1]) * t3 * tension
+            (2 * p1) +
+            (-p0 + p2) * t * tension +
+            (2 * p0 - 5 * p1 + 4 * p2 - p3) * t2 * (1 - tension) +
+            (-p0 + 3 * p1 - 3 * p2 + p3) * t3 * tension
         )
         
-        return max(0, min(255, y))
+        # 超出最后一个区间取终点值，第一个区间保持起点值
+        y = np.where(i >= n - 1, ys[-1], y)
+        y = np.where(i <= 0, ys[0], y)
+        
+        y = np.clip(y, 0, 255)
+        return float(y) if y.ndim == 0 else y
     
     def _apply_region_adjustments(self, tone_lut, highlights, lights, darks, shadows):
         """应用区域微调"""
-        adjusted_lut = tone_lut.copy()
-        
-        for i in range(256):
-            input_val = i / 255.0
-            
-            # 计算每个区域的权重
-            shadow_weight = max(0, 1 - input_val * 4)  # 0-25%
-            dark_weight = max(0, min(1, (input_val - 0.25) * 4)) * max(0, 1 - (input_val - 0.25) * 4)  # 25-50%
-            light_weight = max(0, min(1, (input_val - 0.5) * 4)) * max(0, 1 - (input_val - 0.5) * 4)  # 50-75%
-            highlight_weight = max(0, (input_val - 0.75) * 4)  # 75-100%
-            
-            # 应用调整
-            adjustment = (
-                shadows * shadow_weight +
-                darks * dark_weight +
-                lights * light_weight +
-                highlights * highlight_weight
-            ) * 2.55  # 转换为255范围
-            
-            adjusted_lut[i] = np.clip(adjusted_lut[i] + adjustment, 0, 255)
-        
-        return adjusted_lut
+        input_val = np.arange(256) / 255.0
+        
+        # 计算每个区域的权重
+        shadow_weight = np.maximum(0, 1 - input_val * 4)  # 0-25%
+        dark_weight = np.clip((input_val - 0.25) * 4, 0, 1) * np.maximum(0, 1 - (input_val - 0.25) * 4)  # 25-50%
+        light_weight = np.clip((input_val - 0.5) * 4, 0, 1) * np.maximum(0, 1 - (input_val - 0.5) * 4)  # 50-75%
+        highlight_weight = np.maximum(0, (input_val - 0.75) * 4)  # 75-100%
+        
+        # 应用调整
+        adjustment = (
+            shadows * shadow_weight +
+            darks * dark_weight +
+            lights * light_weight +
+            highlights * highlight_weight
+        ) * 2.55  # 转换为255范围
+        
+        return np.clip(tone_lut + adjustment, 0, 255)
     
     def _apply_tone_lut(self, image, tone_lut):
         """应用色调查找表到图像"""
@@ -523,84 +569,91 @@ class CameraRawToneCurveNode(BaseImageNode):
         return result
     
     def _create_tone_curve_chart(self, curve_preset, point_curve, highlights, lights, darks, shadows):
-        """创建色调曲线图表"""
+        """创建色调曲线图表（图表只依赖曲线参数，按参数缓存）"""
+        cache_key = (curve_preset, point_curve, highlights, lights, darks, shadows)
+        chart = _chart_cache.get(cache_key)
+        if chart is not None:
+            # 返回副本，下游节点原地修改输出时不会污染缓存
+            return chart.clone()
+        
         try:
-            from matplotlib import pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')  # 使用非交互式后端
-            
-            # 解析曲线点
-            curve_points = self._parse_curve_points(point_curve)
-            
-            # 创建查找表（使用平滑三次样条插值）
-            tone_lut = self._create_tone_curve_lut(curve_points)
-            
-            # 应用Camera Raw风格参数调整
-            if highlights != 0 or lights != 0 or darks != 0 or shadows != 0:
-                base_curve = self._get_preset_curve(curve_preset)
-                param_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
-                tone_lut = self._combine_curves(tone_lut, param_lut)
-            
-            # 创建图表
-            fig, ax = plt.subplots(figsize=(6, 6))
-            ax.set_facecolor('#2b2b2b')
-            fig.patch.set_facecolor('#1e1e1e')
-            
-            # 绘制PS风格的网格
-            ax.grid(True, color='#404040', linewidth=0.5, alpha=0.6)
-            
-            # 绘制PS风格的对角线（原始色调）
-            ax.plot([0, 255], [0, 255], color='#808080', linewidth=1, linestyle='--', alpha=0.7, label='原始')
-            
-            # 绘制PS风格的精细色调曲线
-            x_vals = np.arange(256)
-            ax.plot(x_vals, tone_lut, color='#ffffff', linewidth=1.5, label='PS风格色调曲线', alpha=0.95)
-            
-            # 绘制PS风格的控制点
-            if len(curve_points) > 2:  # 如果有用户添加的点
-                xs = [p[0] for p in curve_points[1:-1]]  # 排除起点和终点
-                ys = [p[1] for p in curve_points[1:-1]]
-                ax.scatter(xs, ys, color='#ffffff', s=25, edgecolors='#000000', linewidth=1, zorder=5, label='控制点')
-            
-            # 标记区域
-            ax.axvspan(0, 63.75, alpha=0.1, color='blue', label='阴影')
-            ax.axvspan(63.75, 127.5, alpha=0.1, color='cyan', label='暗调') 
-            ax.axvspan(127.5, 191.25, alpha=0.1, color='yellow', label='亮调')
-            ax.axvspan(191.25, 255, alpha=0.1, color='red', label='高光')
-            
-            # 设置坐标轴
-            ax.set_xlim(0, 255)
-            ax.set_ylim(0, 255)
-            ax.set_xlabel('输入', color='white')
-            ax.set_ylabel('输出', color='white')
-            ax.set_title('Camera Raw 色调曲线', color='white', fontsize=14, fontweight='bold')
-            
-            # 设置刻度颜色
-            ax.tick_params(colors='white')
-            
-            # 图例
-            ax.legend(loc='upper left', framealpha=0.8)
-            
-            # 保存为图像
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', 
-                       facecolor=fig.get_facecolor(), edgecolor='none')
-            buf.seek(0)
-            
-            # 转换为numpy数组
-            chart_pil = Image.open(buf)
-            chart_np = np.array(chart_pil).astype(np.float32) / 255.0
-            
-            plt.close(fig)
-            buf.close()
-            
-            return torch.from_numpy(chart_np).unsqueeze(0)
-            
+            chart = self._render_tone_curve_chart(curve_preset, point_curve, highlights, lights, darks, shadows)
         except Exception as e:
             print(f"创建色调曲线图表失败: {e}")
             # 返回空白图像
             blank = np.ones((400, 400, 3), dtype=np.float32) * 0.5
             return torch.from_numpy(blank).unsqueeze(0)
+        
+        _chart_cache.put(cache_key, chart, chart.numel() * chart.element_size())
+        return chart.clone()
+    
+    def _render_tone_curve_chart(self, curve_preset, point_curve, highlights, lights, darks, shadows):
+        """绘制色调曲线图表，直接读取Agg画布的像素缓冲，不经过PNG编解码"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        # 解析曲线点
+        curve_points = self._parse_curve_points(point_curve)
+        
+        # 创建查找表（使用平滑三次样条插值）
+        tone_lut = self._create_tone_curve_lut(curve_points)
+        
+        # 应用Camera Raw风格参数调整
+        if highlights != 0 or lights != 0 or darks != 0 or shadows != 0:
+            base_curve = self._get_preset_curve(curve_preset)
+            param_lut = self._create_camera_raw_parametric_curve(base_curve, highlights, lights, darks, shadows)
+            tone_lut = self._combine_curves(tone_lut, param_lut)
+        
+        # 创建图表（不经过pyplot，避免全局状态）
+        fig = Figure(figsize=(6, 6), dpi=150)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.set_facecolor('#2b2b2b')
+        fig.patch.set_facecolor('#1e1e1e')
+        
+        # 绘制PS风格的网格
+        ax.grid(True, color='#404040', linewidth=0.5, alpha=0.6)
+        
+        # 绘制PS风格的对角线（原始色调）
+        ax.plot([0, 255], [0, 255], color='#808080', linewidth=1, linestyle='--', alpha=0.7, label='原始')
+        
+        # 绘制PS风格的精细色调曲线
+        x_vals = np.arange(256)
+        ax.plot(x_vals, tone_lut, color='#ffffff', linewidth=1.5, label='PS风格色调曲线', alpha=0.95)
+        
+        # 绘制PS风格的控制点
+        if len(curve_points) > 2:  # 如果有用户添加的点
+            xs = [p[0] for p in curve_points[1:-1]]  # 排除起点和终点
+            ys = [p[1] for p in curve_points[1:-1]]
+            ax.scatter(xs, ys, color='#ffffff', s=25, edgecolors='#000000', linewidth=1, zorder=5, label='控制点')
+        
+        # 标记区域
+        ax.axvspan(0, 63.75, alpha=0.1, color='blue', label='阴影')
+        ax.axvspan(63.75, 127.5, alpha=0.1, color='cyan', label='暗调') 
+        ax.axvspan(127.5, 191.25, alpha=0.1, color='yellow', label='亮调')
+        ax.axvspan(191.25, 255, alpha=0.1, color='red', label='高光')
+        
+        # 设置坐标轴
+        ax.set_xlim(0, 255)
+        ax.set_ylim(0, 255)
+        ax.set_xlabel('输入', color='white')
+        ax.set_ylabel('输出', color='white')
+        ax.set_title('Camera Raw 色调曲线', color='white', fontsize=14, fontweight='bold')
+        
+        # 设置刻度颜色
+        ax.tick_params(colors='white')
+        
+        # 图例
+        ax.legend(loc='upper left', framealpha=0.8)
+        
+        # 渲染并直接读取RGBA缓冲
+        fig.tight_layout()
+        canvas.draw()
+        width, height = canvas.get_width_height()
+        chart_np = np.frombuffer(canvas.buffer_rgba(), np.uint8).reshape(height, width, 4)[:, :, :3]
+        chart_np = chart_np.astype(np.float32) / 255.0
+        
+        return torch.from_numpy(chart_np).unsqueeze(0)
 
 
 # 注册节点
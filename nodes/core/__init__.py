@@ -4,17 +4,69 @@
 提供所有节点共用的基础功能：
 - 基础节点类
 - 遮罩处理工具
+- 运行配置与批处理并行执行器
+- 超大图像分块处理引擎
+- 导向滤波（含快速降采样版本）
+- 多尺度金字塔与内存缓存
+- 代理分辨率调参模式
+- 计算精度策略
+- 关键帧动画曲线（逐帧LUT栈）
+- 批量直方图与分位点
+- 批量参数扫描（逐帧滑块取值）
 """
 
 from .base_node import BaseImageNode
-from .mask_utils import apply_mask_to_image, blur_mask, process_mask_for_batch, create_luminance_mask
+from .mask_utils import apply_mask_to_image, blur_mask, process_mask_for_batch, prepare_batch_mask, create_luminance_mask, refine_mask_with_guide
 from .generic_preset_manager import GenericPresetManager
+from .config import get_config, reload_config
+from .parallel import get_batch_workers, run_batch_parallel
+from .process_pool import run_batch_in_processes, shutdown_process_pool
+from .tiling import process_tiled, get_tile_size, get_frame_chunk_size, gaussian_halo
+from .guided_filter import guided_filter
+from .cache import MemoryLRUCache, fingerprint_array
+from .pyramid import GaussianPyramid, get_pyramid
+from .proxy import make_proxy, resize_mask
+from .precision import as_compute_array
+from .keyframes import parse_keyframes, build_lut_stack, interpolate_keyframe_param, apply_lut_stack
+from .histogram import batched_histogram, histogram_bin_edges, histogram_percentiles
+from .param_sweep import is_sweep_value, parse_parameter_sweep, resolve_parameter_sweep, expand_sweep_batch
 
 __all__ = [
     'BaseImageNode',
     'apply_mask_to_image', 
     'blur_mask', 
     'process_mask_for_batch', 
+    'prepare_batch_mask',
     'create_luminance_mask',
-    'GenericPresetManager'
+    'refine_mask_with_guide',
+    'GenericPresetManager',
+    'get_config',
+    'reload_config',
+    'get_batch_workers',
+    'run_batch_parallel',
+    'run_batch_in_processes',
+    'shutdown_process_pool',
+    'process_tiled',
+    'get_tile_size',
+    'get_frame_chunk_size',
+    'gaussian_halo',
+    'guided_filter',
+    'MemoryLRUCache',
+    'fingerprint_array',
+    'GaussianPyramid',
+    'get_pyramid',
+    'make_proxy',
+    'resize_mask',
+    'as_compute_array',
+    'parse_keyframes',
+    'build_lut_stack',
+    'interpolate_keyframe_param',
+    'apply_lut_stack',
+    'batched_histogram',
+    'histogram_bin_edges',
+    'histogram_percentiles',
+    'is_sweep_value',
+    'parse_parameter_sweep',
+    'resolve_parameter_sweep',
+    'expand_sweep_batch'
 ]
\ No newline at end of file
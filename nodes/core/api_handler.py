@@ -8,9 +8,15 @@ from datetime import datetime
 from pathlib import Path
 
 class PresetAPIHandler:
+    # 曲线预设路由是否已注册（避免立即注册与延迟注册重复）
+    _routes_registered = False
+    
     @staticmethod
     def setup_routes(app):
         """设置预设管理路由"""
+        if PresetAPIHandler._routes_registered:
+            return
+        
         from aiohttp import web
         
         # 预设目录
@@ -140,10 +146,108 @@ class PresetAPIHandler:
                     content_type='application/json'
                 )
         
+        async def update_preset(request):
+            """更新预设信息（只允许更新用户预设）"""
+            try:
+                preset_id = request.match_info.get("preset_id")
+                data = await request.json()
+                file_path = user_dir / f"{preset_id}.json"
+                
+                if not file_path.exists():
+                    return web.Response(
+                        text=json.dumps({"success": False, "error": "未找到或无权更新"}),
+                        content_type='application/json'
+                    )
+                
+                with open(file_path, "r", encoding="utf-8") as f:
+                    preset_data = json.load(f)
+                
+                preset_data.update({
+                    "name": data.get("name", preset_data.get("name")),
+                    "description": data.get("description", preset_data.get("description")),
+                    "category": data.get("category", preset_data.get("category")),
+                    "tags": data.get("tags", preset_data.get("metadata", {}).get("tags", [])),
+                    "updated_at": datetime.now().isoformat()
+                })
+                
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump(preset_data, f, indent=2, ensure_ascii=False)
+                
+                return web.Response(
+                    text=json.dumps({"success": True}),
+                    content_type='application/json'
+                )
+                
+            except Exception as e:
+                return web.Response(
+                    text=json.dumps({"success": False, "error": str(e)}),
+                    content_type='application/json'
+                )
+        
+        async def export_preset(request):
+            """导出预设"""
+            try:
+                preset_id = request.match_info.get("preset_id")
+                
+                for dir_path in [default_dir, user_dir]:
+                    file_path = dir_path / f"{preset_id}.json"
+                    if file_path.exists():
+                        with open(file_path, "r", encoding="utf-8") as f:
+                            content = f.read()
+                        return web.Response(
+                            text=json.dumps({
+                                "success": True,
+                                "content": content,
+                                "filename": f"curve_preset_{preset_id}.json"
+                            }),
+                            content_type='application/json'
+                        )
+                
+                return web.Response(
+                    text=json.dumps({"success": False, "error": "未找到"}),
+                    content_type='application/json'
+                )
+                
+            except Exception as e:
+                return web.Response(
+                    text=json.dumps({"success": False, "error": str(e)}),
+                    content_type='application/json'
+                )
+        
+        async def import_preset(request):
+            """导入预设"""
+            try:
+                data = await request.json()
+                preset_data = json.loads(data.get("content", ""))
+                
+                # 生成新ID避免冲突
+                preset_id = str(uuid.uuid4())
+                preset_data["id"] = preset_id
+                preset_data["imported_at"] = datetime.now().isoformat()
+                
+                file_path = user_dir / f"{preset_id}.json"
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump(preset_data, f, indent=2, ensure_ascii=False)
+                
+                return web.Response(
+                    text=json.dumps({"success": True, "id": preset_id}),
+                    content_type='application/json'
+                )
+                
+            except Exception as e:
+                return web.Response(
+                    text=json.dumps({"success": False, "error": str(e)}),
+                    content_type='application/json'
+                )
+        
         # 注册路由
         app.router.add_post("/curve_presets/save", save_preset)
         app.router.add_get("/curve_presets/list", list_presets)
         app.router.add_get("/curve_presets/load/{preset_id}", load_preset)
         app.router.add_delete("/curve_presets/delete/{preset_id}", delete_preset)
+        app.router.add_put("/curve_presets/update/{preset_id}", update_preset)
+        app.router.add_get("/curve_presets/export/{preset_id}", export_preset)
+        app.router.add_post("/curve_presets/import", import_preset)
         
+        PresetAPIHandler._routes_registered = True
         print("✅ 预设API路由注册完成")
\ No newline at end of file
@@ -10,6 +10,8 @@ from PIL import Image
 import io
 import base64
 
+from .parallel import get_batch_workers, run_batch_parallel
+
 class BaseImageNode:
     """基础图像处理节点"""
     
@@ -17,6 +19,8 @@ class BaseImageNode:
     FUNCTION = 'process'
     CATEGORY = 'Image/Adjustments'
     OUTPUT_NODE = False
+    # 节点的逐帧处理是否线程安全，可由并行执行器处理
+    PARALLEL_BATCH = False
     
     def __init__(self):
         pass
@@ -111,7 +115,11 @@ class BaseImageNode:
             print(f"发送预览数据失败: {e}")
     
     def process_batch_images(self, images, process_func, *args, **kwargs):
-        """批处理图像"""
+        """批处理图像
+        
+        节点设置 PARALLEL_BATCH = True 且配置 batch_workers > 1 时，
+        各帧由线程池并行处理，否则逐帧串行处理。
+        """
         if len(images.shape) == 4:
             batch_size = images.shape[0]
             result = torch.zeros_like(images)
@@ -128,61 +136,51 @@ class BaseImageNode:
                 # 检查kwargs
                 mask = kwargs.get('mask', None)
             
-            for i in range(batch_size):
+            def process_frame(i):
                 # 准备当前批次的参数
                 batch_args = list(args)
+                frame_kwargs = dict(kwargs)
                 
                 # 处理mask
                 if mask is not None:
                     print(f"[BATCH DEBUG] 批次 {i}: 处理遮罩")
-                    print(f"  原始mask shape: {mask.shape if hasattr(mask, 'shape') else type(mask)}")
-                    print(f"  batch_size: {batch_size}")
-                    
-                    if isinstance(mask, torch.Tensor):
-                        if mask.dim() == 3 and mask.shape[0] == batch_size:
-                            # mask是批处理的，取对应的mask
-                            current_mask = mask[i]
-                            print(f"  选择批处理遮罩[{i}]: {current_mask.shape}")
-                        elif mask.dim() == 2:
-                            # mask是单个的2D，对所有批次使用
-                            current_mask = mask
-                            print(f"  使用2D遮罩: {current_mask.shape}")
-                        elif mask.dim() == 3 and mask.shape[0] == 1:
-                            # mask是单个的3D，展开使用
-                            current_mask = mask[0]
-                            print(f"  展开3D遮罩: {current_mask.shape}")
-                        elif mask.dim() == 3 and mask.shape[0] > 1:
-                            # 多个mask但数量不等于batch_size，使用第一个
-                            current_mask = mask[0]
-                            print(f"  使用多遮罩第一个: {current_mask.shape}")
-                        elif mask.dim() == 4:
-                            # 4D mask，取对应批次
-                            if mask.shape[0] == batch_size:
-                                current_mask = mask[i]
-                            else:
-                                current_mask = mask[0]
-                            print(f"  4D遮罩处理: {current_mask.shape}")
-                        else:
-                            current_mask = mask
-                            print(f"  其他情况遮罩: {current_mask.shape if hasattr(current_mask, 'shape') else type(current_mask)}")
-                    else:
-                        current_mask = mask
-                        print(f"  非tensor遮罩: {type(current_mask)}")
+                    current_mask = self._select_batch_mask(mask, i, batch_size)
                     
                     # 更新参数中的mask
                     if mask_in_args and len(batch_args) > mask_index:
                         batch_args[mask_index] = current_mask
                     else:
-                        kwargs['mask'] = current_mask
-                
-                # 处理当前图像
-                print(f"[BATCH DEBUG] 调用process_func:")
-                print(f"  image[{i}] shape: {images[i].shape}")
-                print(f"  batch_args中mask位置({mask_index}): {batch_args[mask_index].shape if mask_in_args and len(batch_args) > mask_index and hasattr(batch_args[mask_index], 'shape') else 'N/A'}")
-                print(f"  kwargs中mask: {kwargs.get('mask').shape if 'mask' in kwargs and hasattr(kwargs['mask'], 'shape') else 'N/A'}")
+                        frame_kwargs['mask'] = current_mask
                 
-                result[i] = process_func(images[i], *batch_args, **kwargs)
+                return process_func(images[i], *batch_args, **frame_kwargs)
+            
+            workers = get_batch_workers(batch_size) if self.PARALLEL_BATCH else 1
+            if workers > 1:
+                print(f"[BATCH] 并行处理 {batch_size} 帧，线程数: {workers}")
+                run_batch_parallel(process_frame, images, result)
+            else:
+                for i in range(batch_size):
+                    result[i] = process_frame(i)
             
             return result
         else:
-            return process_func(images, *args, **kwargs)
\ No newline at end of file
+            return process_func(images, *args, **kwargs)
+    
+    def _select_batch_mask(self, mask, index, batch_size):
+        """为批次中的第index帧选择对应的遮罩"""
+        if not isinstance(mask, torch.Tensor):
+            return mask
+        
+        if mask.dim() == 3 and mask.shape[0] == batch_size:
+            # mask是批处理的，取对应的mask
+            return mask[index]
+        elif mask.dim() == 2:
+            # mask是单个的2D，对所有批次使用
+            return mask
+        elif mask.dim() == 3:
+            # 单个3D遮罩展开使用；多个mask但数量不等于batch_size时使用第一个
+            return mask[0]
+        elif mask.dim() == 4:
+            # 4D mask，取对应批次
+            return mask[index] if mask.shape[0] == batch_size else mask[0]
+        return mask
@@ -0,0 +1,101 @@
+"""
+内存缓存工具
+
+- 数组指纹：对数组内容做哈希，用于判断输入是否变化
+- 按字节预算淘汰的LRU缓存：超出配置 cache_memory_mb 时淘汰最久未使用的条目
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import get_config
+
+
+def fingerprint_array(array):
+    """计算数组内容指纹（形状、类型和全部数据参与哈希）"""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((array.shape, array.dtype.str)).encode())
+    digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def estimate_nbytes(value):
+    """估算缓存值占用的字节数"""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item) for item in value.values())
+    return 0
+
+
+class MemoryLRUCache:
+    """按字节预算淘汰的线程安全LRU缓存"""
+
+    def __init__(self, name, budget_key='cache_memory_mb'):
+        self.name = name
+        self.budget_key = budget_key
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def budget_bytes(self):
+        return max(0, get_config(self.budget_key)) * 1024 * 1024
+
+    def get(self, key):
+        """读取缓存，命中时标记为最近使用，未命中返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """写入缓存，超出预算时淘汰最久未使用的条目；单个条目超过预算时不缓存"""
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        budget = self.budget_bytes
+        if nbytes > budget:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._total_bytes += nbytes
+
+            while self._total_bytes > budget and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+
+    def resize(self, key, nbytes):
+        """更新已缓存条目的字节数（条目内容延迟增长时调用），超出预算时淘汰；条目已被淘汰时忽略"""
+        budget = self.budget_bytes
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._entries[key] = (entry[0], nbytes)
+            self._total_bytes += nbytes - entry[1]
+
+            while self._total_bytes > budget and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """返回条目数和占用字节数"""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total_bytes}
@@ -0,0 +1,84 @@
+"""
+插件运行配置
+
+配置来源（优先级从高到低）：
+- 环境变量 COMFYUI_CURVE_<键名大写>，例如 COMFYUI_CURVE_BATCH_WORKERS=16
+- 插件根目录下的 config.json
+- 本文件中的默认值
+"""
+
+import os
+import json
+from pathlib import Path
+
+# 默认配置
+DEFAULT_CONFIG = {
+    # 批处理并行线程数，<=1 表示逐帧串行处理
+    'batch_workers': 1,
+    # 批处理并行后端：thread（线程池）或 process（共享内存进程池，适合持有GIL的纯Python循环）
+    'batch_backend': 'thread',
+    # 分块处理时单个图块的工作内存预算（MB），<=0 表示整帧处理
+    'tile_memory_mb': 1024,
+    # 快速导向滤波的降采样倍数，1 为全分辨率标准导向滤波（质量最高）
+    'guided_filter_subsample': 4,
+    # 中间结果缓存（金字塔等）的内存预算（MB），0 表示不缓存
+    'cache_memory_mb': 512,
+    # Camera Raw增强各阶段中间结果缓存的内存预算（MB），0 表示不缓存
+    'stage_cache_memory_mb': 1024,
+    # 代理模式下输入长边缩放到的像素数
+    'proxy_long_edge': 1024,
+}
+
+CONFIG_FILE = Path(__file__).parent.parent.parent / "config.json"
+ENV_PREFIX = "COMFYUI_CURVE_"
+
+_config_cache = None
+
+
+def _convert_env_value(raw_value, default_value):
+    """按默认值的类型转换环境变量字符串"""
+    if isinstance(default_value, bool):
+        return raw_value.strip().lower() in ('true', '1', 'yes', 'on')
+    if isinstance(default_value, int):
+        return int(raw_value)
+    if isinstance(default_value, float):
+        return float(raw_value)
+    return raw_value
+
+
+def _load_config():
+    """加载配置：默认值 → config.json → 环境变量"""
+    config = dict(DEFAULT_CONFIG)
+
+    if CONFIG_FILE.exists():
+        try:
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                config.update(json.load(f))
+        except Exception as e:
+            print(f"⚠️ 读取配置文件失败，使用默认配置: {e}")
+
+    for key, default_value in DEFAULT_CONFIG.items():
+        raw_value = os.environ.get(ENV_PREFIX + key.upper())
+        if raw_value is None:
+            continue
+        try:
+            config[key] = _convert_env_value(raw_value, default_value)
+        except ValueError:
+            print(f"⚠️ 环境变量 {ENV_PREFIX + key.upper()} 的值无效: {raw_value}")
+
+    return config
+
+
+def get_config(key, default=None):
+    """获取配置项"""
+    global _config_cache
+    if _config_cache is None:
+        _config_cache = _load_config()
+    return _config_cache.get(key, DEFAULT_CONFIG.get(key, default))
+
+
+def reload_config():
+    """重新加载配置（修改config.json或环境变量后调用）"""
+    global _config_cache
+    _config_cache = _load_config()
+    return _config_cache
@@ -31,6 +31,9 @@ except ImportError:
 class GenericPresetManager:
     """通用预设管理器类"""
     
+    # 已注册路由的节点类型，保证每种节点类型只注册一套预设路由
+    _registered_types = set()
+    
     def __init__(self, node_type, preset_dir="presets"):
         """
         初始化预设管理器
@@ -62,6 +65,11 @@ class GenericPresetManager:
         if not hasattr(PromptServer, 'instance') or not PromptServer.instance:
             print(f"⚠️ PromptServer实例未初始化，跳过{self.node_type}预设路由设置")
             return
+        
+        # 同一节点类型的路由只注册一次
+        if self.node_type in GenericPresetManager._registered_types:
+            return
+        GenericPresetManager._registered_types.add(self.node_type)
             
         routes = PromptServer.instance.routes
         
@@ -0,0 +1,83 @@
+"""
+导向滤波
+
+保边平滑滤波器，用于细化去雾透射率、遮罩边缘等：
+- 标准导向滤波（He et al.）：全分辨率下6次盒式滤波
+- 快速导向滤波：在降采样 subsample 倍的分辨率上计算线性系数，再上采样回原尺寸，
+  计算量约降低 subsample² 倍，边缘仍由全分辨率引导图决定
+"""
+
+import cv2
+import numpy as np
+
+from .config import get_config
+
+
+def _box(image, radius):
+    """窗口为 (2r+1)×(2r+1) 的均值滤波"""
+    ksize = 2 * radius + 1
+    return cv2.boxFilter(image, cv2.CV_32F, (ksize, ksize))
+
+
+def guided_filter(guide, src, radius, eps, subsample=None):
+    """
+    导向滤波
+
+    Args:
+        guide: 引导图 [H, W]，float32，0-1
+        src: 待滤波图像 [H, W] 或 [H, W, C]
+        radius: 窗口半径（全分辨率像素）
+        eps: 正则化系数，越大越平滑
+        subsample: 降采样倍数（质量旋钮），1 为标准导向滤波，
+            默认读取配置 guided_filter_subsample
+
+    Returns:
+        滤波结果，形状与src相同，float32
+    """
+    if subsample is None:
+        subsample = get_config('guided_filter_subsample')
+    subsample = max(1, int(subsample))
+
+    guide = np.asarray(guide, dtype=np.float32)
+    src = np.asarray(src, dtype=np.float32)
+    height, width = guide.shape[:2]
+    # OpenCV会丢弃单通道维度，单通道src按2D处理，最后恢复原形状
+    work_src = src[..., 0] if src.ndim == 3 and src.shape[2] == 1 else src
+
+    # 图像太小时不降采样
+    if subsample > 1 and min(height, width) >= 2 * subsample:
+        small_size = (width // subsample, height // subsample)
+        guide_small = cv2.resize(guide, small_size, interpolation=cv2.INTER_AREA)
+        src_small = cv2.resize(work_src, small_size, interpolation=cv2.INTER_AREA)
+        small_radius = max(1, radius // subsample)
+    else:
+        subsample = 1
+        guide_small, src_small, small_radius = guide, work_src, radius
+
+    # 引导图统计量（单通道）
+    mean_I = _box(guide_small, small_radius)
+    var_I = _box(guide_small * guide_small, small_radius) - mean_I * mean_I
+
+    # 多通道src时引导图统计量扩展通道维度参与广播
+    if src_small.ndim == 3:
+        guide_small = guide_small[..., np.newaxis]
+        mean_I = mean_I[..., np.newaxis]
+        var_I = var_I[..., np.newaxis]
+
+    mean_p = _box(src_small, small_radius)
+    cov_Ip = _box(guide_small * src_small, small_radius) - mean_I * mean_p
+
+    a = cov_Ip / (var_I + eps)
+    b = mean_p - a * mean_I
+
+    mean_a = _box(a, small_radius)
+    mean_b = _box(b, small_radius)
+
+    # 线性系数上采样回原尺寸，由全分辨率引导图生成输出
+    if subsample > 1:
+        mean_a = cv2.resize(mean_a, (width, height), interpolation=cv2.INTER_LINEAR)
+        mean_b = cv2.resize(mean_b, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    if work_src.ndim == 3:
+        return mean_a * guide[..., np.newaxis] + mean_b
+    return (mean_a * guide + mean_b).reshape(src.shape)
@@ -0,0 +1,100 @@
+"""
+直方图工具
+
+色阶、直方图分析和曲线图表共用的快速直方图：
+- 像素值量化为 int32 组号，加上 行号*bins 的偏移后对 (帧, 通道) 所有行一次 torch.bincount；
+  范围之外的值改写为末尾的废弃组，计数后丢弃
+- 分位点在累积分布上用 searchsorted 查找，所有行一次完成
+"""
+
+import numpy as np
+import torch
+
+from .tiling import get_frame_chunk_size
+
+
+def histogram_bin_edges(bins=256, value_range=(0.0, 255.0)):
+    """返回与 np.histogram 相同的组边界"""
+    return np.linspace(value_range[0], value_range[1], bins + 1)
+
+
+def batched_histogram(data, bins=256, value_range=(0.0, 255.0)):
+    """
+    计算整批、所有通道的直方图
+
+    分组规则与 np.histogram 一致：各组左闭右开，最后一组包含右端点，范围之外的值不计数。
+
+    Args:
+        data: 通道在最后一维的数据 [B, ..., C]（torch tensor 或 numpy 数组）
+        bins: 分组数
+        value_range: 统计范围 (low, high)
+
+    Returns:
+        int64 numpy 数组 [B, C, bins]
+    """
+    data = torch.as_tensor(data)
+    batch, channels = data.shape[0], data.shape[-1]
+    values = data.reshape(batch, -1, channels)
+    pixels = values.shape[1]
+    low, high = float(value_range[0]), float(value_range[1])
+    scale = bins / (high - low)
+
+    counts = torch.empty(batch, channels, bins, dtype=torch.int64, device=values.device)
+    # 每像素：float32组位置、int32组号和范围掩码
+    chunk = get_frame_chunk_size(pixels, channels * (4 + 4 + 1)) or batch
+
+    for start in range(0, batch, chunk):
+        end = min(start + chunk, batch)
+        frames = values[start:end]
+        rows = (end - start) * channels
+        # 整块都在统计范围内时直接计数；min/max 会传播NaN，含NaN时比较为False
+        in_range = low <= float(frames.min()) and float(frames.max()) <= high
+
+        # 组号截断到 [0, bins-1]，右端点落入最后一组
+        position = frames.to(torch.float32, copy=True)
+        position.sub_(low).mul_(scale).floor_().clamp_(0, bins - 1)
+        # 转为 (帧, 通道, 像素) 排列的连续int32组号，每行加上 行号*bins 的偏移
+        codes = torch.empty((end - start, channels, pixels), dtype=torch.int32, device=values.device)
+        codes.copy_(position.transpose(1, 2))
+        del position
+        codes += (torch.arange(rows, dtype=torch.int32, device=values.device) * bins).view(end - start, channels, 1)
+
+        # 范围之外（含NaN）的值计入末尾的废弃组
+        if not in_range:
+            valid = ((frames >= low) & (frames <= high)).transpose(1, 2)
+            codes.masked_fill_(~valid, rows * bins)
+            del valid
+
+        flat = torch.bincount(codes.view(-1), minlength=rows * bins + 1)
+        counts[start:end] = flat[:rows * bins].view(end - start, channels, bins)
+
+    return counts.cpu().numpy()
+
+
+def histogram_percentiles(hist, fractions):
+    """
+    在直方图的累积分布上查找分位点所在的组
+
+    Args:
+        hist: 直方图 [..., bins]
+        fractions: 分位点（0-1）序列
+
+    Returns:
+        组号数组 [..., len(fractions)]，即累积分布首次达到各分位点的组
+    """
+    hist = np.asarray(hist, dtype=np.float64)
+    bins = hist.shape[-1]
+    rows = hist.reshape(-1, bins)
+    fractions = np.asarray(fractions, dtype=np.float64)
+
+    cdf = np.cumsum(rows, axis=1)
+    cdf /= np.maximum(cdf[:, -1:], 1.0)
+
+    # 每行累积分布加上 2*行号 后首尾相接成单调序列，一次 searchsorted 完成所有行
+    row_offsets = np.arange(rows.shape[0])[:, np.newaxis]
+    stacked_cdf = (cdf + 2.0 * row_offsets).ravel()
+    targets = (fractions[np.newaxis, :] + 2.0 * row_offsets).ravel()
+    index = np.searchsorted(stacked_cdf, targets, side='left').reshape(-1, len(fractions))
+    index -= row_offsets * bins
+
+    return np.clip(index, 0, bins - 1).reshape(hist.shape[:-1] + (len(fractions),))
@@ -0,0 +1,147 @@
+"""
+关键帧动画曲线
+
+批次（视频帧）中的曲线参数可以随帧变化，例如曝光渐变、日景到夜景的曲线过渡。
+关键帧以JSON字符串给出：
+
+    [{"frame": 0, "highlights": 0}, {"frame": 59, "highlights": -60, "point_curve": "[[0,0],[128,100],[255,255]]"}]
+
+每个关键帧只需列出变化的参数，其余参数取节点当前输入。每个关键帧构建一张LUT，
+关键帧之间的帧对相邻两张LUT线性插值，首尾关键帧之外保持端点值，
+最终得到 [B, ..., N] 的逐帧LUT栈，在整个批次上一次性查表。
+"""
+
+import json
+
+import numpy as np
+import torch
+
+from .tiling import get_frame_chunk_size
+
+
+def parse_keyframes(keyframes, base_params):
+    """
+    解析关键帧并补全参数
+
+    Args:
+        keyframes: 关键帧JSON字符串（或已解析的列表）
+        base_params: 节点当前参数字典，关键帧中未给出的参数取此值
+
+    Returns:
+        按帧号排序的 [(frame, params), ...]；为空或解析失败时返回空列表
+    """
+    if keyframes is None:
+        return []
+    if isinstance(keyframes, str):
+        if not keyframes.strip():
+            return []
+        try:
+            keyframes = json.loads(keyframes)
+        except ValueError as e:
+            print(f"⚠️ 关键帧解析失败，忽略关键帧: {e}")
+            return []
+
+    if not isinstance(keyframes, list):
+        print("⚠️ 关键帧必须是列表，忽略关键帧")
+        return []
+
+    parsed = {}
+    for entry in keyframes:
+        if not isinstance(entry, dict) or 'frame' not in entry:
+            print(f"⚠️ 无效关键帧（缺少frame）: {entry}")
+            continue
+        try:
+            frame = int(entry['frame'])
+        except (TypeError, ValueError):
+            print(f"⚠️ 无效关键帧（frame不是整数）: {entry}")
+            continue
+
+        params = dict(base_params)
+        for key, value in entry.items():
+            if key == 'frame':
+                continue
+            if key not in base_params:
+                print(f"⚠️ 关键帧参数 {key} 不受支持，已忽略")
+                continue
+            params[key] = value
+
+        # 同一帧号出现多次时以后者为准
+        parsed[frame] = params
+
+    return sorted(parsed.items())
+
+
+def _keyframe_segments(frames, batch_size):
+    """返回每帧所在关键帧区间的 (左索引, 右索引, 插值权重)"""
+    frames = np.asarray(frames, dtype=np.float64)
+    positions = np.arange(batch_size, dtype=np.float64)
+
+    hi = np.clip(np.searchsorted(frames, positions, side='right'), 1, max(len(frames) - 1, 1))
+    lo = hi - 1
+    if len(frames) == 1:
+        hi = lo
+
+    span = frames[hi] - frames[lo]
+    t = np.where(span > 0, (positions - frames[lo]) / np.where(span > 0, span, 1.0), 0.0)
+    return lo, hi, np.clip(t, 0.0, 1.0)
+
+
+def build_lut_stack(keyframes, batch_size, build_lut):
+    """
+    按关键帧构建逐帧LUT栈
+
+    Args:
+        keyframes: parse_keyframes 的返回值
+        batch_size: 批次帧数
+        build_lut: 参数字典 -> LUT数组的函数，每个关键帧调用一次
+
+    Returns:
+        float32 数组 [B, ...]，第b帧为所在区间两端关键帧LUT的线性插值
+    """
+    tables = np.stack([np.asarray(build_lut(params), dtype=np.float32) for _, params in keyframes])
+    lo, hi, t = _keyframe_segments([frame for frame, _ in keyframes], batch_size)
+
+    t = t.astype(np.float32).reshape((-1,) + (1,) * (tables.ndim - 1))
+    return tables[lo] * (1.0 - t) + tables[hi] * t
+
+
+def interpolate_keyframe_param(keyframes, batch_size, name):
+    """对数值参数按关键帧线性插值，返回长度为B的float32数组"""
+    frames = [frame for frame, _ in keyframes]
+    values = [float(params[name]) for _, params in keyframes]
+    return np.interp(np.arange(batch_size), frames, values).astype(np.float32)
+
+
+def apply_lut_stack(images, lut_stack):
+    """
+    在整个批次上按帧查表
+
+    Args:
+        images: [B, H, W, C] 图像 tensor，取值0-1
+        lut_stack: [B, N]（所有通道共用）或 [B, C, N]（逐通道）的LUT，输出取值0-1
+
+    Returns:
+        [B, H, W, C] float32 tensor
+
+    批次按 tile_memory_mb 分块，限制int64索引等中间结果的内存占用。
+    """
+    batch, height, width, channels = images.shape
+    luts = torch.as_tensor(lut_stack, dtype=torch.float32, device=images.device)
+    if luts.dim() == 2:
+        luts = luts[:, None, :].expand(batch, channels, luts.shape[-1])
+    size = luts.shape[-1]
+    flat = luts.reshape(-1)
+
+    # 每帧每通道的LUT在展平表中的起始偏移
+    offsets = (torch.arange(batch * channels, device=images.device) * size).reshape(batch, 1, 1, channels)
+
+    result = torch.empty(images.shape, dtype=torch.float32, device=images.device)
+    # 每像素每通道：截断后的float32、int64索引
+    chunk = get_frame_chunk_size(height * width, channels * (4 + 8)) or batch
+    for start in range(0, batch, chunk):
+        end = min(start + chunk, batch)
+        index = (images[start:end].clamp(0, 1) * (size - 1)).long()
+        index += offsets[start:end]
+        result[start:end] = flat[index]
+
+    return result
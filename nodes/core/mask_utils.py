@@ -8,6 +8,8 @@ import torch
 import cv2
 import numpy as np
 
+from .guided_filter import guided_filter
+
 def apply_mask_to_image(original_image, processed_image, mask, invert_mask=False, remove_small_areas=False, min_area_threshold=100):
     """
     使用遮罩混合原始图像和处理后的图像
@@ -45,7 +47,7 @@ def apply_mask_to_image(original_image, processed_image, mask, invert_mask=False
     img_h, img_w = orig_shape[0], orig_shape[1]  # 假设是 [H, W, C] 格式
     
     if mask_h != img_h or mask_w != img_w:
-        print(f"[MASK ERROR] 遮罩尺寸不匹配！")
+        print("[MASK ERROR] 遮罩尺寸不匹配！")
         print(f"  遮罩: ({mask_h}, {mask_w}), 图像: ({img_h}, {img_w})")
         return original_image  # 直接返回原图，不应用任何效果
     
@@ -129,6 +131,32 @@ def blur_mask(mask, blur_radius):
     # 转换回tensor
     return torch.from_numpy(blurred.astype(np.float32) / 255.0).to(mask.device)
 
+def refine_mask_with_guide(mask, image, radius=8, eps=1e-3, subsample=None):
+    """
+    以图像为引导对遮罩进行导向滤波，使遮罩边缘贴合图像边缘
+    
+    Args:
+        mask: 2D遮罩 tensor (H, W)
+        image: 引导图像 tensor (H, W, C)
+        radius: 滤波窗口半径
+        eps: 正则化系数，越大越平滑
+        subsample: 快速导向滤波的降采样倍数，默认读取配置
+    
+    Returns:
+        细化后的遮罩 tensor
+    """
+    mask_np = mask.detach().cpu().numpy().astype(np.float32)
+    image_np = image.detach().cpu().numpy()
+    
+    # RGB亮度作为引导图
+    if image_np.shape[-1] >= 3:
+        guide = 0.299 * image_np[..., 0] + 0.587 * image_np[..., 1] + 0.114 * image_np[..., 2]
+    else:
+        guide = image_np[..., 0]
+    
+    refined = guided_filter(guide, mask_np, radius, eps, subsample)
+    return torch.from_numpy(np.clip(refined, 0, 1)).to(mask.device)
+
 def process_mask_for_batch(mask, batch_size, image_height, image_width):
     """
     为批处理准备遮罩
@@ -168,6 +196,59 @@ def process_mask_for_batch(mask, batch_size, image_height, image_width):
     
     return mask
 
+def prepare_batch_mask(mask, batch_size, image_height, image_width, mask_blur=0.0, invert_mask=False,
+                       guide=None, refine_radius=0):
+    """
+    为整批混合准备遮罩：只对不同的遮罩各羽化一次，不复制成B份
+    
+    Args:
+        mask: 输入遮罩 (H, W)、(1, H, W) 或 (B, H, W)
+        batch_size: 批大小
+        image_height: 图像高度
+        image_width: 图像宽度
+        mask_blur: 羽化半径
+        invert_mask: 是否反转遮罩
+        guide: 边缘细化的引导图像 (B, H, W, C)，refine_radius > 0 时使用
+        refine_radius: 导向滤波半径，>0 时在羽化前让遮罩边缘贴合引导图像的边缘；
+            各帧引导图不同，细化后的遮罩为逐帧 (B, H, W, 1)
+    
+    Returns:
+        (B, H, W, 1) 或 (1, H, W, 1) 的0-1遮罩，可直接广播到图像；尺寸不匹配时返回None
+    """
+    if mask is None:
+        return None
+    
+    if mask.dim() == 2:
+        masks = mask.unsqueeze(0)
+    elif mask.dim() == 3 and mask.shape[0] == batch_size:
+        masks = mask
+    elif mask.dim() == 3:
+        # 遮罩数量与批大小不匹配时使用第一个遮罩
+        masks = mask[:1]
+    else:
+        masks = mask.reshape(-1, mask.shape[-2], mask.shape[-1])[:1]
+    
+    # 与apply_mask_to_image一致：尺寸不匹配时不插值
+    if masks.shape[-2:] != (image_height, image_width):
+        print("[MASK ERROR] 遮罩尺寸不匹配！")
+        print(f"  遮罩: {tuple(masks.shape[-2:])}, 图像: ({image_height}, {image_width})")
+        return None
+    
+    refine_radius = int(round(refine_radius))
+    if refine_radius > 0 and guide is not None:
+        if masks.shape[0] == 1:
+            masks = masks.expand(guide.shape[0], -1, -1)
+        masks = torch.stack([refine_mask_with_guide(frame_mask, frame, refine_radius)
+                             for frame_mask, frame in zip(masks, guide)])
+    
+    if mask_blur > 0:
+        masks = torch.stack([blur_mask(frame_mask, mask_blur) for frame_mask in masks])
+    
+    masks = masks.to(torch.float32)
+    if invert_mask:
+        masks = 1.0 - masks
+    return masks.clamp(0, 1).unsqueeze(-1)
+
 def create_luminance_mask(image, threshold_low=0.2, threshold_high=0.8):
     """
     基于亮度创建遮罩
@@ -0,0 +1,72 @@
+"""
+批处理并行执行器
+
+将批次中的各帧分发到线程池并行处理：
+- OpenCV和NumPy的大部分运算会释放GIL，多线程可以利用多核
+- 结果按帧序号写入预分配的输出tensor
+- 单帧出错只影响该帧（保留原图），不影响整个批次
+"""
+
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import get_config
+
+_thread_pool = None
+_thread_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def get_batch_workers(batch_size):
+    """根据配置和批大小计算并行线程数"""
+    try:
+        workers = int(get_config('batch_workers'))
+    except (TypeError, ValueError):
+        workers = 1
+    return max(1, min(workers, batch_size))
+
+
+def _get_thread_pool():
+    """获取共享线程池，线程数随配置变化时重建"""
+    global _thread_pool, _thread_pool_size
+
+    pool_size = max(1, int(get_config('batch_workers')))
+    with _pool_lock:
+        if _thread_pool is None or _thread_pool_size != pool_size:
+            if _thread_pool is not None:
+                _thread_pool.shutdown(wait=False)
+            _thread_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='curve-batch')
+            _thread_pool_size = pool_size
+        return _thread_pool
+
+
+def run_batch_parallel(frame_func, images, output):
+    """
+    并行处理批次中的每一帧
+
+    Args:
+        frame_func: 处理单帧的函数，参数为帧序号，返回处理后的帧
+        images: 输入批次 tensor [B, H, W, C]，出错的帧从这里取原图
+        output: 预分配的输出 tensor，与images形状相同
+
+    Returns:
+        处理失败的帧序号列表
+    """
+    failed_frames = []
+
+    def run_frame(index):
+        try:
+            output[index] = frame_func(index)
+        except Exception as e:
+            print(f"⚠️ 批处理第{index}帧失败，保留原图: {e}")
+            traceback.print_exc()
+            output[index] = images[index]
+            failed_frames.append(index)
+
+    pool = _get_thread_pool()
+    futures = [pool.submit(run_frame, i) for i in range(images.shape[0])]
+    for future in futures:
+        future.result()
+
+    return sorted(failed_frames)
@@ -0,0 +1,121 @@
+"""
+批量参数扫描
+
+A/B测试时同一张图要用几十组滑块取值分别处理。滑块输入可以直接是长度为B的列表/数组/tensor，
+也可以通过节点的 parameter_sweep 输入以JSON给出：
+
+    {"exposure": [-1, -0.5, 0, 0.5, 1], "contrast": [0, 10, 20, 30, 40]}
+
+一次执行输出B个变体：输入只有一帧时扩展为B帧，否则第b帧使用第b组参数。
+长度为1的列表视为标量，未扫描的参数所有帧共用节点当前输入。
+参数派生的查找表按B组参数向量化构建，逐像素计算在整批上一次完成。
+"""
+
+import json
+
+import numpy as np
+import torch
+
+
+def is_sweep_value(value):
+    """参数值是否为逐帧取值（列表、元组或至少一维的数组/tensor）"""
+    if isinstance(value, (list, tuple)):
+        return True
+    if isinstance(value, (np.ndarray, torch.Tensor)):
+        return value.ndim > 0
+    return False
+
+
+def parse_parameter_sweep(parameter_sweep, params):
+    """
+    将 parameter_sweep JSON 合并到参数字典
+
+    Args:
+        parameter_sweep: JSON对象字符串（或已解析的字典），参数名 -> 取值列表
+        params: 节点当前参数字典
+
+    Returns:
+        合并后的新字典；为空或解析失败时返回 params 的副本
+    """
+    merged = dict(params)
+    if parameter_sweep is None:
+        return merged
+    if isinstance(parameter_sweep, str):
+        if not parameter_sweep.strip():
+            return merged
+        try:
+            parameter_sweep = json.loads(parameter_sweep)
+        except ValueError as e:
+            print(f"⚠️ 参数扫描解析失败，忽略参数扫描: {e}")
+            return merged
+
+    if not isinstance(parameter_sweep, dict):
+        print("⚠️ 参数扫描必须是 参数名 -> 取值列表 的对象，忽略参数扫描")
+        return merged
+
+    for key, value in parameter_sweep.items():
+        if key not in params:
+            print(f"⚠️ 参数扫描的参数 {key} 不受支持，已忽略")
+            continue
+        merged[key] = value
+    return merged
+
+
+def resolve_parameter_sweep(params, parameter_sweep=None):
+    """
+    展开逐帧参数
+
+    Args:
+        params: 参数名 -> 标量或逐帧取值
+        parameter_sweep: 可选的 parameter_sweep JSON，覆盖 params 中的同名参数
+
+    Returns:
+        (sweep_size, per_frame)：per_frame 为 参数名 -> float64 数组 [sweep_size]，标量参数广播到每一帧；
+        没有多于一个取值的参数时 sweep_size 为0，per_frame 中各数组长度为1（长度为1的列表按标量处理）
+
+    Raises:
+        ValueError: 各逐帧参数的长度不一致
+    """
+    params = parse_parameter_sweep(parameter_sweep, params)
+
+    values = {}
+    sizes = set()
+    for key, value in params.items():
+        if is_sweep_value(value):
+            if isinstance(value, torch.Tensor):
+                value = value.detach().cpu().numpy()
+            array = np.asarray(value, dtype=np.float64).reshape(-1)
+            if array.size > 1:
+                sizes.add(array.size)
+            values[key] = array
+        else:
+            values[key] = np.asarray([value], dtype=np.float64)
+
+    if not sizes:
+        return 0, values
+    if len(sizes) > 1:
+        raise ValueError(f"参数扫描的取值个数不一致: {sorted(sizes)}")
+
+    sweep_size = sizes.pop()
+    per_frame = {key: np.broadcast_to(array, (sweep_size,)) for key, array in values.items()}
+    print(f"🧪 参数扫描: {sweep_size}组，扫描参数 {[key for key, array in values.items() if array.size > 1]}")
+    return sweep_size, per_frame
+
+
+def expand_sweep_batch(image, sweep_size):
+    """
+    将图像批次对齐到扫描组数
+
+    输入 [H, W, C] 或只有一帧的 [1, H, W, C] 时扩展为 [sweep_size, H, W, C]（不复制数据）；
+    帧数与扫描组数相同时逐帧对应。
+
+    Raises:
+        ValueError: 帧数既不是1也不等于扫描组数
+    """
+    if image.dim() == 3:
+        image = image.unsqueeze(0)
+    if image.shape[0] == sweep_size:
+        return image
+    if image.shape[0] == 1:
+        return image.expand(sweep_size, *image.shape[1:])
+    raise ValueError(f"参数扫描有{sweep_size}组，但输入批次为{image.shape[0]}帧（应为1帧或{sweep_size}帧）")
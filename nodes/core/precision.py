@@ -0,0 +1,19 @@
+"""
+计算精度策略
+
+逐像素阶段统一使用 float32：输入、阶段之间的数据、缓存和输出都是float32，
+中间结果不允许隐式提升为float64（例如与Python列表做 np.dot、np.interp 查表）。
+
+曾提供的 float16/bfloat16 选项已移除（依据见README的“计算精度”一节）：CPU上半精度运算由float32模拟，
+各阶段在float32与半精度之间来回转换，实测比float32更慢、内存更多，误差也明显。
+"""
+
+import numpy as np
+
+# 计算时使用的NumPy浮点类型
+COMPUTE_NP_DTYPE = np.float32
+
+
+def as_compute_array(array):
+    """转换为计算用的float32数组（已是float32时不复制）"""
+    return np.asarray(array, dtype=COMPUTE_NP_DTYPE)
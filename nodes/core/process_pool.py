@@ -0,0 +1,202 @@
+"""
+批处理多进程执行器
+
+纯Python循环会持有GIL，线程池无法加速，此时改用进程池：
+- 输入批次和输出批次放在共享内存（multiprocessing.shared_memory）中，
+  子进程直接在共享内存上创建numpy视图读写，像素数据不经过pickle
+- 进程池常驻并在多次批处理之间复用，分摊子进程启动开销
+- 主进程退出时自动关闭进程池
+- 单帧出错只影响该帧（保留原图）
+
+帧处理函数签名为 frame_func(frame_np, *args) -> np.ndarray，必须是插件内的模块级函数：
+子进程用forkserver/spawn启动，不继承主进程的模块，只按 (模块名, 函数名) 重新导入帧处理函数。
+"""
+
+import atexit
+import importlib
+import os
+import sys
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .config import get_config
+
+_process_pool = None
+_process_pool_size = 0
+_pool_lock = threading.Lock()
+
+# 插件根目录；ComfyUI按路径加载插件，其上级目录不一定在sys.path中，子进程需自行加入
+_PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 主进程中插件包的模块名前缀
+_PLUGIN_PACKAGE = __name__.rsplit('.nodes.core.', 1)[0]
+
+# 子进程中已解析的帧处理函数
+_frame_funcs = {}
+
+
+def _init_worker(plugin_dir):
+    """子进程初始化：使插件包可导入，并限制每个进程内部的线程数，避免与进程池争抢CPU"""
+    parent = os.path.dirname(plugin_dir)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def _get_mp_context():
+    """
+    优先使用forkserver，否则spawn
+
+    ComfyUI服务器是多线程的，fork只复制调用线程，其他线程持有的锁在子进程中永远不会释放，可能死锁；
+    fork出的子进程还会带着主进程模块级查找表缓存的副本。forkserver从单线程的服务进程派生子进程。
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _frame_func_reference(frame_func):
+    """帧处理函数的 (插件内模块名, 函数名)，非插件内的模块级函数时抛出ValueError"""
+    module = getattr(frame_func, '__module__', None) or ''
+    name = getattr(frame_func, '__qualname__', '')
+    if not module.startswith(_PLUGIN_PACKAGE + '.') or '.' in name or '<' in name:
+        raise ValueError(f"帧处理函数必须是插件内的模块级函数: {module}.{name}")
+    return module[len(_PLUGIN_PACKAGE) + 1:], name
+
+
+def _resolve_frame_func(reference):
+    """在子进程中按目录名导入插件子模块并取出帧处理函数，结果按进程缓存"""
+    frame_func = _frame_funcs.get(reference)
+    if frame_func is None:
+        module_name, name = reference
+        module = importlib.import_module(f"{os.path.basename(_PLUGIN_DIR)}.{module_name}")
+        frame_func = _frame_funcs[reference] = getattr(module, name)
+    return frame_func
+
+
+def get_process_pool():
+    """获取共享进程池，进程数随配置变化时重建"""
+    global _process_pool, _process_pool_size
+
+    pool_size = max(1, int(get_config('batch_workers')))
+    with _pool_lock:
+        if _process_pool is None or _process_pool_size != pool_size:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=True)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=pool_size,
+                mp_context=_get_mp_context(),
+                initializer=_init_worker,
+                initargs=(_PLUGIN_DIR,),
+            )
+            _process_pool_size = pool_size
+        return _process_pool
+
+
+def shutdown_process_pool():
+    """关闭进程池（主进程退出时自动调用）"""
+    global _process_pool, _process_pool_size
+
+    with _pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+            _process_pool_size = 0
+
+
+atexit.register(shutdown_process_pool)
+
+
+def _attach_shared_memory(name):
+    """
+    在子进程中连接已有的共享内存块，只有创建它的主进程与resource_tracker交互并负责释放
+
+    子进程与主进程共用同一个resource_tracker，子进程中取消登记会删掉主进程的登记，
+    主进程unlink时tracker便会报 KeyError。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 不支持track参数：连接时的重复登记在tracker中是同一条记录，主进程unlink时一并注销，
+        # 子进程不做任何处理
+        return shared_memory.SharedMemory(name=name)
+
+
+def _process_shared_frame(input_name, output_name, shape, dtype, index, frame_ref, args):
+    """子进程任务：在共享内存视图上处理一帧，成功返回None，失败返回错误信息"""
+    input_shm = _attach_shared_memory(input_name)
+    output_shm = _attach_shared_memory(output_name)
+    frames_in = frames_out = None
+    try:
+        frame_func = _resolve_frame_func(frame_ref)
+        frames_in = np.ndarray(shape, dtype=dtype, buffer=input_shm.buf)
+        frames_out = np.ndarray(shape, dtype=dtype, buffer=output_shm.buf)
+        frames_out[index] = frame_func(frames_in[index], *args)
+        return None
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        # 关闭共享内存前必须释放所有numpy视图
+        del frames_in, frames_out
+        input_shm.close()
+        output_shm.close()
+
+
+def run_batch_in_processes(frame_func, images_np, *args):
+    """
+    使用进程池并行处理批次中的每一帧
+
+    Args:
+        frame_func: 插件内的模块级帧处理函数 frame_func(frame_np, *args) -> np.ndarray
+        images_np: 输入批次 numpy 数组 [B, H, W, C]
+        *args: 传给frame_func的额外参数（会被pickle，应为标量等小对象）
+
+    Returns:
+        输出批次 numpy 数组，形状和dtype与输入相同
+    """
+    frame_ref = _frame_func_reference(frame_func)
+    images_np = np.ascontiguousarray(images_np)
+    shape, dtype = images_np.shape, images_np.dtype
+
+    input_shm = shared_memory.SharedMemory(create=True, size=max(1, images_np.nbytes))
+    output_shm = shared_memory.SharedMemory(create=True, size=max(1, images_np.nbytes))
+    frames_in = frames_out = None
+    try:
+        frames_in = np.ndarray(shape, dtype=dtype, buffer=input_shm.buf)
+        frames_out = np.ndarray(shape, dtype=dtype, buffer=output_shm.buf)
+        frames_in[...] = images_np
+
+        pool = get_process_pool()
+        futures = [
+            pool.submit(_process_shared_frame, input_shm.name, output_shm.name,
+                        shape, dtype.str, i, frame_ref, args)
+            for i in range(shape[0])
+        ]
+
+        for i, future in enumerate(futures):
+            error = future.result()
+            if error is not None:
+                print(f"⚠️ 进程池处理第{i}帧失败，保留原图:\n{error}")
+                frames_out[i] = images_np[i]
+
+        # 复制出共享内存，之后即可释放
+        return frames_out.copy()
+    finally:
+        del frames_in, frames_out
+        input_shm.close()
+        input_shm.unlink()
+        output_shm.close()
+        output_shm.unlink()
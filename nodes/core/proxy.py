@@ -0,0 +1,69 @@
+"""
+代理分辨率
+
+调参阶段在缩小的输入副本上运行节点，快速得到预览：
+- 长边缩放到配置 proxy_long_edge（默认1024），不放大小图
+- 输出保持代理分辨率，不放大回原尺寸；正式出图时关闭代理模式
+- 缩放只是一次区域插值，比对整帧内容做哈希还快，因此不缓存
+- 返回缩放比例，节点据此缩放与分辨率相关的参数（模糊半径、滤波尺度等）
+"""
+
+import torch.nn.functional as F
+
+from .config import get_config
+
+
+def get_proxy_scale(height, width, long_edge=None):
+    """计算代理缩放比例（<=1）"""
+    if long_edge is None:
+        long_edge = get_config('proxy_long_edge')
+    long_edge = int(long_edge)
+    if long_edge <= 0:
+        return 1.0
+    return min(1.0, long_edge / max(height, width))
+
+
+def _resize_images(images, height, width):
+    """缩放 [B, H, W, C] 图像，缩小时使用区域插值"""
+    resized = F.interpolate(images.permute(0, 3, 1, 2), size=(height, width), mode='area')
+    return resized.permute(0, 2, 3, 1).contiguous()
+
+
+def resize_mask(mask, height, width):
+    """将 [H, W] 或 [B, H, W] 遮罩缩放到指定尺寸"""
+    if mask is None or tuple(mask.shape[-2:]) == (height, width):
+        return mask
+    squeeze = mask.dim() == 2
+    batched = mask.unsqueeze(0) if squeeze else mask
+    resized = F.interpolate(batched.unsqueeze(1).float(), size=(height, width), mode='area').squeeze(1)
+    return resized[0] if squeeze else resized
+
+
+def make_proxy(image, mask=None, long_edge=None):
+    """
+    生成代理分辨率的输入
+
+    Args:
+        image: 图像 tensor [B, H, W, C] 或 [H, W, C]
+        mask: 可选遮罩，同步缩放
+        long_edge: 代理长边像素数，默认读取配置 proxy_long_edge
+
+    Returns:
+        (代理图像, 代理遮罩, 缩放比例)
+    """
+    single = image.dim() == 3
+    images = image.unsqueeze(0) if single else image
+    height, width = images.shape[1:3]
+
+    scale = get_proxy_scale(height, width, long_edge)
+    if scale >= 1.0:
+        return image, mask, 1.0
+
+    proxy_height = max(1, round(height * scale))
+    proxy_width = max(1, round(width * scale))
+
+    proxy = _resize_images(images, proxy_height, proxy_width)
+
+    print(f"[PROXY] 代理模式: {width}x{height} → {proxy_width}x{proxy_height}")
+    proxy_mask = resize_mask(mask, proxy_height, proxy_width)
+    return (proxy[0] if single else proxy), proxy_mask, scale
@@ -0,0 +1,132 @@
+"""
+多尺度金字塔
+
+每帧构建一次float32高斯金字塔，纹理、清晰度等细节增强从同一分解中读取不同尺度的频带：
+- 第k层低通（上采样回原尺寸）的等效高斯方差约为 2(4^k-1)/3（pyrDown与pyrUp各贡献一半）
+- 任意sigma的低通由相邻两层按方差线性插值得到
+- 细节频带 = 原图 - 低通
+- 金字塔按输入内容指纹缓存，只改变强度参数时无需重新分解
+"""
+
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from .cache import MemoryLRUCache, fingerprint_array
+
+_pyramid_cache = MemoryLRUCache('pyramid')
+
+
+def level_variance(level):
+    """第level层低通相对原图的等效高斯方差"""
+    return 2.0 * (4 ** level - 1) / 3.0
+
+
+def levels_for_sigma(sigma):
+    """覆盖指定sigma所需的金字塔层数"""
+    level = 0
+    while level_variance(level) < sigma * sigma:
+        level += 1
+    return level
+
+
+def pyramid_alignment(sigma):
+    """分块处理时图块原点需要对齐的像素数，保证各图块的降采样网格一致"""
+    return 2 ** levels_for_sigma(sigma)
+
+
+def pyramid_halo(sigma):
+    """分块处理所需的重叠边宽度：5抽头核在每层降采样和上采样中的传播半径，按对齐粒度取整"""
+    levels = levels_for_sigma(sigma)
+    radius = 4 * (2 ** levels - 1)
+    align = 2 ** levels
+    return int(math.ceil(radius / align)) * align
+
+
+class GaussianPyramid:
+    """
+    float32高斯金字塔，低通结果按层缓存
+
+    缓存的金字塔可能被多个批处理线程共享，低通层的延迟生成加锁；
+    设置 on_grow 后，每生成一层都会以新的总字节数回调，供缓存重新记账。
+    """
+
+    def __init__(self, image, levels, on_grow=None):
+        base = np.ascontiguousarray(image, dtype=np.float32)
+        # 最小层至少保留2像素
+        max_levels = max(0, int(math.log2(max(1, min(base.shape[:2]) // 2))))
+        self.levels = [base]
+        for _ in range(min(levels, max_levels)):
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+        self._lowpass = {0: base}
+        self._lock = threading.Lock()
+        self.on_grow = on_grow
+
+    @property
+    def image(self):
+        return self.levels[0]
+
+    def _nbytes(self):
+        return sum(level.nbytes for level in self.levels) + sum(
+            lowpass.nbytes for level, lowpass in self._lowpass.items() if level > 0)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return self._nbytes()
+
+    def lowpass_level(self, level):
+        """第level层上采样回原尺寸的低通图像"""
+        level = min(level, len(self.levels) - 1)
+        with self._lock:
+            lowpass = self._lowpass.get(level)
+            if lowpass is not None:
+                return lowpass
+            upsampled = self.levels[level]
+            for target in reversed(self.levels[:level]):
+                upsampled = cv2.pyrUp(upsampled, dstsize=(target.shape[1], target.shape[0]))
+            # OpenCV会丢弃单通道维度
+            lowpass = self._lowpass[level] = upsampled.reshape(self.image.shape)
+            nbytes = self._nbytes()
+        if self.on_grow is not None:
+            self.on_grow(nbytes)
+        return lowpass
+
+    def lowpass(self, sigma):
+        """近似任意sigma的高斯低通：相邻两层按方差插值"""
+        variance = sigma * sigma
+        upper = min(levels_for_sigma(sigma), len(self.levels) - 1)
+        if upper == 0:
+            return self.image
+        lower = upper - 1
+
+        low_var, high_var = level_variance(lower), level_variance(upper)
+        weight = min(1.0, (variance - low_var) / (high_var - low_var))
+        if weight >= 1.0:
+            return self.lowpass_level(upper)
+        return self.lowpass_level(lower) * (1.0 - weight) + self.lowpass_level(upper) * weight
+
+    def detail(self, sigma):
+        """细节频带：原图减去sigma尺度的低通"""
+        return self.image - self.lowpass(sigma)
+
+
+def get_pyramid(image, max_sigma, fingerprint=None):
+    """
+    获取图像的高斯金字塔，按内容指纹缓存（预算见配置 cache_memory_mb）
+
+    fingerprint 为调用方已知的输入标识（任意可哈希对象），省略时对图像内容哈希。
+    缓存按当前实际占用记账，之后每生成一层低通都会重新记账。
+    """
+    levels = levels_for_sigma(max_sigma)
+    if fingerprint is None:
+        fingerprint = fingerprint_array(image)
+    key = (fingerprint, levels)
+
+    pyramid = _pyramid_cache.get(key)
+    if pyramid is None:
+        pyramid = GaussianPyramid(image, levels, on_grow=lambda nbytes: _pyramid_cache.resize(key, nbytes))
+        _pyramid_cache.put(key, pyramid, pyramid.nbytes)
+    return pyramid
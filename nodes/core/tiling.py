@@ -0,0 +1,119 @@
+"""
+分块处理引擎
+
+超大图像（例如20k×20k扫描件）整帧处理时，节点内部的多个全尺寸中间数组会占用大量内存。
+分块引擎将单帧切成带重叠边（halo）的图块逐块处理，结果裁掉重叠边后写入预分配的输出：
+- 逐像素运算的节点 halo 为 0
+- 含空间滤波的节点 halo 取滤波器的影响半径（如高斯模糊约为 3~4 倍 sigma）
+- 图块大小由配置项 tile_memory_mb 决定，使单个图块的工作内存不超过该预算
+"""
+
+import math
+
+import numpy as np
+
+from .config import get_config
+
+
+def gaussian_halo(sigma):
+    """高斯滤波的影响半径（覆盖OpenCV浮点核的4倍sigma）"""
+    if sigma <= 0:
+        return 0
+    return int(math.ceil(4 * sigma)) + 1
+
+
+def get_tile_size(channels, halo=0, working_copies=8, memory_mb=None, itemsize=4, align=1):
+    """
+    根据内存预算计算图块边长（不含halo）
+
+    Args:
+        channels: 通道数
+        halo: 重叠边宽度
+        working_copies: 节点处理一个图块时同时存在的全尺寸数组个数（估计值）
+        memory_mb: 内存预算，默认读取配置 tile_memory_mb
+        itemsize: 每个元素的字节数
+        align: 图块边长取整到的倍数
+
+    Returns:
+        图块边长，预算<=0时返回0（表示不分块）
+    """
+    if memory_mb is None:
+        memory_mb = get_config('tile_memory_mb')
+    if not memory_mb or memory_mb <= 0:
+        return 0
+
+    budget_bytes = memory_mb * 1024 * 1024
+    bytes_per_pixel = channels * itemsize * max(1, working_copies)
+    side_with_halo = int(math.sqrt(budget_bytes / bytes_per_pixel))
+    # 图块至少要比halo大，否则重叠部分占比过高
+    tile_size = max(side_with_halo - 2 * halo, halo + 1, 64)
+    return int(math.ceil(tile_size / align)) * align
+
+
+def get_frame_chunk_size(frame_pixels, bytes_per_pixel, memory_mb=None):
+    """
+    根据内存预算计算批处理时每块的帧数
+
+    Args:
+        frame_pixels: 单帧像素数（H*W）
+        bytes_per_pixel: 处理时每个像素占用的工作内存字节数（所有中间数组之和）
+        memory_mb: 内存预算，默认读取配置 tile_memory_mb
+
+    Returns:
+        每块帧数（至少为1），预算<=0时返回0（表示整批一次处理）
+    """
+    if memory_mb is None:
+        memory_mb = get_config('tile_memory_mb')
+    if not memory_mb or memory_mb <= 0:
+        return 0
+
+    budget_bytes = memory_mb * 1024 * 1024
+    return max(1, int(budget_bytes // max(1, frame_pixels * bytes_per_pixel)))
+
+
+def process_tiled(image_np, tile_func, halo=0, working_copies=8, memory_mb=None, output=None, align=1):
+    """
+    分块处理单帧图像
+
+    Args:
+        image_np: 输入图像 numpy 数组 [H, W, C]
+        tile_func: 处理图块的函数 tile_func(tile_np) -> 形状相同的数组
+        halo: 重叠边宽度，取节点空间滤波的影响半径
+        working_copies: 节点内部同时存在的全尺寸数组个数（估计值）
+        memory_mb: 图块工作内存预算，默认读取配置 tile_memory_mb
+        output: 可选的预分配输出数组
+        align: 图块原点对齐的像素数（多尺度金字塔需要对齐降采样网格，halo也应为其倍数）
+
+    Returns:
+        处理后的图像 [H, W, C]
+    """
+    height, width, channels = image_np.shape
+    tile_size = get_tile_size(channels, halo, working_copies, memory_mb, image_np.dtype.itemsize, align)
+
+    # 整帧放得进预算时直接处理
+    if tile_size == 0 or (height <= tile_size and width <= tile_size):
+        result = tile_func(image_np)
+        if output is not None:
+            output[...] = result
+            return output
+        return result
+
+    if output is None:
+        output = np.empty((height, width, channels), dtype=np.float32)
+
+    tiles_y = math.ceil(height / tile_size)
+    tiles_x = math.ceil(width / tile_size)
+    print(f"[TILE] 分块处理 {width}x{height}，图块 {tile_size}px，halo {halo}px，共 {tiles_y * tiles_x} 块")
+
+    for y0 in range(0, height, tile_size):
+        y1 = min(y0 + tile_size, height)
+        src_y0, src_y1 = max(0, y0 - halo), min(height, y1 + halo)
+        for x0 in range(0, width, tile_size):
+            x1 = min(x0 + tile_size, width)
+            src_x0, src_x1 = max(0, x0 - halo), min(width, x1 + halo)
+
+            tile_result = tile_func(image_np[src_y0:src_y1, src_x0:src_x1])
+            # 裁掉halo后写入输出
+            output[y0:y1, x0:x1] = tile_result[y0 - src_y0:y1 - src_y0, x0 - src_x0:x1 - src_x0]
+
+    return output
@@ -17,6 +17,7 @@ import base64
 
 from ..core.base_node import BaseImageNode
 from ..core.mask_utils import apply_mask_to_image, blur_mask
+from ..core.tiling import process_tiled
 
 
 class GaussianBlurNode(BaseImageNode):
@@ -62,6 +63,7 @@ class GaussianBlurNode(BaseImageNode):
     FUNCTION = 'apply_gaussian_blur'
     CATEGORY = 'Image/Effects'
     OUTPUT_NODE = False
+    PARALLEL_BATCH = True
     
     def apply_gaussian_blur(self, image, blur_radius, mask=None, mask_blur=0.0, invert_mask=False, unique_id=None):
         """应用高斯模糊效果"""
@@ -108,24 +110,14 @@ class GaussianBlurNode(BaseImageNode):
             alpha_channel = img_np[:,:,3]
             img_np = img_np[:,:,:3]  # 只保留RGB通道
         
-        # 转换为适合OpenCV的格式 (H, W, C) -> (H, W, C) 0-255
-        img_uint8 = (img_np * 255).astype(np.uint8)
-        h, w, c = img_uint8.shape
-        
-        # 应用高斯模糊
-        if blur_radius > 0:
-            # 计算高斯核大小（必须是奇数）
-            kernel_size = int(blur_radius * 6) + 1
-            if kernel_size % 2 == 0:
-                kernel_size += 1
-            
-            # 对每个通道分别应用高斯模糊
-            blurred_img = cv2.GaussianBlur(img_uint8, (kernel_size, kernel_size), blur_radius)
-        else:
-            blurred_img = img_uint8.copy()
-        
-        # 转换回torch tensor
-        result_np = blurred_img.astype(np.float32) / 255.0
+        # 超大图像分块处理，halo取高斯核半径
+        kernel_size = self._get_kernel_size(blur_radius)
+        result_np = process_tiled(
+            img_np,
+            lambda tile: self._blur_array(tile, blur_radius, kernel_size),
+            halo=kernel_size // 2 + 1,
+            working_copies=4,
+        )
         
         # 如果原图有Alpha通道，添加回去
         if has_alpha:
@@ -139,4 +131,24 @@ class GaussianBlurNode(BaseImageNode):
                 mask = blur_mask(mask, mask_blur)
             result_tensor = apply_mask_to_image(image, result_tensor, mask, invert_mask)
         
-        return result_tensor
\ No newline at end of file
+        return result_tensor
+    
+    def _get_kernel_size(self, blur_radius):
+        """计算高斯核大小（必须是奇数）"""
+        kernel_size = int(blur_radius * 6) + 1
+        if kernel_size % 2 == 0:
+            kernel_size += 1
+        return kernel_size
+    
+    def _blur_array(self, img_np, blur_radius, kernel_size):
+        """对numpy图像应用高斯模糊，返回0-1范围的float32数组"""
+        # 转换为适合OpenCV的格式 (H, W, C) -> (H, W, C) 0-255
+        img_uint8 = (img_np * 255).astype(np.uint8)
+        
+        # 应用高斯模糊
+        if blur_radius > 0:
+            blurred_img = cv2.GaussianBlur(img_uint8, (kernel_size, kernel_size), blur_radius)
+        else:
+            blurred_img = img_uint8
+        
+        return blurred_img.astype(np.float32) / 255.0
@@ -7,8 +7,11 @@ Lightroom风格色彩分级节点
 - 混合和平衡控制
 - 多种混合模式
 - 遮罩支持
+- 批量参数扫描：一次执行输出多组滑块取值的变体
 """
 
+import functools
+
 import torch
 import numpy as np
 import cv2
@@ -17,18 +20,51 @@ import io
 import base64
 
 from ..core.base_node import BaseImageNode
-from ..core.mask_utils import apply_mask_to_image, blur_mask
+from ..core.mask_utils import prepare_batch_mask
+from ..core.tiling import get_frame_chunk_size
+from ..core.param_sweep import resolve_parameter_sweep, expand_sweep_batch
 from ..core.generic_preset_manager import GenericPresetManager
+from ..core.proxy import make_proxy
 
 # 创建Color Grading预设管理器实例
 color_grading_preset_manager = GenericPresetManager('color_grading')
 
+# 区域权重查找表的分辨率（按亮度0-1均匀采样）
+GRADING_LUT_SIZE = 4096
+_GRADING_LUT_GRID = np.linspace(0.0, 1.0, GRADING_LUT_SIZE)
+
+
+@functools.lru_cache(maxsize=64)
+def _build_grading_lut(*params):
+    """
+    按12个滑块取值（顺序同 ColorGradingNode._SWEEP_PARAMS）缓存单组色彩分级查找表
+
+    模块级缓存由所有节点实例共享，不持有节点实例。
+
+    Returns:
+        (alpha_lut [N], offset_lut [N, 3])，float32 tensor，调用方不得原地修改
+    """
+    alpha_lut, offset_lut = ColorGradingNode()._build_grading_lut_stack([params])
+    return alpha_lut[0], offset_lut[0]
+
 
 class ColorGradingNode(BaseImageNode):
     """
     Color Grading节点 - 实现Lightroom风格的色彩分级功能
     支持阴影、中间调、高光的独立色彩调整
     """
+    
+    # 感知亮度权重（Rec.601，与前端一致）
+    _GRAY_WEIGHTS = torch.tensor([0.299, 0.587, 0.114], dtype=torch.float32)
+    
+    # 可逐帧扫描的滑块，顺序与 _build_grading_lut 的参数一致
+    _SWEEP_PARAMS = (
+        'shadows_hue', 'shadows_saturation', 'shadows_luminance',
+        'midtones_hue', 'midtones_saturation', 'midtones_luminance',
+        'highlights_hue', 'highlights_saturation', 'highlights_luminance',
+        'blend', 'balance', 'overall_strength',
+    )
+    
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -159,6 +195,26 @@ class ColorGradingNode(BaseImageNode):
                     'default': False,
                     'tooltip': '反转遮罩区域'
                 }),
+                'mask_edge_refine': ('FLOAT', {
+                    'default': 0.0,
+                    'min': 0.0,
+                    'max': 32.0,
+                    'step': 1.0,
+                    'display': 'number',
+                    'tooltip': '遮罩边缘细化半径（导向滤波，以图像为引导使遮罩边缘贴合物体边缘），0为关闭；'
+                               '速度与质量由配置 guided_filter_subsample 控制'
+                }),
+                'proxy_mode': ('BOOLEAN', {
+                    'default': False,
+                    'tooltip': '代理模式：在缩小的副本上处理（长边见配置 proxy_long_edge），用于快速调参；'
+                               '输出为缩小后的分辨率，不放大回原尺寸，正式出图时关闭'
+                }),
+                'parameter_sweep': ('STRING', {
+                    'default': '',
+                    'multiline': True,
+                    'tooltip': '批量参数扫描（JSON），如 {"shadows_hue":[200,220,240],"shadows_saturation":[20,30,40]}，一次输出多个变体；'
+                               '可用参数：各区域的hue/saturation/luminance、blend、balance、overall_strength'
+                }),
             },
             'hidden': {'unique_id': 'UNIQUE_ID'}
         }
@@ -187,12 +243,32 @@ class ColorGradingNode(BaseImageNode):
                            highlights_hue=0.0, highlights_saturation=0.0, highlights_luminance=0.0,
                            blend=50.0, balance=0.0,
                            blend_mode='normal', overall_strength=1.0,
-                           mask=None, mask_blur=0.0, invert_mask=False, unique_id=None):
+                           mask=None, mask_blur=0.0, invert_mask=False, mask_edge_refine=0.0, proxy_mode=False,
+                           parameter_sweep='',
+                           unique_id=None):
         """
         应用色彩分级效果
         """
+        # 参数扫描：滑块为逐帧取值（或给出parameter_sweep）时，一次输出B个变体
+        try:
+            sweep_size, sweep = resolve_parameter_sweep(dict(zip(self._SWEEP_PARAMS, (
+                shadows_hue, shadows_saturation, shadows_luminance,
+                midtones_hue, midtones_saturation, midtones_luminance,
+                highlights_hue, highlights_saturation, highlights_luminance,
+                blend, balance, overall_strength,
+            ))), parameter_sweep)
+        except ValueError as e:
+            print(f"ColorGradingNode error: {e}")
+            return (image,)
+        
+        # 标量参数（扫描时为第一组参数，用于预览）
+        (shadows_hue, shadows_saturation, shadows_luminance,
+         midtones_hue, midtones_saturation, midtones_luminance,
+         highlights_hue, highlights_saturation, highlights_luminance,
+         blend, balance, overall_strength) = (float(sweep[key][0]) for key in self._SWEEP_PARAMS)
+        
         # 性能优化：如果所有参数都是默认值且没有遮罩，直接返回原图
-        if (shadows_hue == 0 and shadows_saturation == 0 and shadows_luminance == 0 and
+        if not sweep_size and (shadows_hue == 0 and shadows_saturation == 0 and shadows_luminance == 0 and
             midtones_hue == 0 and midtones_saturation == 0 and midtones_luminance == 0 and
             highlights_hue == 0 and highlights_saturation == 0 and highlights_luminance == 0 and
             blend == 50.0 and balance == 0.0 and blend_mode == 'normal' and overall_strength == 1.0 and
@@ -203,6 +279,12 @@ class ColorGradingNode(BaseImageNode):
             if image is None:
                 raise ValueError("Input image is None")
             
+            # 代理模式：在缩小的副本上处理，遮罩羽化半径按比例缩放
+            if proxy_mode:
+                image, mask, spatial_scale = make_proxy(image, mask)
+                mask_blur = mask_blur * spatial_scale
+                mask_edge_refine = mask_edge_refine * spatial_scale
+            
             # 发送预览数据到前端
             if unique_id is not None:
                 grading_data = {
@@ -216,22 +298,26 @@ class ColorGradingNode(BaseImageNode):
                 }
                 self._send_color_grading_preview(image, unique_id, mask, grading_data)
             
+            # 参数扫描：逐帧查找表栈，整批一次分级
+            if sweep_size:
+                image = expand_sweep_batch(image, sweep_size)
+                alpha_lut, offset_lut = self._build_grading_lut_stack(
+                    np.stack([sweep[key] for key in self._SWEEP_PARAMS], axis=1)
+                )
+                return (self._grade_batch(image, alpha_lut, offset_lut, blend_mode, mask, mask_blur, invert_mask,
+                                          mask_edge_refine),)
+            
             # 处理图像
             if len(image.shape) == 4:
-                # 自定义批处理，避免BaseImageNode错误地处理mask参数
-                batch_size = image.shape[0]
-                result = torch.zeros_like(image)
-                
-                for i in range(batch_size):
-                    result[i] = self._process_single_image(
-                        image[i],
-                        shadows_hue, shadows_saturation, shadows_luminance,
-                        midtones_hue, midtones_saturation, midtones_luminance,
-                        highlights_hue, highlights_saturation, highlights_luminance,
-                        blend, balance, blend_mode, overall_strength,
-                        mask, mask_blur, invert_mask
-                    )
-                
+                # 整批处理，避免BaseImageNode错误地处理mask参数
+                result = self._process_batch(
+                    image,
+                    shadows_hue, shadows_saturation, shadows_luminance,
+                    midtones_hue, midtones_saturation, midtones_luminance,
+                    highlights_hue, highlights_saturation, highlights_luminance,
+                    blend, balance, blend_mode, overall_strength,
+                    mask, mask_blur, invert_mask, mask_edge_refine
+                )
                 return (result,)
             else:
                 # 单张图像
@@ -241,7 +327,7 @@ class ColorGradingNode(BaseImageNode):
                     midtones_hue, midtones_saturation, midtones_luminance,
                     highlights_hue, highlights_saturation, highlights_luminance,
                     blend, balance, blend_mode, overall_strength,
-                    mask, mask_blur, invert_mask
+                    mask, mask_blur, invert_mask, mask_edge_refine
                 )
                 return (result,)
                 
@@ -315,22 +401,29 @@ class ColorGradingNode(BaseImageNode):
                              midtones_hue, midtones_saturation, midtones_luminance,
                              highlights_hue, highlights_saturation, highlights_luminance,
                              blend, balance, blend_mode, overall_strength,
-                             mask, mask_blur, invert_mask):
+                             mask, mask_blur, invert_mask, mask_edge_refine=0.0):
         """处理单张图像的色彩分级 - 使用更接近Lightroom的算法"""
-        device = image.device
-        
-        # 将图像转换为numpy数组，范围0-1（保持精度）
-        img_np = image.detach().cpu().numpy()
-        
-        # 处理Alpha通道
-        has_alpha = False
-        alpha_channel = None
-        
-        if img_np.shape[2] == 4:  # RGBA图像
-            has_alpha = True
-            alpha_channel = img_np[:,:,3]
-            img_np = img_np[:,:,:3]  # 只保留RGB通道
+        result = self._process_batch(
+            image.unsqueeze(0),
+            shadows_hue, shadows_saturation, shadows_luminance,
+            midtones_hue, midtones_saturation, midtones_luminance,
+            highlights_hue, highlights_saturation, highlights_luminance,
+            blend, balance, blend_mode, overall_strength,
+            mask, mask_blur, invert_mask, mask_edge_refine
+        )
+        return result[0]
+    
+    def _process_batch(self, image,
+                       shadows_hue, shadows_saturation, shadows_luminance,
+                       midtones_hue, midtones_saturation, midtones_luminance,
+                       highlights_hue, highlights_saturation, highlights_luminance,
+                       blend, balance, blend_mode, overall_strength,
+                       mask, mask_blur, invert_mask, mask_edge_refine=0.0):
+        """
+        整批色彩分级：查表、混合模式与遮罩混合直接在 [B, H, W, C] 上完成
         
+        查找表只构建一次，遮罩只羽化一次；批次按 tile_memory_mb 分块，限制中间结果的内存占用。
+        """
         # 检查是否有实际的调整（包括所有影响参数）
         has_adjustment = (shadows_hue != 0 or shadows_saturation != 0 or shadows_luminance != 0 or
                          midtones_hue != 0 or midtones_saturation != 0 or midtones_luminance != 0 or
@@ -342,127 +435,183 @@ class ColorGradingNode(BaseImageNode):
             return image
         
         # 直接在RGB空间工作，完全匹配前端算法
-        # 转换为RGB numpy数组
-        img_rgb = img_np.copy()
-        
-        # 使用感知亮度创建遮罩
-        luminance = img_rgb[:,:,0] * 0.299 + img_rgb[:,:,1] * 0.587 + img_rgb[:,:,2] * 0.114
+        # 区域权重与各区域调整预先折叠为按亮度索引的查找表，逐像素只做一次查表和仿射混合
+        alpha_lut, offset_lut = _build_grading_lut(
+            shadows_hue, shadows_saturation, shadows_luminance,
+            midtones_hue, midtones_saturation, midtones_luminance,
+            highlights_hue, highlights_saturation, highlights_luminance,
+            blend, balance, overall_strength
+        )
+        return self._grade_batch(image, alpha_lut, offset_lut, blend_mode, mask, mask_blur, invert_mask,
+                                 mask_edge_refine)
+    
+    def _grade_batch(self, image, alpha_lut, offset_lut, blend_mode, mask, mask_blur, invert_mask,
+                     mask_edge_refine=0.0):
+        """
+        在 [B, H, W, C] 上查表分级、应用混合模式与遮罩
         
-        # 创建改进的亮度遮罩
-        shadows_mask = self._create_improved_luminance_mask(luminance, 'shadows', balance)
-        midtones_mask = self._create_improved_luminance_mask(luminance, 'midtones', balance)
-        highlights_mask = self._create_improved_luminance_mask(luminance, 'highlights', balance)
+        alpha_lut / offset_lut 为 [N] / [N, 3]（所有帧共用），或 [B, N] / [B, N, 3]（逐帧，参数扫描）。
+        """
+        batch_size, height, width, channels = image.shape
+        per_frame = alpha_lut.dim() == 2
         
-        # 初始化RGB增量
-        delta_r = np.zeros_like(img_rgb[:,:,0])
-        delta_g = np.zeros_like(img_rgb[:,:,0])
-        delta_b = np.zeros_like(img_rgb[:,:,0])
+        # 准备遮罩（整批只羽化一次）
+        masks = None
+        if mask is not None:
+            # 确保mask是tensor
+            if not isinstance(mask, torch.Tensor):
+                mask = torch.from_numpy(mask)
+            masks = prepare_batch_mask(mask, batch_size, height, width, mask_blur, invert_mask,
+                                       guide=image, refine_radius=mask_edge_refine)
+            if masks is None:
+                return image
+            masks = masks.to(image.device)
         
-        # 处理每个区域（完全模拟前端算法）
-        regions = [
-            (shadows_mask, shadows_hue, shadows_saturation, shadows_luminance),
-            (midtones_mask, midtones_hue, midtones_saturation, midtones_luminance),
-            (highlights_mask, highlights_hue, highlights_saturation, highlights_luminance)
-        ]
+        result = torch.empty(image.shape, dtype=torch.float32, device=image.device)
+        # 每像素工作内存：结果与混合模式临时量约4份全通道，外加亮度、索引(int64)和查表结果
+        chunk = get_frame_chunk_size(height * width, 4 * channels * 4 + 4 + 8 + 4 + 12) or batch_size
         
-        for region_mask, hue, sat, lum in regions:
+        for start in range(0, batch_size, chunk):
+            end = min(start + chunk, batch_size)
+            frames = image[start:end].detach().to(torch.float32)
             
-            if hue != 0 or sat != 0:
-                # 计算强度（包含overall_strength）
-                strength = region_mask * overall_strength
-                
-                if sat >= 0:
-                    # 正饱和度：添加颜色
-                    hue_rad = np.deg2rad(hue)
-                    sat_normalized = sat / 100.0
-                    
-                    # 模拟前端的Lab偏移计算（增强到匹配Lightroom强度）
-                    max_offset = 0.7
-                    offset_a = np.cos(hue_rad) * sat_normalized * max_offset
-                    offset_b = np.sin(hue_rad) * sat_normalized * max_offset
-                    
-                    # 应用颜色敏感度调整（完全匹配前端）
-                    # 将负角度转换为正角度
-                    hue_normalized = hue % 360
-                    
-                    if (hue_normalized >= 330) or (hue_normalized <= 30):  # 红色区域 (330-360, 0-30)
-                        offset_a *= 1.1
-                    elif 150 <= hue_normalized <= 210:  # 青色区域
-                        offset_a *= 0.9
-                    elif 60 <= hue_normalized <= 120:  # 绿色区域
-                        offset_b *= 0.95
-                    elif 240 <= hue_normalized <= 300:  # 蓝色区域
-                        offset_b *= 1.05
-                    
-                    # 将Lab偏移转换为RGB调整（完全匹配前端的权重）
-                    delta_r_contrib = (offset_a * 0.6 + offset_b * 0.3) * strength
-                    delta_g_contrib = (-offset_a * 0.5 + offset_b * 0.2) * strength
-                    delta_b_contrib = (-offset_a * 0.1 - offset_b * 0.8) * strength
-                    
-                    delta_r += delta_r_contrib
-                    delta_g += delta_g_contrib
-                    delta_b += delta_b_contrib
-                    
-                else:
-                    # 负饱和度：朝向灰度混合
-                    desat_strength = abs(sat) / 100.0 * strength
-                    
-                    # 计算灰度值
-                    gray = img_rgb[:,:,0] * 0.299 + img_rgb[:,:,1] * 0.587 + img_rgb[:,:,2] * 0.114
-                    
-                    # 朝向灰度混合
-                    delta_r += (gray - img_rgb[:,:,0]) * desat_strength
-                    delta_g += (gray - img_rgb[:,:,1]) * desat_strength
-                    delta_b += (gray - img_rgb[:,:,2]) * desat_strength
+            if per_frame:
+                graded = self._apply_grading_lut(frames[..., :3], alpha_lut[start:end], offset_lut[start:end])
+            else:
+                graded = self._apply_grading_lut(frames[..., :3], alpha_lut, offset_lut)
+            
+            # 恢复Alpha通道
+            if channels == 4:
+                graded = torch.cat([graded, frames[..., 3:]], dim=-1)
+            
+            # 应用混合模式
+            if blend_mode != 'normal':
+                graded = self._apply_blend_mode(frames, graded, blend_mode)
             
-            # 亮度调整
-            if lum != 0:
-                lum_factor = lum / 100.0 * region_mask * overall_strength
-                lum_adjust = lum_factor * 0.2  # 降低强度以获得更自然的效果
-                delta_r += lum_adjust
-                delta_g += lum_adjust
-                delta_b += lum_adjust
+            # 应用遮罩：遮罩为1处取分级结果，为0处保留原图
+            if masks is not None:
+                frame_masks = masks[start:end] if masks.shape[0] > 1 else masks
+                graded = torch.lerp(frames, graded, frame_masks)
+            
+            result[start:end] = graded
         
-        # 应用调整（不裁剪，允许负值和超过1的值）
-        result_rgb = np.zeros_like(img_rgb)
-        result_rgb[:,:,0] = img_rgb[:,:,0] + delta_r
-        result_rgb[:,:,1] = img_rgb[:,:,1] + delta_g
-        result_rgb[:,:,2] = img_rgb[:,:,2] + delta_b
+        return result
+    
+    def _build_grading_lut_stack(self, params):
+        """
+        按B组参数构建色彩分级查找表栈，每行参数的顺序同 _SWEEP_PARAMS
         
-        # 应用blend参数
-        if blend < 100.0:
-            blend_factor = blend / 100.0
-            result_rgb = img_rgb * (1.0 - blend_factor) + result_rgb * blend_factor
+        每个区域的调整写成仿射形式 delta_k = a_k * D @ rgb + b_k，
+        其中 D @ rgb = gray - rgb 为去饱和矩阵（负饱和度），b_k 为颜色偏移与明度偏移。
+        所有区域的矩阵都是 D 的倍数，按区域权重混合后逐像素的结果为：
+            result = rgb + alpha(L) * (L - rgb) + offset(L)
+        alpha(L) = Σ w_k(L) * a_k，offset(L) = Σ w_k(L) * b_k，blend 与 overall_strength 一并折叠进表中。
         
-        # 在最后才裁剪到有效范围
-        result_rgb = np.clip(result_rgb, 0, 1)
+        区域权重曲线由 [B, 1] 的 balance 与亮度采样点广播一次算出，各区域的仿射系数每组只是几个标量。
         
-        # 转换为tensor
-        result = torch.from_numpy(result_rgb.astype(np.float32)).to(device)
+        Returns:
+            (alpha_lut [B, N], offset_lut [B, N, 3])，float32 tensor
+        """
+        params = np.asarray(params, dtype=np.float64).reshape(-1, len(self._SWEEP_PARAMS))
+        batch_size = params.shape[0]
+        blend, balance, overall_strength = params[:, 9], params[:, 10], params[:, 11]
         
-        # 恢复Alpha通道
-        if has_alpha:
-            alpha_tensor = torch.from_numpy(alpha_channel).to(device).unsqueeze(-1)
-            result = torch.cat([result, alpha_tensor], dim=-1)
+        # blend < 100 时 result = rgb + blend_factor * delta
+        blend_factor = np.where(blend < 100.0, blend / 100.0, 1.0)
+        scale = (overall_strength * blend_factor)[:, np.newaxis]
         
-        # 应用混合模式
-        if blend_mode != 'normal':
-            result = self._apply_blend_mode(image, result, blend_mode)
+        alpha_lut = np.zeros((batch_size, GRADING_LUT_SIZE), dtype=np.float64)
+        offset_lut = np.zeros((batch_size, GRADING_LUT_SIZE, 3), dtype=np.float64)
+        for index, region in enumerate(('shadows', 'midtones', 'highlights')):
+            affine = [self._region_affine(*row[3 * index:3 * index + 3]) for row in params]
+            desaturate = np.array([a for a, _ in affine])
+            offset = np.stack([b for _, b in affine])
+            if not desaturate.any() and not offset.any():
+                continue
+            weight = self._create_improved_luminance_mask(
+                _GRADING_LUT_GRID[np.newaxis, :], region, balance[:, np.newaxis]
+            ) * scale
+            alpha_lut += weight * desaturate[:, np.newaxis]
+            offset_lut += weight[..., np.newaxis] * offset[:, np.newaxis, :]
         
-        # 应用遮罩
-        if mask is not None:
-            # 确保mask是tensor
-            if not isinstance(mask, torch.Tensor):
-                mask = torch.from_numpy(mask).to(device)
-            
-            # 应用遮罩模糊
-            if mask_blur > 0:
-                mask = blur_mask(mask, mask_blur)
-            
-            # 应用遮罩到图像
-            result = apply_mask_to_image(image, result, mask, invert_mask)
+        return (torch.from_numpy(alpha_lut.astype(np.float32)),
+                torch.from_numpy(offset_lut.astype(np.float32)))
+    
+    def _region_affine(self, hue, sat, lum):
+        """
+        单个区域在单位强度下的仿射调整 (去饱和系数 a, RGB偏移 b)，完全模拟前端算法
+        """
+        desaturate = 0.0
+        offset = np.zeros(3, dtype=np.float64)
         
-        return result
+        if hue != 0 or sat != 0:
+            if sat >= 0:
+                # 正饱和度：添加颜色
+                hue_rad = np.deg2rad(hue)
+                sat_normalized = sat / 100.0
+                
+                # 模拟前端的Lab偏移计算（增强到匹配Lightroom强度）
+                max_offset = 0.7
+                offset_a = np.cos(hue_rad) * sat_normalized * max_offset
+                offset_b = np.sin(hue_rad) * sat_normalized * max_offset
+                
+                # 应用颜色敏感度调整（完全匹配前端）
+                # 将负角度转换为正角度
+                hue_normalized = hue % 360
+                
+                if (hue_normalized >= 330) or (hue_normalized <= 30):  # 红色区域 (330-360, 0-30)
+                    offset_a *= 1.1
+                elif 150 <= hue_normalized <= 210:  # 青色区域
+                    offset_a *= 0.9
+                elif 60 <= hue_normalized <= 120:  # 绿色区域
+                    offset_b *= 0.95
+                elif 240 <= hue_normalized <= 300:  # 蓝色区域
+                    offset_b *= 1.05
+                
+                # 将Lab偏移转换为RGB调整（完全匹配前端的权重）
+                offset += [
+                    offset_a * 0.6 + offset_b * 0.3,
+                    -offset_a * 0.5 + offset_b * 0.2,
+                    -offset_a * 0.1 - offset_b * 0.8,
+                ]
+            else:
+                # 负饱和度：朝向灰度混合
+                desaturate = abs(sat) / 100.0
+        
+        # 亮度调整（降低强度以获得更自然的效果）
+        if lum != 0:
+            offset += lum / 100.0 * 0.2
+        
+        return desaturate, offset
+    
+    def _apply_grading_lut(self, image_rgb, alpha_lut, offset_lut):
+        """
+        按亮度查表并做仿射混合：result = rgb + alpha(L) * (L - rgb) + offset(L)，结果裁剪到0-1
+        
+        image_rgb: [..., 3] float32 tensor，支持任意前导维度
+        alpha_lut / offset_lut 为 [B, N] / [B, N, 3] 的查找表栈时，image_rgb 的第一维与帧对应，
+        各帧索引加上所在表的偏移后在展平表中一次取值
+        """
+        alpha_lut = alpha_lut.to(image_rgb.device)
+        offset_lut = offset_lut.to(image_rgb.device)
+        size = alpha_lut.shape[-1]
+        
+        # 感知亮度（与区域遮罩一致）
+        luminance = torch.matmul(image_rgb, self._GRAY_WEIGHTS.to(image_rgb.device))
+        index = (luminance * (size - 1) + 0.5).clamp_(0, size - 1).long()
+        if alpha_lut.dim() == 2:
+            index += (torch.arange(alpha_lut.shape[0], device=index.device) * size).reshape(
+                (-1,) + (1,) * (index.dim() - 1))
+            alpha_lut = alpha_lut.reshape(-1)
+            offset_lut = offset_lut.reshape(-1, 3)
+        
+        # 去饱和混合 rgb + alpha * (L - rgb)，再叠加颜色/明度偏移
+        result = torch.lerp(image_rgb, luminance.unsqueeze(-1).expand_as(image_rgb),
+                            alpha_lut[index].unsqueeze(-1))
+        result += offset_lut[index]
+        
+        # 在最后才裁剪到有效范围
+        return result.clamp_(0, 1)
     
     def _create_improved_luminance_mask(self, luminance, region, balance):
         """创建改进的亮度遮罩 - 完全匹配前端的Sigmoid算法"""
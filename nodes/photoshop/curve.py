@@ -8,6 +8,9 @@ Photoshop风格曲线调整节点
 - 实时预览功能
 """
 
+import functools
+import json
+
 import torch
 import numpy as np
 from PIL import Image
@@ -16,7 +19,18 @@ import base64
 
 from ..core.base_node import BaseImageNode
 from ..core.mask_utils import apply_mask_to_image, blur_mask
-from ..core.preset_manager import preset_manager
+from ..core.histogram import batched_histogram
+from ..core.keyframes import parse_keyframes, build_lut_stack, interpolate_keyframe_param, apply_lut_stack
+
+
+@functools.lru_cache(maxsize=128)
+def _build_channel_luts(rgb_curve, red_curve, green_curve, blue_curve, curve_type):
+    """
+    按曲线参数缓存RGB曲线与各通道曲线复合后的 [3, 256] 查找表（取值0-1）
+
+    模块级缓存由所有节点实例共享，不持有节点实例。返回只读数组。
+    """
+    return PhotoshopCurveNode()._compose_channel_luts(rgb_curve, red_curve, green_curve, blue_curve, curve_type)
 
 
 class PhotoshopCurveNode(BaseImageNode):
@@ -85,6 +99,12 @@ class PhotoshopCurveNode(BaseImageNode):
                     'default': False,
                     'tooltip': '反转遮罩区域'
                 }),
+                'keyframes': ('STRING', {
+                    'default': '',
+                    'multiline': True,
+                    'tooltip': '批次关键帧（JSON），如 [{"frame":0,"rgb_curve":"[[0,0],[255,255]]"},{"frame":59,"rgb_curve":"[[0,0],[128,90],[255,255]]","strength":80}]，'
+                               '可用参数：rgb_curve/red_curve/green_curve/blue_curve/strength，帧间曲线线性插值'
+                }),
             },
             'hidden': {
                 'unique_id': 'UNIQUE_ID'
@@ -101,7 +121,7 @@ class PhotoshopCurveNode(BaseImageNode):
                                red_curve='[[0,0],[255,255]]', green_curve='[[0,0],[255,255]]', 
                                blue_curve='[[0,0],[255,255]]', curve_type='cubic', strength=100.0,
                                preset_curve_points=None, preset_suggested_channel=None,
-                               mask=None, mask_blur=0.0, invert_mask=False, unique_id=None, **kwargs):
+                               mask=None, mask_blur=0.0, invert_mask=False, keyframes='', unique_id=None, **kwargs):
         """应用曲线调整"""
         
         try:
@@ -152,6 +172,34 @@ class PhotoshopCurveNode(BaseImageNode):
             if unique_id is not None:
                 self.send_preview_to_frontend(image, unique_id, "photoshop_curve_preview", mask)
             
+            # 关键帧动画：逐帧LUT栈一次性作用于整个批次
+            keyframe_list = []
+            processed_image = None
+            if len(image.shape) == 4:
+                try:
+                    keyframe_list = parse_keyframes(keyframes, {
+                        'rgb_curve': rgb_curve, 'red_curve': red_curve, 'green_curve': green_curve,
+                        'blue_curve': blue_curve, 'strength': strength,
+                    })
+                    if keyframe_list:
+                        processed_image = self._process_keyframed_batch(
+                            image, keyframe_list, curve_type, mask, mask_blur, invert_mask
+                        )
+                except (TypeError, ValueError, KeyError) as e:
+                    # 关键帧或其参数取值无效时回退到静态曲线
+                    print(f"⚠️ 关键帧无效，使用静态曲线: {e}")
+            
+            if processed_image is not None:
+                # 图表显示第一个关键帧的曲线
+                first_params = keyframe_list[0][1]
+                curve_chart = self._generate_curve_chart(
+                    processed_image[0], first_params['rgb_curve'], first_params['red_curve'],
+                    first_params['green_curve'], first_params['blue_curve'], curve_type
+                )
+                if len(curve_chart.shape) == 3:
+                    curve_chart = curve_chart.unsqueeze(0)
+                return (processed_image, curve_chart)
+            
             # 支持批处理
             if len(image.shape) == 4:
                 processed_image = self.process_batch_images(
@@ -269,6 +317,62 @@ class PhotoshopCurveNode(BaseImageNode):
         
         return result
     
+    def _process_keyframed_batch(self, image, keyframe_list, curve_type, mask, mask_blur, invert_mask):
+        """按关键帧处理整个批次：构建 [B, 3, 256] 的LUT栈并一次性查表"""
+        batch_size = image.shape[0]
+        print(f"🎬 曲线关键帧: {len(keyframe_list)} 个，批次 {batch_size} 帧")
+        
+        lut_stack = build_lut_stack(
+            keyframe_list, batch_size,
+            lambda params: _build_channel_luts(
+                self._curve_key(params['rgb_curve']), self._curve_key(params['red_curve']),
+                self._curve_key(params['green_curve']), self._curve_key(params['blue_curve']), curve_type
+            )
+        )
+        
+        # 只映射RGB通道，其余通道（如alpha）保持不变
+        result = image.clone()
+        result[..., :3] = apply_lut_stack(image[..., :3], lut_stack)
+        
+        # 逐帧强度混合
+        strength_ratio = torch.from_numpy(
+            interpolate_keyframe_param(keyframe_list, batch_size, 'strength') / 100.0
+        ).to(image.device).reshape(-1, 1, 1, 1)
+        result = image * (1.0 - strength_ratio) + result * strength_ratio
+        
+        # 应用遮罩
+        if mask is not None:
+            for i in range(batch_size):
+                frame_mask = self._select_batch_mask(mask, i, batch_size)
+                if mask_blur > 0:
+                    frame_mask = blur_mask(frame_mask, mask_blur)
+                result[i] = apply_mask_to_image(image[i], result[i], frame_mask, invert_mask)
+        
+        return result
+    
+    def _curve_key(self, curve):
+        """将曲线参数（JSON字符串或点列表）规范化为可哈希的JSON字符串"""
+        return curve if isinstance(curve, str) else json.dumps(curve)
+    
+    def _compose_channel_luts(self, rgb_curve, red_curve, green_curve, blue_curve, curve_type):
+        """
+        构建RGB曲线与各通道曲线复合后的 [3, 256] 查找表（取值0-1）
+        
+        与逐帧路径一致：先应用RGB曲线，再应用各通道曲线。不缓存，经模块级 _build_channel_luts 调用，返回只读数组。
+        """
+        curves = []
+        for curve in (rgb_curve, red_curve, green_curve, blue_curve):
+            try:
+                curves.append(json.loads(curve))
+            except Exception:
+                curves.append([[0, 0], [255, 255]])
+        
+        rgb_lut = self._create_lut(curves[0], curve_type)
+        luts = np.stack([self._create_lut(points, curve_type)[rgb_lut] for points in curves[1:]])
+        luts = luts.astype(np.float32) / 255.0
+        luts.flags.writeable = False
+        return luts
+    
     def _is_identity_curve(self, points):
         """检查是否为恒等曲线"""
         if len(points) != 2:
@@ -374,14 +478,15 @@ class PhotoshopCurveNode(BaseImageNode):
         # 计算处理后图像的直方图
         img_np = (image.detach().cpu().numpy() * 255.0).astype(np.uint8)
         
-        # 计算RGB通道直方图
-        hist_r, _ = np.histogram(img_np[:,:,0], bins=256, range=(0, 256))
-        hist_g, _ = np.histogram(img_np[:,:,1], bins=256, range=(0, 256))
-        hist_b, _ = np.histogram(img_np[:,:,2], bins=256, range=(0, 256))
-        
-        # 计算亮度直方图
+        # 计算亮度
         luminance = (0.299 * img_np[:,:,0] + 0.587 * img_np[:,:,1] + 0.114 * img_np[:,:,2]).astype(np.uint8)
-        hist_lum, _ = np.histogram(luminance, bins=256, range=(0, 256))
+        
+        # RGB与亮度直方图一次计算
+        hists = batched_histogram(
+            np.concatenate([img_np[:,:,:3], luminance[:,:,np.newaxis]], axis=2)[np.newaxis],
+            bins=256, value_range=(0, 256)
+        )[0]
+        hist_r, hist_g, hist_b, hist_lum = hists
         
         # 归一化直方图到0-255范围
         max_val = max(hist_r.max(), hist_g.max(), hist_b.max())
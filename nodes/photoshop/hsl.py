@@ -17,203 +17,10 @@ import base64
 
 from ..core.base_node import BaseImageNode
 from ..core.mask_utils import apply_mask_to_image, blur_mask
-import json
-import uuid
-from datetime import datetime
-from pathlib import Path
+from ..core.generic_preset_manager import GenericPresetManager
 
-try:
-    from server import PromptServer
-    from aiohttp import web
-    import aiofiles
-    
-    # 简单的HSL预设管理器
-    class HSLPresetManager:
-        def __init__(self):
-            self.preset_dir = Path(__file__).parent.parent.parent / "presets" / "hsl"
-            self.user_dir = self.preset_dir / "user"
-            self.default_dir = self.preset_dir / "default"
-            self.shared_dir = self.preset_dir / "shared"
-            
-            # 确保目录存在
-            for dir_path in [self.user_dir, self.default_dir, self.shared_dir]:
-                dir_path.mkdir(parents=True, exist_ok=True)
-            
-            self._setup_routes()
-        
-        def _setup_routes(self):
-            """设置API路由"""
-            if not PromptServer or not hasattr(PromptServer, 'instance') or not PromptServer.instance:
-                return
-                
-            routes = PromptServer.instance.routes
-            
-            @routes.get("/hsl_presets/list")
-            async def list_presets(request):
-                try:
-                    presets = []
-                    
-                    # 扫描所有预设目录
-                    for preset_type, dir_path in [
-                        ('default', self.default_dir),
-                        ('user', self.user_dir),
-                        ('shared', self.shared_dir)
-                    ]:
-                        if dir_path.exists():
-                            for file_path in dir_path.glob("*.json"):
-                                try:
-                                    async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                                        content = await f.read()
-                                        preset_data = json.loads(content)
-                                        preset_data['type'] = preset_type
-                                        preset_data['file_name'] = file_path.name
-                                        presets.append(preset_data)
-                                except Exception as e:
-                                    print(f"Error loading preset {file_path}: {e}")
-                    
-                    # 按创建时间排序
-                    presets.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-                    
-                    return web.json_response({"success": True, "presets": presets})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-            
-            @routes.post("/hsl_presets/save")
-            async def save_preset(request):
-                try:
-                    data = await request.json()
-                    preset_id = data.get('id', str(uuid.uuid4()))
-                    preset_type = data.get('type', 'user')
-                    
-                    # 构建预设数据
-                    preset_data = {
-                        'id': preset_id,
-                        'name': data.get('name', 'Untitled Preset'),
-                        'description': data.get('description', ''),
-                        'category': data.get('category', 'custom'),
-                        'created_at': datetime.now().isoformat(),
-                        'author': data.get('author', 'Anonymous'),
-                        'version': '1.0',
-                        'node_type': 'hsl',
-                        'parameters': data.get('parameters', {}),
-                        'metadata': {
-                            'tags': data.get('tags', []),
-                            'thumbnail': data.get('thumbnail', '')
-                        }
-                    }
-                    
-                    # 确定保存目录
-                    save_dir = self.user_dir if preset_type == 'user' else self.shared_dir
-                    file_path = save_dir / f"{preset_id}.json"
-                    
-                    # 保存文件
-                    async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                        await f.write(json.dumps(preset_data, indent=2, ensure_ascii=False))
-                    
-                    return web.json_response({"success": True, "id": preset_id, "message": "预设保存成功"})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-            
-            @routes.get("/hsl_presets/load/{preset_id}")
-            async def load_preset(request):
-                try:
-                    preset_id = request.match_info['preset_id']
-                    
-                    # 在所有目录中查找预设
-                    for dir_path in [self.default_dir, self.user_dir, self.shared_dir]:
-                        file_path = dir_path / f"{preset_id}.json"
-                        if file_path.exists():
-                            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                                content = await f.read()
-                                preset_data = json.loads(content)
-                                return web.json_response({"success": True, "preset": preset_data})
-                    
-                    return web.json_response({"success": False, "error": "预设未找到"})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-            
-            @routes.delete("/hsl_presets/delete/{preset_id}")
-            async def delete_preset(request):
-                try:
-                    preset_id = request.match_info['preset_id']
-                    
-                    # 只允许删除用户预设
-                    file_path = self.user_dir / f"{preset_id}.json"
-                    if file_path.exists():
-                        file_path.unlink()
-                        return web.json_response({"success": True, "message": "预设删除成功"})
-                    
-                    return web.json_response({"success": False, "error": "预设未找到或无权删除"})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-            
-            @routes.get("/hsl_presets/export/{preset_id}")
-            async def export_preset(request):
-                try:
-                    preset_id = request.match_info['preset_id']
-                    
-                    # 在所有目录中查找预设
-                    for dir_path in [self.default_dir, self.user_dir, self.shared_dir]:
-                        file_path = dir_path / f"{preset_id}.json"
-                        if file_path.exists():
-                            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                                content = await f.read()
-                                preset_data = json.loads(content)
-                                
-                                # 添加导出信息
-                                preset_data['exported_at'] = datetime.now().isoformat()
-                                preset_data['exported_from'] = 'ComfyUI-HSL'
-                                
-                                return web.json_response({
-                                    "success": True,
-                                    "preset": preset_data,
-                                    "filename": f"{preset_data['name'].replace(' ', '_')}_hsl_preset.json"
-                                })
-                    
-                    return web.json_response({"success": False, "error": "预设未找到"})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-            
-            @routes.post("/hsl_presets/import")
-            async def import_preset(request):
-                try:
-                    data = await request.json()
-                    preset_data = data.get('preset_data')
-                    
-                    if not preset_data:
-                        return web.json_response({"success": False, "error": "无效的预设数据"})
-                    
-                    # 验证预设类型
-                    if preset_data.get('node_type') != 'hsl':
-                        return web.json_response({"success": False, "error": "预设类型不匹配，需要hsl类型"})
-                    
-                    # 生成新ID
-                    preset_id = str(uuid.uuid4())
-                    preset_data['id'] = preset_id
-                    preset_data['imported_at'] = datetime.now().isoformat()
-                    preset_data['type'] = 'user'  # 导入的预设总是用户预设
-                    
-                    # 保存到用户目录
-                    file_path = self.user_dir / f"{preset_id}.json"
-                    async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                        await f.write(json.dumps(preset_data, indent=2, ensure_ascii=False))
-                    
-                    return web.json_response({"success": True, "id": preset_id, "message": "预设导入成功"})
-                
-                except Exception as e:
-                    return web.json_response({"success": False, "error": str(e)})
-    
-    # 创建HSL预设管理器实例
-    hsl_preset_manager = HSLPresetManager()
-    
-except ImportError:
-    print("⚠️ 警告: 无法导入预设管理依赖，预设功能将不可用")
-    hsl_preset_manager = None
+# 创建HSL预设管理器实例
+hsl_preset_manager = GenericPresetManager('hsl')
 
 
 class PhotoshopHSLNode(BaseImageNode):
@@ -518,6 +325,7 @@ class PhotoshopHSLNode(BaseImageNode):
     FUNCTION = 'apply_hsl_adjustment'
     CATEGORY = 'Image/Adjustments'
     OUTPUT_NODE = False
+    PARALLEL_BATCH = True
     
     @classmethod
     def IS_CHANGED(cls, image, 
@@ -585,6 +393,20 @@ class PhotoshopHSLNode(BaseImageNode):
             mask_blur = kwargs.get('mask_blur', 0.0)
             invert_mask = kwargs.get('invert_mask', False)
             
+            # 彩色化且无分色调整、无遮罩时，整个批次一次计算
+            has_color_adjustment = any(v != 0 for v in (
+                red_hue, red_saturation, red_lightness,
+                orange_hue, orange_saturation, orange_lightness,
+                yellow_hue, yellow_saturation, yellow_lightness,
+                green_hue, green_saturation, green_lightness,
+                cyan_hue, cyan_saturation, cyan_lightness,
+                blue_hue, blue_saturation, blue_lightness,
+                purple_hue, purple_saturation, purple_lightness,
+                magenta_hue, magenta_saturation, magenta_lightness,
+            ))
+            if colorize and not has_color_adjustment and mask is None:
+                return (self._colorize_from_luminance(image, hue, saturation, lightness),)
+            
             # 支持批处理
             if len(image.shape) == 4:
                 return (self.process_batch_images(
@@ -636,7 +458,55 @@ class PhotoshopHSLNode(BaseImageNode):
                              mask, mask_blur, invert_mask):
         """处理单张图像的HSL调整"""
         
-        # 确保图像在正确的设备上
+        # 按照颜色顺序应用各个颜色范围的调整
+        color_adjustments = [
+            ('red', red_hue, red_saturation, red_lightness),
+            ('orange', orange_hue, orange_saturation, orange_lightness),
+            ('yellow', yellow_hue, yellow_saturation, yellow_lightness),
+            ('green', green_hue, green_saturation, green_lightness),
+            ('cyan', cyan_hue, cyan_saturation, cyan_lightness),
+            ('blue', blue_hue, blue_saturation, blue_lightness),
+            ('purple', purple_hue, purple_saturation, purple_lightness),
+            ('magenta', magenta_hue, magenta_saturation, magenta_lightness),
+        ]
+        has_color_adjustment = any(
+            hue_shift != 0 or sat_shift != 0 or light_shift != 0
+            for _, hue_shift, sat_shift, light_shift in color_adjustments
+        )
+        
+        # 预先检查是否需要处理 - 性能优化
+        needs_processing = (
+            has_color_adjustment or
+            hue != 0 or saturation != 0 or lightness != 0 or colorize
+        )
+        
+        print(f"HSL调试 - 需要处理: {needs_processing}, 有遮罩: {mask is not None}")
+        
+        if not needs_processing and mask is None:
+            # 如果没有任何调整且没有遮罩，直接返回原图
+            print("HSL调试 - 跳过处理，返回原图")
+            return image
+        
+        if colorize and not has_color_adjustment:
+            # 彩色化且无分色调整：直接在float图像上计算，跳过HSV转换
+            result = self._colorize_from_luminance(image, hue, saturation, lightness)
+        else:
+            result = self._process_hsv_adjustments(
+                image, color_adjustments, hue, saturation, lightness, colorize
+            )
+        
+        # 应用遮罩
+        if mask is not None:
+            # 处理遮罩模糊
+            if mask_blur > 0:
+                mask = blur_mask(mask, mask_blur)
+            
+            result = apply_mask_to_image(image, result, mask, invert_mask)
+        
+        return result
+    
+    def _process_hsv_adjustments(self, image, color_adjustments, hue, saturation, lightness, colorize):
+        """在OpenCV HSV空间中应用分色调整和全局调整"""
         device = image.device
         
         # 将图像转换为numpy数组，范围0-255
@@ -656,26 +526,6 @@ class PhotoshopHSLNode(BaseImageNode):
         # 转换为HSV空间 (OpenCV使用HSV而不是HSL)
         img_hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV).astype(np.float32)
         
-        # 预先检查是否需要处理 - 性能优化
-        needs_processing = (
-            red_hue != 0 or red_saturation != 0 or red_lightness != 0 or
-            orange_hue != 0 or orange_saturation != 0 or orange_lightness != 0 or
-            yellow_hue != 0 or yellow_saturation != 0 or yellow_lightness != 0 or
-            green_hue != 0 or green_saturation != 0 or green_lightness != 0 or
-            cyan_hue != 0 or cyan_saturation != 0 or cyan_lightness != 0 or
-            blue_hue != 0 or blue_saturation != 0 or blue_lightness != 0 or
-            purple_hue != 0 or purple_saturation != 0 or purple_lightness != 0 or
-            magenta_hue != 0 or magenta_saturation != 0 or magenta_lightness != 0 or
-            hue != 0 or saturation != 0 or lightness != 0 or colorize
-        )
-        
-        print(f"HSL调试 - 需要处理: {needs_processing}, 有遮罩: {mask is not None}")
-        
-        if not needs_processing and mask is None:
-            # 如果没有任何调整且没有遮罩，直接返回原图
-            print("HSL调试 - 跳过处理，返回原图")
-            return image
-        
         # 基于OpenCV HSV真实分布的精确颜色范围定义
         # OpenCV HSV: 0°=红, 30°=黄, 60°=绿, 90°=青, 120°=蓝, 150°=洋红
         color_ranges = {
@@ -689,18 +539,6 @@ class PhotoshopHSLNode(BaseImageNode):
             'magenta': [(155, 170)]           # 洋红：155-170度 **修正**
         }
         
-        # 按照颜色顺序应用各个颜色范围的调整
-        color_adjustments = [
-            ('red', red_hue, red_saturation, red_lightness),
-            ('orange', orange_hue, orange_saturation, orange_lightness),
-            ('yellow', yellow_hue, yellow_saturation, yellow_lightness),
-            ('green', green_hue, green_saturation, green_lightness),
-            ('cyan', cyan_hue, cyan_saturation, cyan_lightness),
-            ('blue', blue_hue, blue_saturation, blue_lightness),
-            ('purple', purple_hue, purple_saturation, purple_lightness),
-            ('magenta', magenta_hue, magenta_saturation, magenta_lightness),
-        ]
-        
         for color_name, hue_shift, sat_shift, light_shift in color_adjustments:
             if hue_shift != 0 or sat_shift != 0 or light_shift != 0:
                 img_hsv = self._adjust_color_range(
@@ -708,51 +546,31 @@ class PhotoshopHSLNode(BaseImageNode):
                     hue_shift, sat_shift, light_shift
                 )
         
+        if colorize:
+            # 彩色化模式：分色调整后的图像只需一次HSV→RGB转换，再由亮度直接着色
+            img_rgb = cv2.cvtColor(np.clip(img_hsv, 0, 255).astype(np.uint8), cv2.COLOR_HSV2RGB)
+            rgb_tensor = torch.from_numpy(img_rgb.astype(np.float32) / 255.0).to(device)
+            result = self._colorize_from_luminance(rgb_tensor, hue, saturation, lightness)
+            if has_alpha:
+                result = torch.cat([result, image[..., 3:]], dim=-1)
+            return result
+        
         # 应用全局HSL调整
-        if hue != 0 or saturation != 0 or lightness != 0 or colorize:
-            if colorize:
-                # 彩色化模式：将图像转为灰度，然后应用单一色相
-                # 计算灰度值（明度）
-                grayscale = cv2.cvtColor(img_hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-                grayscale = cv2.cvtColor(grayscale, cv2.COLOR_BGR2GRAY)
-                
-                # 创建彩色化的HSV图像
-                h, w = grayscale.shape
-                colorized_hsv = np.zeros((h, w, 3), dtype=np.float32)
-                
-                # 设置色相（将-100到+100映射到0-179）
-                target_hue = ((hue + 100) / 200.0) * 179
-                colorized_hsv[:,:,0] = target_hue
-                
-                # 设置饱和度
-                target_saturation = max(0, min(255, (saturation + 100) / 100.0 * 255 / 2))
-                colorized_hsv[:,:,1] = target_saturation
-                
-                # 使用原始亮度信息
-                colorized_hsv[:,:,2] = grayscale.astype(np.float32)
-                
-                # 应用明度调整
-                if lightness != 0:
-                    colorized_hsv[:,:,2] = self._apply_ps_lightness_adjustment(colorized_hsv[:,:,2], lightness)
-                
-                img_hsv = colorized_hsv
-            else:
-                # 常规全局HSL调整
-                if hue != 0:
-                    # 对所有像素应用色相调整
-                    hue_adjustment = hue * 0.6  # 匹配前端映射
-                    current_hue_360 = img_hsv[:,:,0] * 2
-                    adjusted_hue_360 = (current_hue_360 + hue_adjustment) % 360
-                    img_hsv[:,:,0] = adjusted_hue_360 / 2
-                
-                if saturation != 0:
-                    # 对所有像素应用饱和度调整
-                    sat_factor = self._calculate_ps_saturation_factor(saturation)
-                    img_hsv[:,:,1] = np.clip(img_hsv[:,:,1] * sat_factor, 0, 255)
-                
-                if lightness != 0:
-                    # 对所有像素应用明度调整
-                    img_hsv[:,:,2] = self._apply_ps_lightness_adjustment(img_hsv[:,:,2], lightness)
+        if hue != 0:
+            # 对所有像素应用色相调整
+            hue_adjustment = hue * 0.6  # 匹配前端映射
+            current_hue_360 = img_hsv[:,:,0] * 2
+            adjusted_hue_360 = (current_hue_360 + hue_adjustment) % 360
+            img_hsv[:,:,0] = adjusted_hue_360 / 2
+        
+        if saturation != 0:
+            # 对所有像素应用饱和度调整
+            sat_factor = self._calculate_ps_saturation_factor(saturation)
+            img_hsv[:,:,1] = np.clip(img_hsv[:,:,1] * sat_factor, 0, 255)
+        
+        if lightness != 0:
+            # 对所有像素应用明度调整
+            img_hsv[:,:,2] = self._apply_ps_lightness_adjustment(img_hsv[:,:,2], lightness)
         
         # 将HSV值限制在有效范围内
         img_hsv[:,:,0] = np.clip(img_hsv[:,:,0], 0, 179)  # H: 0-179
@@ -766,18 +584,47 @@ class PhotoshopHSLNode(BaseImageNode):
         if has_alpha:
             img_rgba = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGBA)
             img_rgba[:,:,3] = alpha_channel
-            result = torch.from_numpy(img_rgba.astype(np.float32) / 255.0).to(device)
-        else:
-            img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-            result = torch.from_numpy(img_rgb.astype(np.float32) / 255.0).to(device)
+            return torch.from_numpy(img_rgba.astype(np.float32) / 255.0).to(device)
         
-        # 应用遮罩
-        if mask is not None:
-            # 处理遮罩模糊
-            if mask_blur > 0:
-                mask = blur_mask(mask, mask_blur)
-            
-            result = apply_mask_to_image(image, result, mask, invert_mask)
+        img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+        return torch.from_numpy(img_rgb.astype(np.float32) / 255.0).to(device)
+    
+    def _colorize_from_luminance(self, image, hue, saturation, lightness):
+        """
+        彩色化内核：由Rec.601亮度和目标色相/饱和度直接计算输出RGB
+        
+        等价于HSV(目标色相, 目标饱和度, 亮度)→RGB。色相和饱和度是常量，
+        每个输出通道只是亮度乘以一个固定系数，因此一次向量化表达式即可完成。
+        
+        Args:
+            image: float图像 tensor，[H, W, C] 或 [B, H, W, C]，范围0-1
+            hue, saturation, lightness: 全局滑块值（-100 ~ +100）
+        
+        Returns:
+            彩色化后的图像 tensor，保留Alpha通道
+        """
+        rgb = image[..., :3]
+        luminance = (rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114).clamp(0, 1)
+        
+        # 应用明度调整
+        if lightness != 0:
+            luminance = torch.pow(luminance, self._ps_lightness_power(lightness))
+        
+        # 色相映射与原实现一致：-100~+100 → OpenCV色相0-179（即0-358度）
+        hue_degrees = (hue + 100) / 200.0 * 179 * 2
+        target_saturation = max(0.0, min(1.0, (saturation + 100) / 200.0))
+        
+        # HSV→RGB：通道 = V * (1 - S * clamp(min(k, 4 - k), 0, 1))，k = (n + H/60) mod 6
+        channel_weights = []
+        for n in (5, 3, 1):
+            k = (n + hue_degrees / 60.0) % 6
+            channel_weights.append(1.0 - target_saturation * max(0.0, min(k, 4 - k, 1.0)))
+        channel_weights = torch.tensor(channel_weights, dtype=rgb.dtype, device=rgb.device)
+        
+        result = luminance.unsqueeze(-1) * channel_weights
+        
+        if image.shape[-1] > 3:
+            result = torch.cat([result, image[..., 3:]], dim=-1)
         
         return result
     
@@ -884,15 +731,15 @@ class PhotoshopHSLNode(BaseImageNode):
         
         # 将值规范化到0-1范围
         normalized = values / 255.0
+        adjusted = np.power(normalized, self._ps_lightness_power(light_shift))
         
+        # 转换回0-255范围并确保在有效范围内
+        return np.clip(adjusted * 255.0, 0, 255)
+    
+    def _ps_lightness_power(self, light_shift):
+        """PS风格明度调整的幂次"""
         if light_shift > 0:
             # 提亮：使用幂函数保护高光
-            power = 1.0 - (light_shift / 100.0) * 0.5
-            adjusted = np.power(normalized, power)
-        else:
-            # 变暗：使用反向幂函数保护阴影
-            power = 1.0 + (abs(light_shift) / 100.0) * 0.5
-            adjusted = np.power(normalized, power)
-        
-        # 转换回0-255范围并确保在有效范围内
-        return np.clip(adjusted * 255.0, 0, 255)
\ No newline at end of file
+            return 1.0 - (light_shift / 100.0) * 0.5
+        # 变暗：使用反向幂函数保护阴影
+        return 1.0 + (abs(light_shift) / 100.0) * 0.5
\ No newline at end of file
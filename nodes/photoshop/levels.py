@@ -5,10 +5,13 @@ Photoshop风格色阶调整节点
 - RGB、红、绿、蓝、亮度通道独立调整
 - 输入/输出黑点白点控制
 - 中间调伽马校正
-- 自动色阶和自动对比度
+- 自动色阶和自动对比度（视频批次可在帧间平滑黑白场，避免闪烁）
+- 批量参数扫描：一次执行输出多组滑块取值的变体
 - 直方图分析和预览
 """
 
+import functools
+
 import torch
 import numpy as np
 from PIL import Image
@@ -16,7 +19,39 @@ import io
 import base64
 
 from ..core.base_node import BaseImageNode
-from ..core.mask_utils import apply_mask_to_image, blur_mask
+from ..core.mask_utils import apply_mask_to_image, blur_mask, prepare_batch_mask
+from ..core.tiling import get_frame_chunk_size
+from ..core.param_sweep import resolve_parameter_sweep, expand_sweep_batch
+from ..core.histogram import batched_histogram, histogram_bin_edges, histogram_percentiles
+
+# 色阶查找表分辨率：0-255每级细分16份，8位输入恰好落在表项上
+LEVELS_LUT_SIZE = 255 * 16 + 1
+
+
+def _levels_transfer(channel_data, input_black, input_midtones, input_white, output_black, output_white):
+    """色阶传递函数（0-255输入到0-255输出），参数可为标量或可与输入广播的tensor"""
+    # 输入范围调整
+    result = (channel_data - input_black).mul_(1.0 / (input_white - input_black)).clamp_(0, 1)
+    
+    # 伽马校正
+    result.pow_(1.0 / input_midtones)
+    
+    # 输出范围调整
+    return result.mul_(output_white - output_black).add_(output_black).clamp_(0, 255)
+
+
+@functools.lru_cache(maxsize=128)
+def _build_levels_lut(input_black, input_midtones, input_white, output_black, output_white):
+    """
+    构建色阶查找表：输入0-255均匀采样 LEVELS_LUT_SIZE 点，输出0-255（float32）
+    
+    色阶是输入值的一维函数，预先计算后逐像素只需查表插值。模块级缓存由所有节点实例共享，
+    返回的tensor不得原地修改。
+    """
+    channel_data = torch.linspace(0, 255, LEVELS_LUT_SIZE, dtype=torch.float64)
+    return _levels_transfer(
+        channel_data, input_black, input_midtones, input_white, output_black, output_white
+    ).to(torch.float32)
 
 
 class PhotoshopLevelsNode(BaseImageNode):
@@ -102,6 +137,31 @@ class PhotoshopLevelsNode(BaseImageNode):
                     'default': False,
                     'tooltip': '反转遮罩区域'
                 }),
+                'temporal_mode': (['off', 'ema', 'window'], {
+                    'default': 'off',
+                    'tooltip': '视频批次的时域自动色阶：在帧间平滑自动得到的黑白场，避免闪烁（off=逐帧独立，ema=双向指数平滑，window=滑动平均）'
+                }),
+                'temporal_smoothing': ('FLOAT', {
+                    'default': 0.8,
+                    'min': 0.0,
+                    'max': 0.99,
+                    'step': 0.01,
+                    'display': 'number',
+                    'tooltip': 'EMA平滑系数，越大帧间变化越平缓'
+                }),
+                'temporal_window': ('INT', {
+                    'default': 9,
+                    'min': 1,
+                    'max': 121,
+                    'step': 2,
+                    'tooltip': '滑动平均窗口帧数（以当前帧为中心，须为奇数；偶数按加1帧处理）'
+                }),
+                'parameter_sweep': ('STRING', {
+                    'default': '',
+                    'multiline': True,
+                    'tooltip': '批量参数扫描（JSON），如 {"input_black":[0,10,20],"input_midtones":[1.0,1.2,1.4]}，一次输出多个变体；'
+                               '可用参数：input_black/input_midtones/input_white/output_black/output_white'
+                }),
             },
             'hidden': {'unique_id': 'UNIQUE_ID'}
         }
@@ -115,18 +175,34 @@ class PhotoshopLevelsNode(BaseImageNode):
     @classmethod
     def IS_CHANGED(cls, image, channel, input_black=0.0, input_midtones=1.0, input_white=255.0, 
                    output_black=0.0, output_white=255.0, auto_levels=False, auto_contrast=False, 
-                   clip_percentage=0.1, mask=None, mask_blur=0.0, invert_mask=False, unique_id=None):
+                   clip_percentage=0.1, mask=None, mask_blur=0.0, invert_mask=False,
+                   temporal_mode='off', temporal_smoothing=0.8, temporal_window=9, parameter_sweep='', unique_id=None):
         mask_hash = "none" if mask is None else str(hash(mask.data.tobytes()) if hasattr(mask, 'data') else hash(str(mask)))
-        return f"{channel}_{input_black}_{input_white}_{input_midtones}_{output_black}_{output_white}_{auto_levels}_{auto_contrast}_{clip_percentage}_{mask_hash}_{mask_blur}_{invert_mask}"
+        return f"{channel}_{input_black}_{input_white}_{input_midtones}_{output_black}_{output_white}_{auto_levels}_{auto_contrast}_{clip_percentage}_{mask_hash}_{mask_blur}_{invert_mask}_{temporal_mode}_{temporal_smoothing}_{temporal_window}_{parameter_sweep}"
 
     def apply_levels_adjustment(self, image, channel, input_black=0.0, input_midtones=1.0, input_white=255.0,
                                output_black=0.0, output_white=255.0, auto_levels=False, auto_contrast=False,
-                               clip_percentage=0.1, mask=None, mask_blur=0.0, invert_mask=False, unique_id=None):
+                               clip_percentage=0.1, mask=None, mask_blur=0.0, invert_mask=False,
+                               temporal_mode='off', temporal_smoothing=0.8, temporal_window=9, parameter_sweep='',
+                               unique_id=None):
         try:
             # 确保输入图像格式正确
             if image is None:
                 raise ValueError("Input image is None")
             
+            # 参数扫描：滑块为逐帧取值（或给出parameter_sweep）时，一次输出B个变体
+            sweep_size, sweep = resolve_parameter_sweep({
+                'input_black': input_black, 'input_midtones': input_midtones, 'input_white': input_white,
+                'output_black': output_black, 'output_white': output_white,
+            }, parameter_sweep)
+            if sweep_size:
+                image = expand_sweep_batch(image, sweep_size)
+            # 标量参数（扫描时为第一组参数，用于预览）
+            input_black, input_midtones, input_white, output_black, output_white = (
+                float(sweep[key][0]) for key in
+                ('input_black', 'input_midtones', 'input_white', 'output_black', 'output_white')
+            )
+            
             # 发送预览数据到前端（仅当有unique_id时）
             if unique_id is not None:
                 self._send_levels_preview_to_frontend(image, unique_id, mask, {
@@ -141,6 +217,29 @@ class PhotoshopLevelsNode(BaseImageNode):
                     "clip_percentage": clip_percentage
                 })
             
+            # 自动色阶或参数扫描：每帧参数不同，构建逐帧LUT栈后整批一次查表
+            if len(image.shape) == 4 and (auto_levels or auto_contrast or sweep_size):
+                if auto_levels or auto_contrast:
+                    # 自动色阶：整批所有帧、所有通道的直方图一次计算
+                    levels_points = self._calculate_auto_levels_batch(
+                        (image * 255.0).clamp(0, 255), channel, auto_levels, auto_contrast, clip_percentage
+                    )
+                    # 时域模式：在帧间平滑黑白场，避免视频闪烁
+                    if temporal_mode != 'off' and image.shape[0] > 1:
+                        levels_points = self._smooth_levels_points(
+                            levels_points, temporal_mode, temporal_smoothing, temporal_window
+                        )
+                else:
+                    levels_points = np.stack(
+                        [sweep['input_black'], sweep['input_white'], sweep['input_midtones']], axis=1
+                    )
+                
+                if sweep_size:
+                    output_black, output_white = sweep['output_black'], sweep['output_white']
+                return (self._apply_levels_batch(
+                    image, channel, levels_points, output_black, output_white, mask, mask_blur, invert_mask
+                ),)
+            
             # 支持批处理
             if len(image.shape) == 4:
                 return (self.process_batch_images(
@@ -195,75 +294,148 @@ class PhotoshopLevelsNode(BaseImageNode):
     
     def _calculate_auto_levels(self, img_255, channel, auto_levels, auto_contrast, clip_percentage):
         """计算自动色阶参数"""
+        return self._calculate_auto_levels_batch(
+            img_255.unsqueeze(0), channel, auto_levels, auto_contrast, clip_percentage
+        )[0]
+    
+    def _calculate_auto_levels_batch(self, img_255, channel, auto_levels, auto_contrast, clip_percentage):
+        """
+        计算整批的自动色阶参数
+        
+        所有帧、所有相关通道的直方图由一次 bincount 得到，裁剪点在累积分布上用 searchsorted 查找。
+        
+        Returns:
+            每帧的 (黑场, 白场, 伽马) 列表
+        """
+        batch_size, channels = img_255.shape[0], img_255.shape[-1]
+        
         # 将裁剪百分比转换为0-1范围
         clip = clip_percentage / 100.0
         
         if channel == 'RGB':
             # 对RGB三个通道分别计算
-            r_min, r_max = self._calculate_channel_range(img_255[..., 0], clip, auto_levels, auto_contrast)
-            g_min, g_max = self._calculate_channel_range(img_255[..., 1], clip, auto_levels, auto_contrast)
-            b_min, b_max = self._calculate_channel_range(img_255[..., 2], clip, auto_levels, auto_contrast)
-            
-            # 取三个通道的平均值或极值
-            if auto_levels:
-                # 自动色阶：每个通道独立调整
-                min_val = (r_min + g_min + b_min) / 3
-                max_val = (r_max + g_max + b_max) / 3
-            else:
-                # 自动对比度：使用极值
-                min_val = min(r_min, g_min, b_min)
-                max_val = max(r_max, g_max, b_max)
-        
+            data = img_255[..., :3]
         elif channel == 'Luminance':
             # 计算亮度通道
-            if img_255.shape[2] >= 3:
-                luminance = (img_255[..., 0] * 0.299 + 
-                           img_255[..., 1] * 0.587 + 
-                           img_255[..., 2] * 0.114)
-                min_val, max_val = self._calculate_channel_range(luminance, clip, auto_levels, auto_contrast)
+            if channels >= 3:
+                data = (img_255[..., 0] * 0.299 + 
+                        img_255[..., 1] * 0.587 + 
+                        img_255[..., 2] * 0.114).unsqueeze(-1)
             else:
-                min_val, max_val = self._calculate_channel_range(img_255[..., 0], clip, auto_levels, auto_contrast)
-        
+                data = img_255[..., :1]
         else:
             # 单通道
             channel_idx = {'R': 0, 'G': 1, 'B': 2}.get(channel, 0)
-            if channel_idx < img_255.shape[2]:
-                min_val, max_val = self._calculate_channel_range(img_255[..., channel_idx], clip, auto_levels, auto_contrast)
+            if channel_idx >= channels:
+                return [(0, 255, 1.0)] * batch_size
+            data = img_255[..., channel_idx:channel_idx + 1]
+        
+        # 直方图 [B, K, 256] 与裁剪点
+        hist = batched_histogram(data, bins=256, value_range=(0, 255))
+        bin_edges = histogram_bin_edges(256, (0, 255))
+        ranges = bin_edges[histogram_percentiles(hist, [clip, 1 - clip])]  # [B, K, 2]
+        min_vals, max_vals = ranges[..., 0], ranges[..., 1]
+        
+        if channel == 'RGB':
+            # 取三个通道的平均值或极值
+            if auto_levels:
+                # 自动色阶：每个通道独立调整
+                min_vals = min_vals.mean(axis=1)
+                max_vals = max_vals.mean(axis=1)
             else:
-                min_val, max_val = 0, 255
+                # 自动对比度：使用极值
+                min_vals = min_vals.min(axis=1)
+                max_vals = max_vals.max(axis=1)
+        else:
+            min_vals, max_vals = min_vals[:, 0], max_vals[:, 0]
         
-        # 确保有效范围
-        min_val = max(0, min(254, min_val))
-        max_val = max(min_val + 1, min(255, max_val))
+        # 确保有效范围，伽马值保持为1.0
+        points = []
+        for min_val, max_val in zip(min_vals, max_vals):
+            min_val = max(0, min(254, float(min_val)))
+            max_val = max(min_val + 1, min(255, float(max_val)))
+            points.append((min_val, max_val, 1.0))
+        return points
+    
+    def _smooth_levels_points(self, levels_points, temporal_mode, temporal_smoothing, temporal_window):
+        """
+        在帧间平滑每帧的 (黑场, 白场, 伽马)
+        
+        ema: 先正向再反向各做一次指数平滑，批次是离线的整段视频，双向平滑没有相位滞后
+        window: 以当前帧为中心的滑动平均，首尾帧只对窗口内实际存在的帧求平均；
+                窗口须为奇数，偶数窗口无法以当前帧为中心，按 temporal_window+1 帧处理
+        平滑是各帧参数的加权平均，白场 >= 黑场+1 的约束保持成立。
+        """
+        points = np.asarray(levels_points, dtype=np.float64)  # [B, 3]
+        batch_size = points.shape[0]
+        
+        if temporal_mode == 'ema':
+            k = max(0.0, min(0.99, float(temporal_smoothing)))
+            smoothed = points.copy()
+            for i in range(1, batch_size):
+                smoothed[i] = k * smoothed[i - 1] + (1.0 - k) * smoothed[i]
+            for i in range(batch_size - 2, -1, -1):
+                smoothed[i] = k * smoothed[i + 1] + (1.0 - k) * smoothed[i]
+        elif temporal_mode == 'window':
+            window = max(1, int(temporal_window))
+            if window % 2 == 0:
+                print(f"⚠️ 时域窗口须为奇数，{window}帧按{window + 1}帧处理")
+            radius = window // 2
+            # 前缀和求每帧窗口 [i-radius, i+radius] 内的平均
+            cumsum = np.concatenate([np.zeros((1, 3)), np.cumsum(points, axis=0)])
+            lo = np.clip(np.arange(batch_size) - radius, 0, batch_size)
+            hi = np.clip(np.arange(batch_size) + radius + 1, 0, batch_size)
+            smoothed = (cumsum[hi] - cumsum[lo]) / (hi - lo)[:, np.newaxis]
+        else:
+            print(f"⚠️ 不支持的时域模式 {temporal_mode}，逐帧独立计算")
+            return levels_points
         
-        # 返回计算的参数
-        return min_val, max_val, 1.0  # 伽马值保持为1.0
+        return [tuple(row) for row in smoothed]
     
-    def _calculate_channel_range(self, channel_data, clip, auto_levels, auto_contrast):
-        """计算通道的范围"""
-        # 转换为numpy数组
-        data = channel_data.cpu().numpy().flatten()
+    def _apply_levels_batch(self, image, channel, levels_points, output_black, output_white, mask, mask_blur, invert_mask):
+        """
+        按每帧的 (黑场, 白场, 伽马) 对整批应用色阶
         
-        # 计算直方图
-        hist, bins = np.histogram(data, bins=256, range=(0, 255))
+        每帧参数构建一张查找表，得到 [B, LEVELS_LUT_SIZE] 的LUT栈，整批一次查表插值。
+        output_black / output_white 可为标量或长度为B的数组（参数扫描）。
+        """
+        batch_size, height, width, channels = image.shape
+        points = np.asarray(levels_points, dtype=np.float64)
+        params = [param.to(image.device) for param in self._build_levels_params(
+            points[:, 0], points[:, 2], points[:, 1], output_black, output_white
+        )]
+        lut_stack = self._build_levels_lut_stack(params)
         
-        # 计算累积分布
-        cdf = hist.cumsum()
-        cdf = cdf / cdf[-1]  # 归一化
+        # 准备遮罩（整批只羽化一次）
+        masks = None
+        if mask is not None:
+            masks = prepare_batch_mask(mask, batch_size, height, width, mask_blur, invert_mask)
+            if masks is None:
+                return image
+            masks = masks.to(image.device)
+        
+        result = torch.empty(image.shape, dtype=torch.float32, device=image.device)
+        # 每像素工作内存：0-255数据与结果、查表位置、插值权重、int64索引和两次取表
+        chunk = get_frame_chunk_size(height * width, channels * (4 * 6 + 8)) or batch_size
         
-        # 计算裁剪点
-        min_val = bins[np.argwhere(cdf >= clip)[0, 0]]
-        max_val = bins[np.argwhere(cdf >= (1 - clip))[0, 0]]
+        for start in range(0, batch_size, chunk):
+            end = min(start + chunk, batch_size)
+            frames = image[start:end].to(torch.float32)
+            adjusted = self._apply_levels_lut(
+                frames, channel, lut_stack[start:end], [param[start:end] for param in params]
+            )
+            
+            # 应用遮罩：遮罩为1处取调整结果，为0处保留原图
+            if masks is not None:
+                frame_masks = masks[start:end] if masks.shape[0] > 1 else masks
+                adjusted = torch.lerp(frames, adjusted, frame_masks)
+            
+            result[start:end] = adjusted
         
-        return min_val, max_val
+        return result
     
     def _apply_levels_adjustment(self, image, channel, input_black, input_white, input_midtones, output_black, output_white):
         """应用色阶调整"""
-        device = image.device
-        
-        # 将图像转换为0-255范围
-        img_255 = (image * 255.0).clamp(0, 255)
-        
         # 确保参数有效
         input_black = max(0, min(254, input_black))
         input_white = max(input_black + 1, min(255, input_white))
@@ -271,78 +443,135 @@ class PhotoshopLevelsNode(BaseImageNode):
         output_white = max(output_black + 1, min(255, output_white))
         input_midtones = max(0.1, min(9.99, input_midtones))
         
+        params = (float(input_black), float(input_midtones), float(input_white), float(output_black), float(output_white))
+        lut = _build_levels_lut(*params).to(image.device)
+        return self._apply_levels_lut(image, channel, lut, params)
+    
+    def _apply_levels_lut(self, image, channel, lut, params):
+        """
+        按通道模式在色阶查找表上查表
+        
+        image 为 [..., C] 的0-1图像；lut 为 [N]（单张），或 [B, N]（与 image 的第一维逐帧对应）；
+        params 为生成查找表的 (黑场, 伽马, 白场, 输出黑场, 输出白场)，单张时为标量，逐帧时为长度B的tensor。
+        """
+        # 将图像转换为0-255范围
+        img_255 = (image * 255.0).clamp(0, 255)
+        channels = img_255.shape[-1]
+        
         # 应用色阶调整
         if channel == 'RGB':
-            # 对所有通道应用
-            result = torch.zeros_like(img_255)
-            for c in range(min(3, img_255.shape[2])):
-                result[..., c] = self._apply_levels_to_channel(
-                    img_255[..., c], input_black, input_midtones, input_white, output_black, output_white
-                )
-            # 如果有alpha通道，保持不变
-            if img_255.shape[2] > 3:
-                result[..., 3:] = img_255[..., 3:]
+            # 对所有颜色通道一次查表，alpha通道保持不变
+            result = img_255.clone()
+            color_channels = min(3, channels)
+            result[..., :color_channels] = self._lookup_levels_lut(img_255[..., :color_channels], lut, params)
         elif channel == 'Luminance':
             # 对亮度应用调整，保持色彩
-            if img_255.shape[2] >= 3:
-                # 转换到HSV空间
-                result = self._adjust_luminance_only(img_255, input_black, input_midtones, input_white, output_black, output_white)
+            if channels >= 3:
+                result = self._adjust_luminance_only(img_255, lut, params)
             else:
-                result = self._apply_levels_to_channel(
-                    img_255[..., 0], input_black, input_midtones, input_white, output_black, output_white
-                ).unsqueeze(-1)
+                result = self._lookup_levels_lut(img_255[..., 0], lut, params).unsqueeze(-1)
         else:
             # 对单个通道应用
             channel_idx = {'R': 0, 'G': 1, 'B': 2}.get(channel, 0)
             result = img_255.clone()
-            if channel_idx < img_255.shape[2]:
-                result[..., channel_idx] = self._apply_levels_to_channel(
-                    img_255[..., channel_idx], input_black, input_midtones, input_white, output_black, output_white
-                )
+            if channel_idx < channels:
+                result[..., channel_idx] = self._lookup_levels_lut(img_255[..., channel_idx], lut, params)
         
         # 转换回0-1范围
         result = (result / 255.0).clamp(0, 1)
         
         return result
     
-    def _apply_levels_to_channel(self, channel_data, input_black, input_midtones, input_white, output_black, output_white):
-        """对单个通道应用色阶调整"""
-        # 输入范围调整
-        normalized = (channel_data - input_black) / (input_white - input_black)
-        normalized = torch.clamp(normalized, 0, 1)
+    def _build_levels_params(self, input_blacks, input_midtones, input_whites, output_black, output_white):
+        """
+        整理逐帧色阶参数
         
-        # 伽马校正
-        gamma_corrected = torch.pow(normalized, 1.0 / input_midtones)
+        每帧参数不同（时域平滑后的自动色阶、参数扫描）。输入参数为长度B的数组，输出黑白场可为标量或长度B的数组。
         
-        # 输出范围调整
-        result = gamma_corrected * (output_white - output_black) + output_black
+        Returns:
+            (黑场, 伽马, 白场, 输出黑场, 输出白场)，各为长度B的float32 tensor
+        """
+        def as_vector(values):
+            # 扫描参数可能是 np.broadcast_to 得到的只读视图，复制后再转tensor
+            return torch.tensor(np.array(values, dtype=np.float32)).reshape(-1)
         
-        return torch.clamp(result, 0, 255)
-    
-    def _adjust_luminance_only(self, img_255, input_black, input_midtones, input_white, output_black, output_white):
-        """仅调整亮度，保持色彩"""
-        # 转换到HSV空间进行亮度调整
-        rgb = img_255 / 255.0
+        # 确保参数有效（与 _apply_levels_adjustment 一致）
+        input_blacks = as_vector(input_blacks).clamp(0, 254)
+        input_whites = torch.maximum(as_vector(input_whites).clamp(max=255), input_blacks + 1)
+        input_midtones = as_vector(input_midtones).clamp(0.1, 9.99)
+        output_black = as_vector(output_black).clamp(0, 254)
+        output_white = torch.maximum(as_vector(output_white).clamp(max=255), output_black + 1)
         
-        # 简化的RGB到HSV转换（仅处理V通道）
-        max_vals, _ = torch.max(rgb, dim=2, keepdim=True)
-        min_vals, _ = torch.min(rgb, dim=2, keepdim=True)
+        return torch.broadcast_tensors(input_blacks, input_midtones, input_whites, output_black, output_white)
+    
+    def _build_levels_lut_stack(self, params):
+        """
+        按 _build_levels_params 的逐帧参数构建色阶查找表栈 [B, LEVELS_LUT_SIZE]
         
-        # 调整V通道（亮度）
-        v_channel = max_vals.squeeze(-1) * 255.0
-        adjusted_v = self._apply_levels_to_channel(v_channel, input_black, input_midtones, input_white, output_black, output_white)
-        adjusted_v = adjusted_v / 255.0
+        逐帧参数作为 [B, 1] 与采样点广播，一次算出整栈（float64计算，float32存储）。
+        """
+        device = params[0].device
+        channel_data = torch.linspace(0, 255, LEVELS_LUT_SIZE, dtype=torch.float64, device=device)
+        columns = [param.to(torch.float64).reshape(-1, 1) for param in params]
+        return _levels_transfer(channel_data[None, :], *columns).to(torch.float32)
+    
+    def _lookup_levels_lut(self, values_255, lut, params):
+        """
+        在色阶查找表上线性插值，values_255 为任意形状的0-255 tensor
         
-        # 计算调整比例
-        adjustment_ratio = torch.where(max_vals.squeeze(-1) > 0, adjusted_v / max_vals.squeeze(-1), torch.ones_like(adjusted_v))
-        adjustment_ratio = adjustment_ratio.unsqueeze(-1)
+        lut 为 [B, N] 的LUT栈时，values_255 的第一维与帧对应，各帧索引加上所在表的偏移后在展平表中一次取值。
+        黑场以上第一个8位色阶内的像素随后改为精确计算（见 _refine_near_black）。
+        """
+        size = lut.shape[-1]
+        position = values_255.to(torch.float32).clamp(0, 255) * ((size - 1) / 255.0)
+        index = position.long().clamp_(max=size - 2)
+        fraction = position - index
+        if lut.dim() == 2:
+            index += (torch.arange(lut.shape[0], device=index.device) * size).reshape((-1,) + (1,) * (index.dim() - 1))
+            lut = lut.reshape(-1)
+        result = torch.lerp(lut[index], lut[index + 1], fraction)
+        return self._refine_near_black(values_255, result, params)
+    
+    def _refine_near_black(self, values_255, result, params):
+        """
+        黑场以上第一个8位色阶内的像素改为精确求幂
         
-        # 应用调整比例到RGB
-        result = rgb * adjustment_ratio
-        result = torch.clamp(result, 0, 1) * 255.0
+        伽马大于1时 t^(1/γ) 在黑场处斜率无界，线性插值在黑场附近的表项间误差最大（伽马9.99时约0.3级）；
+        离开黑场一级（16个表项）之后插值误差降到0.01级以下。8位输入落在表项上本来就是精确值，
+        该区间通常只有少量像素，只对它们直接求幂，其余像素仍只查表。
+        """
+        input_black, input_midtones = params[0], params[1]
+        if isinstance(input_midtones, torch.Tensor):
+            if not bool((input_midtones > 1).any()):
+                return result
+            shape = (-1,) + (1,) * (values_255.dim() - 1)
+            black = input_black.reshape(shape)
+            near_black = (values_255 > black) & (values_255 <= black + 1) & (input_midtones > 1).reshape(shape)
+        else:
+            if input_midtones <= 1:
+                return result
+            near_black = (values_255 > input_black) & (values_255 <= input_black + 1)
         
+        index = near_black.nonzero(as_tuple=True)
+        if index[0].numel() == 0:
+            return result
+        if isinstance(input_midtones, torch.Tensor):
+            selected = [param.reshape(shape).expand(values_255.shape)[index] for param in params]
+        else:
+            selected = params
+        result[index] = _levels_transfer(values_255[index].to(torch.float32), *selected)
         return result
     
+    def _adjust_luminance_only(self, img_255, lut, params):
+        """仅调整亮度（HSV的V通道），保持色彩"""
+        # V通道即各通道最大值，直接在0-255范围内查表
+        v_channel = torch.amax(img_255, dim=-1, keepdim=True)
+        adjusted_v = self._lookup_levels_lut(v_channel, lut, params)
+        
+        # 按调整比例缩放RGB（V为0的像素本身为0，比例不影响结果）
+        adjustment_ratio = adjusted_v / v_channel.clamp(min=1e-8)
+        return torch.clamp(img_255 * adjustment_ratio, 0, 255)
+    
     def _send_levels_preview_to_frontend(self, image, unique_id, mask, levels_data):
         """发送色阶预览数据到前端"""
         try:
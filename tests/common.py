@@ -0,0 +1,17 @@
+"""
+测试公共工具
+"""
+
+import importlib
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_plugin_module(relative_name):
+    """以包的形式导入插件子模块，例如 'nodes.core.histogram'"""
+    parent = os.path.dirname(REPO_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    return importlib.import_module(f"{os.path.basename(REPO_DIR)}.{relative_name}")
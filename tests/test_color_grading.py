@@ -0,0 +1,110 @@
+"""
+色彩分级查找表路径与原逐像素公式的回归测试
+
+用法：
+    python -m pytest tests/test_color_grading.py
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from common import import_plugin_module
+
+color_grading = import_plugin_module('nodes.lightroom.color_grading')
+
+# 查找表按亮度量化为4096级，区域权重的斜率有限，误差远小于8位色阶的一级
+ATOL = 2e-3
+
+
+def region_weight(luminance, region, balance):
+    """原实现的区域遮罩：阴影/高光为Sigmoid，中间调为高斯"""
+    balance_normalized = balance / 100.0
+    if region == 'shadows':
+        mask = 1 / (1 + np.exp(-((0.25 + balance_normalized * 0.2) - luminance) / 0.15))
+    elif region == 'highlights':
+        mask = 1 / (1 + np.exp(-(luminance - (0.75 - balance_normalized * 0.2)) / 0.15))
+    else:
+        mask = np.exp(-0.5 * ((luminance - (0.5 + balance_normalized * 0.1)) / 0.35) ** 2) * 1.2
+    return np.clip(mask, 0, 1)
+
+
+def reference_grading(image, shadows, midtones, highlights, blend, balance, overall_strength):
+    """原 _process_single_image 的逐像素公式（normal混合模式、无遮罩），image 为 [H, W, C] numpy"""
+    alpha = image[..., 3:] if image.shape[-1] == 4 else None
+    rgb = image[..., :3].astype(np.float64)
+    luminance = rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+    delta = np.zeros_like(rgb)
+
+    for region, (hue, sat, lum) in (('shadows', shadows), ('midtones', midtones), ('highlights', highlights)):
+        weight = region_weight(luminance, region, balance)
+        if hue != 0 or sat != 0:
+            strength = weight * overall_strength
+            if sat >= 0:
+                hue_rad = np.deg2rad(hue)
+                offset_a = np.cos(hue_rad) * sat / 100.0 * 0.7
+                offset_b = np.sin(hue_rad) * sat / 100.0 * 0.7
+                hue_normalized = hue % 360
+                if hue_normalized >= 330 or hue_normalized <= 30:
+                    offset_a *= 1.1
+                elif 150 <= hue_normalized <= 210:
+                    offset_a *= 0.9
+                elif 60 <= hue_normalized <= 120:
+                    offset_b *= 0.95
+                elif 240 <= hue_normalized <= 300:
+                    offset_b *= 1.05
+                delta[..., 0] += (offset_a * 0.6 + offset_b * 0.3) * strength
+                delta[..., 1] += (-offset_a * 0.5 + offset_b * 0.2) * strength
+                delta[..., 2] += (-offset_a * 0.1 - offset_b * 0.8) * strength
+            else:
+                delta += (luminance[..., np.newaxis] - rgb) * (abs(sat) / 100.0 * strength)[..., np.newaxis]
+        if lum != 0:
+            delta += (lum / 100.0 * weight * overall_strength * 0.2)[..., np.newaxis]
+
+    result = rgb + delta
+    if blend < 100.0:
+        result = rgb * (1.0 - blend / 100.0) + result * (blend / 100.0)
+    result = np.clip(result, 0, 1)
+    if alpha is not None:
+        result = np.concatenate([result, alpha], axis=-1)
+    return result
+
+
+def grade(image, shadows, midtones, highlights, blend, balance, overall_strength):
+    node = color_grading.ColorGradingNode()
+    return node._process_batch(
+        torch.from_numpy(image),
+        *shadows, *midtones, *highlights,
+        blend, balance, 'normal', overall_strength,
+        None, 0.0, False
+    ).numpy()
+
+
+CASES = [
+    # 正饱和度（各色相敏感度区间）与明度
+    ((20.0, 40.0, -10.0), (120.0, 25.0, 5.0), (45.0, 60.0, 15.0), 100.0, 0.0, 1.0),
+    ((350.0, 30.0, 0.0), (180.0, 50.0, 0.0), (270.0, 35.0, -20.0), 100.0, 30.0, 1.5),
+    # 负饱和度（朝灰度混合）
+    ((0.0, -60.0, 0.0), (90.0, -30.0, 10.0), (200.0, -100.0, 0.0), 100.0, -40.0, 1.0),
+    # 正负混合、blend < 100
+    ((220.0, 50.0, 10.0), (0.0, -40.0, 0.0), (40.0, 30.0, -5.0), 50.0, 0.0, 1.0),
+    ((300.0, -20.0, 0.0), (60.0, 70.0, 0.0), (150.0, 20.0, 25.0), 25.0, 60.0, 0.7),
+]
+
+
+@pytest.mark.parametrize('channels', [3, 4])
+@pytest.mark.parametrize('shadows, midtones, highlights, blend, balance, overall_strength', CASES)
+def test_lut_path_matches_baseline_formula(channels, shadows, midtones, highlights, blend, balance,
+                                           overall_strength):
+    rng = np.random.default_rng(0)
+    image = rng.random((2, 24, 32, channels), dtype=np.float32)
+
+    result = grade(image, shadows, midtones, highlights, blend, balance, overall_strength)
+
+    assert result.shape == image.shape
+    for frame, expected in zip(result, image):
+        np.testing.assert_allclose(
+            frame, reference_grading(expected, shadows, midtones, highlights, blend, balance, overall_strength),
+            atol=ATOL)
+    if channels == 4:
+        np.testing.assert_array_equal(result[..., 3], image[..., 3])
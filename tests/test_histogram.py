@@ -0,0 +1,66 @@
+"""
+batched_histogram 与 np.histogram 的一致性测试
+
+用法：
+    python -m pytest tests/test_histogram.py
+"""
+
+import numpy as np
+import pytest
+import torch
+
+from common import import_plugin_module
+
+histogram = import_plugin_module('nodes.core.histogram')
+
+
+def reference_histogram(data, bins, value_range):
+    """逐帧逐通道调用 np.histogram，结果 [B, C, bins]"""
+    data = np.asarray(data)
+    batch, channels = data.shape[0], data.shape[-1]
+    values = data.reshape(batch, -1, channels)
+    return np.stack([
+        np.stack([np.histogram(values[i, :, c], bins=bins, range=value_range)[0] for c in range(channels)])
+        for i in range(batch)
+    ])
+
+
+@pytest.mark.parametrize('bins', [256, 64])
+def test_matches_numpy_in_range(bins):
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 256, size=(3, 17, 23, 3)).astype(np.float32)
+    # 右端点落入最后一组
+    data[0, 0, 0, 0] = 255.0
+    data[1, 5, 7, 2] = 255.0
+    data[2, 0, 0, 1] = 0.0
+
+    result = histogram.batched_histogram(data, bins=bins, value_range=(0.0, 255.0))
+
+    assert result.dtype == np.int64
+    np.testing.assert_array_equal(result, reference_histogram(data, bins, (0.0, 255.0)))
+
+
+def test_out_of_range_and_nan_are_not_counted():
+    rng = np.random.default_rng(1)
+    data = rng.integers(0, 256, size=(2, 9, 11, 4)).astype(np.float32)
+    data[0, 0, :4, 0] = [-1.0, -0.001, 255.001, 300.0]
+    data[1, 3, 2, :] = np.nan
+    data[1, 8, 10, 3] = 255.0
+
+    result = histogram.batched_histogram(torch.from_numpy(data), bins=256, value_range=(0.0, 255.0))
+
+    expected = reference_histogram(np.where(np.isnan(data), -1.0, data), 256, (0.0, 255.0))
+    np.testing.assert_array_equal(result, expected)
+    assert result[0, 0].sum() == 9 * 11 - 4
+    assert result[1, 0].sum() == 9 * 11 - 1
+
+
+def test_unit_range():
+    rng = np.random.default_rng(2)
+    data = rng.random((2, 32, 32, 1), dtype=np.float32)
+    data[0, 0, 0, 0] = 1.0
+    data[1, 0, 0, 0] = 1.5
+
+    result = histogram.batched_histogram(data, bins=256, value_range=(0.0, 1.0))
+
+    np.testing.assert_array_equal(result, reference_histogram(data, 256, (0.0, 1.0)))